@@ -0,0 +1,404 @@
+"""
+Reproducible performance benchmarks for the pricing service and environment.
+
+    python benchmarks/run_benchmarks.py --out benchmarks/results/latest.json
+    python benchmarks/run_benchmarks.py --compare benchmarks/results/baseline.json
+
+Sections: service (/predict latency + throughput through an in-process ASGI
+client), requests (server-side requests/sec per worker, legacy vs fast
+request path), micro (hot-path functions), env (steps/sec) and preprocess
+(time and peak memory vs dataset size). Results are written as JSON so runs can be
+diffed; --compare flags metrics that regressed by more than --threshold.
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import platform
+import argparse
+import subprocess
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, PROJECT_ROOT)
+
+DATA_PATH = os.path.join(PROJECT_ROOT, "data", "synthetic_ecommerce_data.csv")
+PREPROCESS_SCRIPT = os.path.join(PROJECT_ROOT, "src", "preprocess_save_scaler.py")
+
+from src.pricing import FEATURES  # noqa: E402
+
+SECTIONS = ("service", "requests", "micro", "env", "preprocess")
+
+
+# -----------------------------
+# Helpers
+# -----------------------------
+def percentiles(samples_s):
+    ms = np.asarray(samples_s) * 1000.0
+    return {
+        "p50_ms": round(float(np.percentile(ms, 50)), 4),
+        "p90_ms": round(float(np.percentile(ms, 90)), 4),
+        "p99_ms": round(float(np.percentile(ms, 99)), 4),
+        "mean_ms": round(float(ms.mean()), 4),
+    }
+
+def time_per_call(fn, min_time=0.2, repeat=5):
+    """Median seconds per call over `repeat` runs of at least `min_time` each."""
+    fn()
+    n = 1
+    while True:
+        t0 = time.perf_counter()
+        for _ in range(n):
+            fn()
+        if time.perf_counter() - t0 >= min_time / repeat or n >= 1 << 20:
+            break
+        n *= 2
+    runs = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(n):
+            fn()
+        runs.append((time.perf_counter() - t0) / n)
+    return float(np.median(runs))
+
+def scale_dataset(n_rows, seed=0):
+    """
+    Scale the shipped CSV up (or down) to `n_rows` by resampling rows with
+    replacement and jittering prices / indices, so larger runs are not just
+    exact copies of the same 1.5k rows.
+    """
+    base = pd.read_csv(DATA_PATH)
+    rng = np.random.default_rng(seed)
+    df = base.iloc[rng.integers(0, len(base), size=n_rows)].reset_index(drop=True)
+    for col in ("actual_price", "selling_price", "ebay_price"):
+        df[col] = (df[col] * rng.uniform(0.95, 1.05, n_rows)).round(2)
+    for col in ("demand_index", "user_interest"):
+        df[col] = np.clip(df[col] + rng.normal(0, 0.02, n_rows), 0.0, 1.0)
+    return df
+
+def sample_payloads(n, seed=0):
+    df = scale_dataset(n, seed)
+    return [{k: (int(v) if k in ("day_of_week", "season") else float(v)) for k, v in row.items()}
+            for row in df[FEATURES].to_dict("records")]
+
+# -----------------------------
+# Service: /predict through an in-process ASGI client
+# -----------------------------
+def bench_service(quick=False, use_cache=False):
+    import httpx
+    from src import app_fastapi
+
+    app_fastapi.load_model()
+    n_requests = 500 if quick else 3000
+    payloads = sample_payloads(n_requests)
+    results = {}
+
+    async def run(concurrency):
+        transport = httpx.ASGITransport(app=app_fastapi.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for p in payloads[:20]:  # warm-up
+                await client.post("/predict", json=p)
+
+            latencies = []
+            queue = list(payloads)
+
+            async def worker():
+                while queue:
+                    p = queue.pop()
+                    t0 = time.perf_counter()
+                    r = await client.post("/predict", json=p)
+                    latencies.append(time.perf_counter() - t0)
+                    r.raise_for_status()
+
+            t0 = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+            elapsed = time.perf_counter() - t0
+            return {"requests": len(latencies), "throughput_rps": round(len(latencies) / elapsed, 1),
+                    **percentiles(latencies)}
+
+    for concurrency in (1, 16, 64):
+        results[f"predict_c{concurrency}"] = asyncio.run(run(concurrency))
+
+    batch = {"products": payloads[:256]}
+
+    async def run_batch():
+        transport = httpx.ASGITransport(app=app_fastapi.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            await client.post("/predict_batch", json=batch)
+            samples = []
+            for _ in range(10 if quick else 40):
+                t0 = time.perf_counter()
+                (await client.post("/predict_batch", json=batch)).raise_for_status()
+                samples.append(time.perf_counter() - t0)
+            return {"batch_size": 256, **percentiles(samples),
+                    "rows_per_sec": round(256 / float(np.median(samples)), 1)}
+
+    results["predict_batch_256"] = asyncio.run(run_batch())
+    results["config"] = {"cache": use_cache, "batching": app_fastapi.PREDICT_BATCHING,
+                         "max_batch_size": app_fastapi.PREDICT_MAX_BATCH_SIZE,
+                         "max_wait_ms": app_fastapi.PREDICT_MAX_WAIT_MS}
+    return results
+
+# -----------------------------
+# Requests: server-side cost per /predict, legacy vs fast request path
+# -----------------------------
+# Drives the ASGI app directly (no HTTP client in the loop), so the number is
+# what one worker process can serve. Each mode runs in a fresh interpreter
+# because PREDICT_FAST_PATH / PREDICT_BATCHING are read at import.
+_ASGI_RUNNER = """
+import asyncio, json, sys, time
+sys.path.insert(0, sys.argv[1])
+from src import app_fastapi
+app_fastapi.load_model()
+payloads = [json.dumps(p).encode() for p in json.loads(sys.argv[2])]
+n_requests, concurrency = int(sys.argv[3]), int(sys.argv[4])
+
+async def call(body):
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+             "scheme": "http", "path": "/predict", "raw_path": b"/predict", "root_path": "",
+             "query_string": b"", "client": ("127.0.0.1", 1), "server": ("127.0.0.1", 8000),
+             "headers": [(b"content-type", b"application/json"),
+                         (b"content-length", str(len(body)).encode())]}
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    status = []
+    async def receive():
+        return messages.pop() if messages else {"type": "http.disconnect"}
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status.append(message["status"])
+    await app_fastapi.app(scope, receive, send)
+    assert status == [200], status
+
+async def main():
+    for body in payloads[:50]:
+        await call(body)
+    queue = [payloads[i % len(payloads)] for i in range(n_requests)]
+    async def worker():
+        while queue:
+            await call(queue.pop())
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    print("BENCH", n_requests / (time.perf_counter() - t0))
+
+asyncio.run(main())
+"""
+
+def bench_requests(quick=False):
+    payloads = json.dumps(sample_payloads(500))
+    n_requests = 2000 if quick else 10000
+    scenarios = {
+        "sequential_rps": {"PREDICT_BATCHING": "0", "concurrency": 1},
+        "c64_batched_rps": {"PREDICT_BATCHING": "1", "concurrency": 64},
+    }
+    results = {}
+    for mode, fast in (("legacy", "0"), ("fast", "1")):
+        results[mode] = {}
+        for name, cfg in scenarios.items():
+            env = {**os.environ, "PREDICT_FAST_PATH": fast, "PREDICT_BATCHING": cfg["PREDICT_BATCHING"],
+                   "MODEL_WATCH_INTERVAL_S": "0"}
+            out = subprocess.run(
+                [sys.executable, "-c", _ASGI_RUNNER, PROJECT_ROOT, payloads, str(n_requests),
+                 str(cfg["concurrency"])],
+                capture_output=True, text=True, check=True, env=env,
+            ).stdout
+            rps = float(next(l for l in out.splitlines() if l.startswith("BENCH")).split()[1])
+            results[mode][name] = round(rps, 1)
+    results["speedup"] = {name: round(results["fast"][name] / results["legacy"][name], 2)
+                          for name in scenarios}
+    return results
+
+# -----------------------------
+# Micro: hot-path functions
+# -----------------------------
+def bench_micro(quick=False):
+    from src import app_fastapi
+    from src.pricing import RULES, price_products, products_to_matrix
+
+    app_fastapi.load_model()
+    engine = app_fastapi.get_engine()
+    product = app_fastapi.Product(**sample_payloads(1)[0])
+    X1 = products_to_matrix([product])
+    X256 = np.array([[p[k] for k in FEATURES] for p in sample_payloads(256)], dtype=np.float64)
+    min_time = 0.1 if quick else 0.5
+
+    timings = {
+        "products_to_matrix_1": time_per_call(lambda: products_to_matrix([product]), min_time),
+        "policy_predict_1": time_per_call(lambda: engine.predict(X1), min_time),
+        "policy_predict_256": time_per_call(lambda: engine.predict(X256), min_time),
+        "rules_apply_one": time_per_call(lambda: RULES.apply_one(1234.5, X1[0].tolist(), 0), min_time),
+        "price_products_1": time_per_call(lambda: price_products(engine, X1), min_time),
+        "price_products_256": time_per_call(lambda: price_products(engine, X256), min_time),
+        "predict_rows_1": time_per_call(lambda: app_fastapi.predict_rows(X1), min_time),
+    }
+    return {name: {"us_per_call": round(t * 1e6, 3)} for name, t in timings.items()}
+
+# -----------------------------
+# Env: steps/sec
+# -----------------------------
+def bench_env(quick=False):
+    from src.vec_pricing_env import ArrayPricingEnv, VecPricingEnv, load_pricing_arrays
+
+    n_steps = 2_000 if quick else 20_000
+    rng = np.random.default_rng(0)
+    actions = rng.uniform(-0.3, 0.3, size=(n_steps, 1)).astype(np.float32)
+
+    def run_single(env, steps):
+        env.reset()
+        t0 = time.perf_counter()
+        for a in actions[:steps]:
+            _, _, done, _ = env.step(a)
+            if done:
+                env.reset()
+        return steps / (time.perf_counter() - t0)
+
+    arrays = load_pricing_arrays()
+    results = {
+        "array_env_steps_per_sec": round(run_single(ArrayPricingEnv(arrays=arrays, seed=0), n_steps), 1),
+    }
+
+    k = 64
+    venv = VecPricingEnv(k, arrays=arrays, seed=0)
+    venv.reset()
+    batch_actions = rng.uniform(-0.3, 0.3, size=(k, 1))
+    iters = max(1, (n_steps * 10) // k)
+    t0 = time.perf_counter()
+    for _ in range(iters):
+        venv.step(batch_actions)
+    results[f"vec_env_{k}_steps_per_sec"] = round(iters * k / (time.perf_counter() - t0), 1)
+    return results
+
+# -----------------------------
+# Preprocess: time and peak memory vs dataset size
+# -----------------------------
+_PREPROCESS_RUNNER = """
+import resource, runpy, sys, time
+sys.argv = [sys.argv[1]] + sys.argv[2:]
+t0 = time.perf_counter()
+runpy.run_path(sys.argv[0], run_name="__main__")
+elapsed = time.perf_counter() - t0
+print("BENCH", elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+def bench_preprocess(quick=False):
+    sizes = (1_500, 15_000, 150_000) if quick else (1_500, 15_000, 150_000, 1_500_000)
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_rows in sizes:
+            csv_path = os.path.join(tmp, f"data_{n_rows}.csv")
+            scale_dataset(n_rows).to_csv(csv_path, index=False)
+            out = subprocess.run(
+                [sys.executable, "-c", _PREPROCESS_RUNNER, PREPROCESS_SCRIPT,
+                 "--input", csv_path, "--scaler-out", os.path.join(tmp, "scaler.pkl")],
+                capture_output=True, text=True, check=True,
+            ).stdout
+            _, elapsed, maxrss_kb = next(l for l in out.splitlines() if l.startswith("BENCH")).split()
+            results[f"rows_{n_rows}"] = {
+                "seconds": round(float(elapsed), 4),
+                "peak_rss_mb": round(int(maxrss_kb) / 1024.0, 1),
+                "rows_per_sec": round(n_rows / float(elapsed), 1),
+            }
+    return results
+
+BENCHMARKS = {
+    "service": bench_service,
+    "requests": bench_requests,
+    "micro": bench_micro,
+    "env": bench_env,
+    "preprocess": bench_preprocess,
+}
+
+# -----------------------------
+# Comparing runs
+# -----------------------------
+LOWER_IS_BETTER = ("_ms", "us_per_call", "seconds", "peak_rss_mb")
+HIGHER_IS_BETTER = ("_rps", "per_sec")
+
+def flatten(d, prefix=""):
+    out = {}
+    for k, v in d.items():
+        key = f"{prefix}.{k}" if prefix else k
+        if isinstance(v, dict):
+            out.update(flatten(v, key))
+        elif isinstance(v, (int, float)) and not isinstance(v, bool):
+            out[key] = float(v)
+    return out
+
+def compare(current, baseline, threshold):
+    """Return [(metric, baseline, current, relative change)] for regressions beyond `threshold`."""
+    cur, base = flatten(current["results"]), flatten(baseline["results"])
+    regressions = []
+    for key in sorted(cur.keys() & base.keys()):
+        b, c = base[key], cur[key]
+        if b == 0:
+            continue
+        change = (c - b) / abs(b)
+        if key.endswith(LOWER_IS_BETTER) and change > threshold:
+            regressions.append((key, b, c, change))
+        elif key.endswith(HIGHER_IS_BETTER) and -change > threshold:
+            regressions.append((key, b, c, change))
+    return regressions
+
+def environment_info():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT,
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pricing service / environment benchmarks")
+    parser.add_argument("--sections", default=",".join(SECTIONS),
+                        help=f"comma-separated subset of {', '.join(SECTIONS)}")
+    parser.add_argument("--quick", action="store_true", help="smaller sizes for a fast smoke run")
+    parser.add_argument("--with-cache", action="store_true", help="benchmark /predict with the response cache on")
+    parser.add_argument("--out", default=None, help="write results JSON here")
+    parser.add_argument("--compare", default=None, help="baseline JSON to diff against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative regression threshold")
+    args = parser.parse_args(argv)
+
+    if not args.with_cache:
+        os.environ["PREDICT_CACHE_SIZE"] = "0"  # read when app_fastapi is first imported
+
+    report = {"environment": environment_info(), "quick": args.quick, "results": {}}
+    for name in args.sections.split(","):
+        name = name.strip()
+        if name not in BENCHMARKS:
+            parser.error(f"unknown section {name!r}")
+        print(f"▶ {name} ...", flush=True)
+        kwargs = {"use_cache": args.with_cache} if name == "service" else {}
+        try:
+            report["results"][name] = BENCHMARKS[name](quick=args.quick, **kwargs)
+        except ImportError as e:
+            report["results"][name] = {"skipped": f"missing dependency: {e.name}"}
+        print(json.dumps(report["results"][name], indent=2))
+
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Wrote {args.out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        for key, b, c, change in regressions:
+            print(f"❌ {key}: {b:g} -> {c:g} ({change:+.1%})")
+        if regressions:
+            sys.exit(1)
+        print(f"✅ No regressions beyond {args.threshold:.0%} vs {args.compare}")
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,45 @@
+import time
+
+STARTUP_T0 = time.perf_counter()
+
 import os
+import hmac
+import json
+import functools
+import threading
+from contextlib import asynccontextmanager
+from typing import List, Optional
 import numpy as np
-import joblib
-from fastapi import FastAPI
-from pydantic import BaseModel
-from stable_baselines3 import PPO
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, PlainTextResponse
+from pydantic import BaseModel, Field, ValidationError
 from fastapi.middleware.cors import CORSMiddleware
-import uvicorn
+
+try:
+    import orjson
+except ImportError:  # optional: falls back to the stdlib json encoder
+    orjson = None
+
+try:
+    from src.batcher import BATCH_SIZE_BUCKETS, MicroBatcher
+    from src.elasticity_index import ELASTICITY_INDEX_PATH, ElasticityIndex
+    from src.metrics import MetricsMiddleware, Registry, process_memory
+    from src.model_registry import DEFAULT_VERSION, ModelRegistry
+    from src.prediction_cache import PredictionCache
+    from src.pricing import (ACTION_HIGH, ACTION_LOW, CURVE_FIELDS, ELASTICITY, FEATURES, RESPONSE_FIELDS,
+                             RULE_NAMES, RULES, estimate_sales_profit, price_products,
+                             price_response_curve, products_to_matrix)
+except ImportError:  # running from inside src/
+    from batcher import BATCH_SIZE_BUCKETS, MicroBatcher
+    from elasticity_index import ELASTICITY_INDEX_PATH, ElasticityIndex
+    from metrics import MetricsMiddleware, Registry, process_memory
+    from model_registry import DEFAULT_VERSION, ModelRegistry
+    from prediction_cache import PredictionCache
+    from pricing import (ACTION_HIGH, ACTION_LOW, CURVE_FIELDS, ELASTICITY, FEATURES, RESPONSE_FIELDS,
+                         RULE_NAMES, RULES, estimate_sales_profit, price_products,
+                         price_response_curve, products_to_matrix)
 
 # -----------------------------
 # Paths (absolute)
@@ -17,20 +51,196 @@ LOGS_DIR = os.path.join(PROJECT_ROOT, "logs", "logs_pricing")
 
 MODEL_PATH = os.path.join(MODELS_DIR, "pricing_model.zip")
 SCALER_PATH = os.path.join(MODELS_DIR, "scaler.pkl")
+POLICY_PATH = os.path.join(MODELS_DIR, "pricing_policy.npz")  # from export_policy.py
+MODEL_REGISTRY_DIR = os.path.join(MODELS_DIR, "registry")     # extra versions: <name>.npz
 DATA_PATH = os.path.join(DATA_DIR, "synthetic_ecommerce_data.csv")
 
+# Block startup until the model is loaded (old behaviour) instead of warming up in the background
+EAGER_MODEL_LOAD = os.environ.get("EAGER_MODEL_LOAD", "0") == "1"
+# How long a prediction waits for a warming-up model before answering 503
+MODEL_READY_TIMEOUT_S = float(os.environ.get("MODEL_READY_TIMEOUT_S", "10"))
+# Version served when a request does not pick one ("default" is POLICY_PATH)
+MODEL_DEFAULT_VERSION = os.environ.get("MODEL_DEFAULT_VERSION", DEFAULT_VERSION)
+# How often the models directory is checked for new/changed bundles (0 disables)
+MODEL_WATCH_INTERVAL_S = float(os.environ.get("MODEL_WATCH_INTERVAL_S", "5"))
+# Re-store the served policies' weights as float32, float16 or int8 (weight-only; saves
+# memory, not latency - check the price deviation with compare_precision.py first).
+# Unset keeps the precision each .npz was saved with.
+MODEL_PRECISION = os.environ.get("MODEL_PRECISION") or None
+# Shared secret for the /admin endpoints (X-Admin-Token); unset disables them
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+
+# Micro-batching of concurrent /predict calls (set PREDICT_BATCHING=0 to disable)
+PREDICT_BATCHING = os.environ.get("PREDICT_BATCHING", "1") == "1"
+PREDICT_MAX_BATCH_SIZE = int(os.environ.get("PREDICT_MAX_BATCH_SIZE", "64"))
+PREDICT_MAX_WAIT_MS = float(os.environ.get("PREDICT_MAX_WAIT_MS", "2"))
+
+# Response cache (PREDICT_CACHE_SIZE=0 disables it). Quantizing inputs (prices to
+# cents, indices to 1e-4) raises the hit rate but predicts on the rounded features.
+PREDICT_CACHE_SIZE = int(os.environ.get("PREDICT_CACHE_SIZE", "10000"))
+PREDICT_CACHE_TTL_S = float(os.environ.get("PREDICT_CACHE_TTL_S", "300"))
+PREDICT_CACHE_QUANTIZE = os.environ.get("PREDICT_CACHE_QUANTIZE", "0") == "1"
+
+# Lean /predict and /predict_batch: parse JSON straight into feature rows and
+# render with orjson (set PREDICT_FAST_PATH=0 for plain pydantic + JSONResponse)
+PREDICT_FAST_PATH = os.environ.get("PREDICT_FAST_PATH", "1") == "1"
+
+# Largest price grid accepted by /predict_curve
+CURVE_MAX_POINTS = int(os.environ.get("CURVE_MAX_POINTS", "10000"))
+
+# Prometheus-style metrics at GET /metrics (set METRICS_ENABLED=0 to disable)
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1") == "1"
+
+# -----------------------------
+# Metrics
+# -----------------------------
+metrics = Registry()
+http_requests_total = metrics.counter(
+    "gocart_http_requests_total", "HTTP requests by method, route and status",
+    ("method", "path", "status"))
+http_request_seconds = metrics.histogram(
+    "gocart_http_request_duration_seconds", "HTTP request latency by method and route",
+    ("method", "path"))
+http_in_flight = metrics.gauge("gocart_http_requests_in_flight", "HTTP requests being served")
+predict_stage_seconds = metrics.histogram(
+    "gocart_predict_stage_seconds",
+    "Time per pricing pass by stage (obs, inference, rules, estimate, serialize)", ("stage",))
+predict_batch_rows = metrics.histogram(
+    "gocart_predict_batch_rows", "Rows per pricing pass", buckets=BATCH_SIZE_BUCKETS)
+predictions_total = metrics.counter("gocart_predictions_total", "Rows priced by model version", ("model",))
+rule_applied_total = metrics.counter(
+    "gocart_rule_applied_total", "Priced rows by the business rule that set the final price", ("rule",))
+model_timing_seconds = metrics.gauge(
+    "gocart_model_timing_seconds", "Startup timings (import, model_load, ready_after)", ("phase",))
+model_ready = metrics.gauge("gocart_model_ready", "1 once the model is loaded")
+model_info = metrics.gauge("gocart_model_info", "Loaded model versions (1 = default)", ("version",))
+
+# -----------------------------
+# Model state (loaded lazily by a warm-up task)
+# -----------------------------
+class ModelState:
+    def __init__(self):
+        self.error = None
+        self.ready = threading.Event()
+        self.timings = {}
+
+    @property
+    def version(self):
+        """Version id (name@fingerprint) of the default bundle."""
+        bundle = registry.get()
+        return bundle.version if bundle is not None else None
+
+state = ModelState()
+
+def on_retire(bundle):
+    """A replaced bundle has drained: drop its batcher so its engine can be collected."""
+    for key in [k for k in list(batchers) if k[0] == bundle.version]:
+        batchers.pop(key, None)
+    print(f"✅ Released model {bundle.version} after drain")
+
+registry = ModelRegistry(MODEL_REGISTRY_DIR, POLICY_PATH, MODEL_DEFAULT_VERSION, on_retire=on_retire,
+                         precision=MODEL_PRECISION)
+
+def on_registry_change(report):
+    versions = registry.versions()
+    if cache is not None:
+        cache.retain_versions(v["version"] for v in versions.values())
+    model_info.clear()
+    for v in versions.values():
+        model_info.set(1 if v["default"] else 0, v["version"])
+    for name in report["loaded"]:
+        print(f"✅ Loaded model {versions[name]['version']} ({versions[name]['load_s']:.3f}s)")
+    for name in report["removed"]:
+        print(f"✅ Unloaded model {name}")
+    for name, error in report["errors"].items():
+        print(f"❌ Model {name}: {error}")
+
+def load_model():
+    """Load every registered bundle (each gets one warm-up forward pass)."""
+    try:
+        t0 = time.perf_counter()
+        report = registry.reload()
+        t1 = time.perf_counter()
+        on_registry_change(report)
+        bundle = registry.get()
+        if bundle is None:
+            raise RuntimeError(report["errors"].get(MODEL_DEFAULT_VERSION)
+                               or f"No model version '{MODEL_DEFAULT_VERSION}' found")
+
+        state.timings["model_load_s"] = round(t1 - t0, 4)
+        state.timings["ready_after_s"] = round(t1 - STARTUP_T0, 4)
+        state.ready.set()
+        model_ready.set(1)
+        for phase in ("model_load", "ready_after"):
+            model_timing_seconds.set(state.timings[phase + "_s"], phase)
+        print(f"✅ Model ready in {t1 - STARTUP_T0:.3f}s since import "
+              f"(load + warm-up {t1 - t0:.3f}s, {len(registry.versions())} version(s))")
+    except Exception as e:
+        state.error = f"{type(e).__name__}: {e}"
+        print(f"❌ Model load failed: {state.error}")
+
+def wait_ready():
+    if not state.ready.wait(MODEL_READY_TIMEOUT_S):
+        detail = state.error or "Model is still loading"
+        raise HTTPException(status_code=503, detail=detail, headers={"Retry-After": "1"})
+
+def get_engine():
+    wait_ready()
+    return registry.get().engine
+
 # -----------------------------
-# Load model + scaler
+# JSON encoding
 # -----------------------------
-model = PPO.load(MODEL_PATH)
-meta = joblib.load(SCALER_PATH)
-scaler = meta["scaler"]
-features = meta["features"]
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson when it is installed."""
+
+    def render(self, content):
+        if orjson is None:
+            return super().render(content)
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+
+json_loads = orjson.loads if orjson is not None else json.loads
+
+async def acquire_bundle(name):
+    """Pin the requested (or default) bundle for the duration of a request."""
+    if not state.ready.is_set():
+        await run_in_threadpool(wait_ready)
+    try:
+        return registry.acquire(name)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown model version '{name}'")
+
+async def requested_version(model_version: Optional[str] = Query(None),
+                            x_model_version: Optional[str] = Header(None)):
+    """Model version picked by ?model_version= or the X-Model-Version header."""
+    return model_version or x_model_version
+
+@asynccontextmanager
+async def lifespan(app):
+    stop = threading.Event()
+
+    # serve.py loads the models in its master process before forking workers
+    preloaded = state.ready.is_set()
+
+    def warm_up_and_watch():
+        if not EAGER_MODEL_LOAD and not preloaded:
+            load_model()
+        if MODEL_WATCH_INTERVAL_S > 0:
+            registry.watch(MODEL_WATCH_INTERVAL_S, stop, on_reload=on_registry_change)
+
+    if EAGER_MODEL_LOAD and not preloaded:
+        load_model()
+    threading.Thread(target=warm_up_and_watch, name="model-warmup", daemon=True).start()
+    yield
+    stop.set()
 
 # -----------------------------
 # FastAPI app
 # -----------------------------
-app = FastAPI()
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware, requests_total=http_requests_total,
+                       request_seconds=http_request_seconds, in_flight=http_in_flight)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -51,77 +261,419 @@ class Product(BaseModel):
     sales: float
     day_of_week: int = 2
     season: int = 0
+    # Optional: selects per-category overrides in config/pricing_rules.json
+    category: Optional[str] = None
+    # Optional: picks the product's elasticity from the elasticity index
+    product_name: Optional[str] = None
+
+class ProductBatch(BaseModel):
+    products: List[Product]
 
 # -----------------------------
-# Preprocessing
+# Lean request parsing
 # -----------------------------
-def make_obs_from_product(p: Product):
-    arr = np.array([[p.actual_price, p.selling_price, p.ebay_price, p.stock,
-                     p.demand_index, p.user_interest, p.sales, p.day_of_week, p.season]])
-    obs = scaler.transform(arr)[0].astype(np.float32)
-    return obs
+# (name, default or None if required, is_int) per feature, in FEATURES order
+PRODUCT_FEATURE_FIELDS = [
+    (name, None if Product.model_fields[name].is_required() else Product.model_fields[name].default,
+     Product.model_fields[name].annotation is int)
+    for name in FEATURES
+]
+
+def body_schema(model):
+    """openapi_extra documenting a JSON body the endpoint parses itself."""
+    schema = model.model_json_schema(ref_template="#/components/schemas/{model}")
+    schema.pop("$defs", None)
+    return {"requestBody": {"required": True, "content": {"application/json": {"schema": schema}}}}
+
+def load_json_body(body):
+    try:
+        return json_loads(body)
+    except ValueError as e:
+        raise RequestValidationError([{"type": "json_invalid", "loc": ("body", 0),
+                                       "msg": "JSON decode error", "input": {}, "ctx": {"error": str(e)}}])
+
+def product_row(obj):
+    """
+    Fast path: a product object whose features are plain JSON numbers becomes
+    (feature row in FEATURES order, category, product_name). Returns None for
+    anything the Product model would have to coerce or reject.
+    """
+    if type(obj) is not dict:
+        return None
+    row = []
+    for name, default, is_int in PRODUCT_FEATURE_FIELDS:
+        v = obj.get(name, default)
+        t = type(v)
+        if t is float:
+            if is_int and not v.is_integer():
+                return None
+        elif t is not int:  # missing, bool, str, ...
+            return None
+        row.append(float(v))
+    category = obj.get("category")
+    if category is not None and type(category) is not str:
+        return None
+    product_name = obj.get("product_name")
+    if product_name is not None and type(product_name) is not str:
+        return None
+    return row, category, product_name
+
+def validation_error(e, prefix):
+    return RequestValidationError([{**err, "loc": (*prefix, *err["loc"])} for err in e.errors(include_url=False)])
+
+def parse_product(obj):
+    parsed = product_row(obj)
+    if parsed is not None:
+        return parsed
+    try:
+        product = Product.model_validate(obj)
+    except ValidationError as e:
+        raise validation_error(e, ("body",))
+    return [float(getattr(product, name)) for name in FEATURES], product.category, product.product_name
+
+def parse_product_batch(obj):
+    """Returns (X, category names, product names) for a {"products": [...]} body."""
+    products = obj.get("products") if type(obj) is dict else None
+    if type(products) is list:
+        parsed = [product_row(p) for p in products]
+        if all(p is not None for p in parsed):
+            X = np.array([row for row, _, _ in parsed], dtype=np.float64).reshape(-1, len(FEATURES))
+            return X, [c for _, c, _ in parsed], [n for _, _, n in parsed]
+    try:
+        batch = ProductBatch.model_validate(obj)
+    except ValidationError as e:
+        raise validation_error(e, ("body",))
+    return (products_to_matrix(batch.products), [p.category for p in batch.products],
+            [p.product_name for p in batch.products])
+
+class CurveRequest(BaseModel):
+    product: Product
+    # Either explicit candidate prices, or an evenly spaced adjustment grid
+    # inside the env's action space
+    prices: Optional[List[float]] = None
+    min_adjustment: float = Field(ACTION_LOW, ge=ACTION_LOW, le=ACTION_HIGH)
+    max_adjustment: float = Field(ACTION_HIGH, ge=ACTION_LOW, le=ACTION_HIGH)
+    points: int = Field(61, ge=2, le=CURVE_MAX_POINTS)
 
 # -----------------------------
-# Business rules
+# Batched inference
 # -----------------------------
-def apply_pricing_rules(predicted_price, p: Product):
-    adjusted_price = predicted_price
-    rule_applied = "none"
+def predict_rows(X, bundle=None, categories=None):
+    """
+    Run scaling, policy, pricing rules and sales/profit estimation on an
+    (N, 9) raw feature matrix in one pass. Returns one response dict per row.
+    `bundle` is a pinned registry bundle; the default model is used if None.
+    `categories` is a rule category code, or one code per row.
+    """
+    engine = get_engine() if bundle is None else bundle.engine
+    if categories is not None and np.ndim(categories) == 0:
+        categories = np.full(len(X), categories, dtype=np.int16)
+    if not METRICS_ENABLED:
+        return format_rows(price_products(engine, X, categories=categories))
 
-    if adjusted_price > p.ebay_price * 1.05:
-        adjusted_price = p.ebay_price * 1.05
-        rule_applied = "cap_above_competitor"
+    timings = {}
+    out = price_products(engine, X, timings, categories)
+    t0 = time.perf_counter()
+    rows = format_rows(out)
+    timings["serialize"] = time.perf_counter() - t0
 
-    if p.stock > 50 and p.demand_index < 0.5:
-        adjusted_price = min(adjusted_price, p.ebay_price * 0.95)
-        rule_applied = "stock_clearance_discount"
+    for stage, seconds in timings.items():
+        predict_stage_seconds.observe(seconds, stage)
+    predict_batch_rows.observe(len(rows))
+    predictions_total.inc(bundle.name if bundle is not None else MODEL_DEFAULT_VERSION, amount=len(rows))
+    for r, n in enumerate(np.bincount(out["rule_applied"], minlength=len(RULE_NAMES)).tolist()):
+        if n:
+            rule_applied_total.inc(RULE_NAMES[r], amount=n)
+    return rows
 
-    if p.demand_index > 0.8 and p.user_interest > 0.7:
-        adjusted_price *= 1.1
-        rule_applied = "high_demand_premium"
+# -----------------------------
+# Per-product elasticity
+# -----------------------------
+# Policy and rules do not depend on the elasticity, only the sales / profit
+# estimates do. Batches, batchers and the cache all work at the global
+# ELASTICITY; rows of products with their own value get their estimates
+# redone afterwards (copies, so cached responses stay untouched).
+elasticity_index = ElasticityIndex.load_or_default(ELASTICITY_INDEX_PATH)
+if not elasticity_index.empty:
+    print(f"✅ Loaded {len(elasticity_index)} elasticities from {ELASTICITY_INDEX_PATH}")
 
-    if adjusted_price < p.actual_price:
-        adjusted_price = p.actual_price
-        rule_applied = "min_price_safeguard"
+def product_elasticities(product_names, categories):
+    """(N,) elasticities, or None when every row uses the global ELASTICITY."""
+    if elasticity_index.empty and elasticity_index.default == ELASTICITY:
+        return None
+    e = elasticity_index.lookup_many(product_names, categories)
+    return e if np.any(e != ELASTICITY) else None
 
-    return float(round(adjusted_price, 2)), rule_applied
+def with_elasticity(results, X, elasticities):
+    """Redo the estimates of rows whose elasticity is not the global one."""
+    if elasticities is None:
+        return results
+    rows = np.flatnonzero(elasticities != ELASTICITY)
+    prices = np.array([results[i]["predicted_price"] for i in rows.tolist()], dtype=np.float64)
+    sales, profit = estimate_sales_profit(prices, X[rows], elasticities[rows])
+    results = list(results)
+    for i, s, p in zip(rows.tolist(), sales.tolist(), profit.tolist()):
+        results[i] = {**results[i], "expected_sales_estimate": round(s, 2), "estimated_profit": round(p, 2)}
+    return results
+
+def format_rows(out):
+    """price_products arrays -> one /predict response dict per row."""
+    return [
+        {
+            "action_adjustment": round(adj, 4),
+            "predicted_price_pre_rule": round(pre, 2),
+            "predicted_price": price,
+            "rule_applied": str(RULE_NAMES[r]),
+            "rules_fired": RULES.fired_names(fired),
+            "expected_sales_estimate": round(sales, 2),
+            "estimated_profit": round(profit, 2),
+        }
+        for adj, pre, price, r, fired, sales, profit in zip(
+            *(out[k].tolist() for k in RESPONSE_FIELDS)
+        )
+    ]
 
 # -----------------------------
 # Endpoint
 # -----------------------------
 @app.get("/")
 def health_check():
-    return {"status": "ok"}
-
-@app.post("/predict")
-def predict_price(product: Product):
-    # Model inference
-    obs = make_obs_from_product(product)
-    action, _ = model.predict(obs, deterministic=True)
-    adjustment = float(action[0])
-
-    predicted_pre_rule = float(product.selling_price * (1.0 + adjustment))
-    predicted_price, rule_applied = apply_pricing_rules(predicted_pre_rule, product)
-
-    # Sales & profit estimation
-    demand_factor = max(0.0, (0.6 * product.demand_index + 0.4 * product.user_interest))
-    price_ratio = predicted_price / max(1e-6, product.selling_price)
-    expected_sales = product.sales * demand_factor * np.exp(-3.0 * (price_ratio - 1.0))
-    expected_sales = max(0.0, expected_sales)
-    est_profit = (predicted_price - product.actual_price) * expected_sales
-
-    return {
-        "action_adjustment": round(adjustment, 4),
-        "predicted_price_pre_rule": round(predicted_pre_rule, 2),
-        "predicted_price": predicted_price,
-        "rule_applied": rule_applied,
-        "expected_sales_estimate": round(float(expected_sales), 2),
-        "estimated_profit": round(float(est_profit), 2),
-    }
+    return {"status": "ok", "ready": state.ready.is_set()}
+
+@app.get("/batcher/stats")
+def batcher_stats():
+    if not PREDICT_BATCHING:
+        return {"enabled": False}
+    by_version = {}
+    for (version, category), b in list(batchers.items()):
+        by_version.setdefault(version, {})[RULES.categories[category]] = b.stats()
+    return {"enabled": True, "versions": by_version}
+
+@app.get("/cache/stats")
+def cache_stats():
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
+
+@app.get("/ready")
+def readiness_check():
+    body = {"ready": state.ready.is_set(), "model_version": state.version,
+            "model_versions": sorted(registry.versions()),
+            "error": state.error, "timings": state.timings}
+    return JSONResponse(body, status_code=200 if state.ready.is_set() else 503)
+
+@app.get("/metrics")
+def metrics_endpoint():
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+# -----------------------------
+# Model registry / admin
+# -----------------------------
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Set ADMIN_TOKEN to enable admin endpoints")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+@app.get("/models")
+def list_models():
+    return {"default": registry.default_version, "versions": registry.versions(),
+            "last_reload": registry.last_reload}
+
+@app.post("/admin/reload", dependencies=[Depends(require_admin)])
+def reload_models(default_version: Optional[str] = None):
+    """
+    Load new/changed bundles (in this worker thread; the current ones keep
+    serving), swap them in, and optionally switch the default version.
+    """
+    report = registry.reload()
+    on_registry_change(report)
+    if default_version:
+        try:
+            registry.set_default(default_version)
+        except KeyError:
+            raise HTTPException(status_code=404, detail=f"Unknown model version '{default_version}'")
+        on_registry_change({"loaded": [], "removed": [], "errors": {}})
+    return {"report": report, "default": registry.default_version, "versions": registry.versions()}
+
+# One micro-batcher per (model version, rule category): rows in a batch share both
+batchers = {}
+
+def get_batcher(bundle, category=0):
+    key = (bundle.version, category)
+    batcher = batchers.get(key)
+    if batcher is None:
+        batcher = batchers.setdefault(key, MicroBatcher(
+            functools.partial(predict_rows, bundle=bundle, categories=category),
+            PREDICT_MAX_BATCH_SIZE, PREDICT_MAX_WAIT_MS))
+    return batcher
+cache = (PredictionCache(PREDICT_CACHE_SIZE, PREDICT_CACHE_TTL_S, PREDICT_CACHE_QUANTIZE)
+         if PREDICT_CACHE_SIZE > 0 else None)
+
+cache_entries = metrics.gauge("gocart_cache_entries", "Entries in the response cache")
+cache_hit_ratio = metrics.gauge("gocart_cache_hit_ratio", "Response cache hit ratio since start")
+batcher_pending = metrics.gauge("gocart_batcher_pending", "Rows waiting for the next micro-batch")
+process_memory_bytes = metrics.gauge(
+    "gocart_process_memory_bytes", "Memory of the serving process (rss, pss, uss, shared)", ("kind",))
+
+def collect_runtime_stats():
+    if cache is not None:
+        stats = cache.stats()
+        cache_entries.set(stats["entries"])
+        cache_hit_ratio.set(stats["hit_rate"])
+    batcher_pending.set(sum(len(b._pending) for b in list(batchers.values())))
+    memory = process_memory()
+    if memory is not None:
+        for kind, value in memory.items():
+            process_memory_bytes.set(value, kind)
+
+metrics.add_collector(collect_runtime_stats)
+
+async def predict_single(X, category, bundle, inline=False, elasticity=None):
+    """
+    Cache lookup, then the micro-batcher (or a direct call) for one feature row.
+    `elasticity` is a (1,) array from product_elasticities, or None.
+    """
+    if cache is not None:
+        X = cache.quantize(X)
+        hit = cache.get(X[0], bundle.version, category)
+        if hit is not None:
+            return with_elasticity([hit], X, elasticity)[0]
+
+    if PREDICT_BATCHING:
+        result = await get_batcher(bundle, category).submit(X[0])
+    elif inline:
+        result = predict_rows(X, bundle, category)[0]
+    else:
+        result = (await run_in_threadpool(predict_rows, X, bundle, category))[0]
+
+    if cache is not None:
+        cache.put(X[0], bundle.version, result, category)
+    return with_elasticity([result], X, elasticity)[0]
+
+def score_batch(X, categories, bundle, elasticities=None):
+    if not len(X):
+        return []
+    if cache is None:
+        return with_elasticity(predict_rows(X, bundle, categories), X, elasticities)
+
+    # Only score the rows that are not cached
+    X = cache.quantize(X)
+    predictions = [cache.get(row, bundle.version, c) for row, c in zip(X, categories.tolist())]
+    missing = [i for i, p in enumerate(predictions) if p is None]
+    if missing:
+        for i, result in zip(missing, predict_rows(X[missing], bundle, categories[missing])):
+            predictions[i] = result
+            cache.put(X[i], bundle.version, result, int(categories[i]))
+    return with_elasticity(predictions, X, elasticities)
+
+if PREDICT_FAST_PATH:
+    @app.post("/predict", openapi_extra=body_schema(Product))
+    async def predict_price(request: Request):
+        row, category, product_name = parse_product(load_json_body(await request.body()))
+        bundle = await acquire_bundle(request.query_params.get("model_version")
+                                      or request.headers.get("x-model-version"))
+        try:
+            # One row is ~50 us of NumPy, less than a hop to the threadpool
+            result = await predict_single(np.array([row]), RULES.category_code(category), bundle, inline=True,
+                                          elasticity=product_elasticities([product_name], [category]))
+            return FastJSONResponse(result, headers={"X-Model-Version": bundle.version})
+        finally:
+            registry.release(bundle)
+
+    @app.post("/predict_batch", openapi_extra=body_schema(ProductBatch))
+    async def predict_price_batch(request: Request):
+        X, categories, product_names = parse_product_batch(load_json_body(await request.body()))
+        bundle = await acquire_bundle(request.query_params.get("model_version")
+                                      or request.headers.get("x-model-version"))
+        try:
+            predictions = await run_in_threadpool(score_batch, X, RULES.category_codes(categories), bundle,
+                                                  product_elasticities(product_names, categories))
+            return FastJSONResponse({"predictions": predictions}, headers={"X-Model-Version": bundle.version})
+        finally:
+            registry.release(bundle)
+else:
+    @app.post("/predict")
+    async def predict_price(product: Product, response: Response,
+                            version_name: Optional[str] = Depends(requested_version)):
+        bundle = await acquire_bundle(version_name)
+        try:
+            response.headers["X-Model-Version"] = bundle.version
+            return await predict_single(products_to_matrix([product]),
+                                        RULES.category_code(product.category), bundle,
+                                        elasticity=product_elasticities([product.product_name], [product.category]))
+        finally:
+            registry.release(bundle)
+
+    @app.post("/predict_batch")
+    async def predict_price_batch(batch: ProductBatch, response: Response,
+                                  version_name: Optional[str] = Depends(requested_version)):
+        bundle = await acquire_bundle(version_name)
+        try:
+            response.headers["X-Model-Version"] = bundle.version
+            X = products_to_matrix(batch.products)
+            categories = RULES.category_codes(p.category for p in batch.products)
+            elasticities = product_elasticities([p.product_name for p in batch.products],
+                                                [p.category for p in batch.products])
+            return {"predictions": await run_in_threadpool(score_batch, X, categories, bundle, elasticities)}
+        finally:
+            registry.release(bundle)
+
+# Response rounding for /predict_curve (same precision as /predict)
+CURVE_ROUNDING = {
+    "adjustment": 4, "candidate_price": 2, "env_price": 2, "predicted_sales": 2,
+    "profit": 2, "competitor_penalty": 2, "holding_penalty": 2, "reward": 6,
+    "final_price": 2, "expected_sales_estimate": 2, "estimated_profit": 2,
+}
+
+@app.post("/predict_curve")
+def predict_curve(req: CurveRequest):
+    """
+    Estimated sales, profit and env reward across a grid of candidate prices
+    for one product, plus the best point by env reward and by estimated profit
+    after the pricing rules. Does not need the policy, so it also answers
+    while the model is warming up.
+    """
+    category = RULES.category_code(req.product.category)
+    elasticity = elasticity_index.lookup(req.product.product_name, req.product.category)
+    if req.prices is not None:
+        if not 1 <= len(req.prices) <= CURVE_MAX_POINTS:
+            raise HTTPException(status_code=422, detail=f"prices must have 1..{CURVE_MAX_POINTS} values")
+        curve = price_response_curve(products_to_matrix([req.product])[0], prices=req.prices,
+                                     elasticity=elasticity, category=category)
+    else:
+        if req.min_adjustment > req.max_adjustment:
+            raise HTTPException(status_code=422, detail="min_adjustment must be <= max_adjustment")
+        grid = np.linspace(req.min_adjustment, req.max_adjustment, req.points)
+        curve = price_response_curve(products_to_matrix([req.product])[0], adjustments=grid,
+                                     elasticity=elasticity, category=category)
+
+    columns = {}
+    for name in CURVE_FIELDS:
+        if name == "rule_applied":
+            columns[name] = RULE_NAMES[curve[name]].tolist()
+        elif name == "rules_fired":
+            columns[name] = [RULES.fired_names(f) for f in curve[name].tolist()]
+        else:
+            columns[name] = np.round(curve[name], CURVE_ROUNDING[name]).tolist()
+
+    best = {}
+    for objective in ("reward", "estimated_profit"):
+        i = int(np.argmax(curve[objective]))
+        best[objective] = {"index": i, **{name: columns[name][i] for name in CURVE_FIELDS}}
+    # Values are already plain floats/strs, so skip jsonable_encoder (it dominates for large grids)
+    return FastJSONResponse({"points": len(columns["adjustment"]), "curve": columns, "best": best})
+
+state.timings["import_s"] = round(time.perf_counter() - STARTUP_T0, 4)
+model_timing_seconds.set(state.timings["import_s"], "import")
 
 # -----------------------------
 # Entry point
 # -----------------------------
 if __name__ == "__main__":
+    import uvicorn
+
     port = int(os.environ.get("PORT", 8000))  # Render sets PORT
     uvicorn.run(app, host="0.0.0.0", port=port)
@@ -0,0 +1,125 @@
+import asyncio
+import time
+from collections import deque
+
+import numpy as np
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-row predictions into one batched call.
+
+    A row arriving while no batch is running is flushed on the next loop
+    iteration, together with any rows submitted in the same tick, so a lone
+    request does not wait. While a batch is running, new rows are queued and
+    flushed when they reach `max_batch_size` rows, when the running batch
+    finishes, or `max_wait_ms` after the first queued row, whichever comes
+    first. `predict_fn` receives an
+    (N, n_features) matrix, runs in the default executor and must return one
+    result per row.
+    """
+
+    def __init__(self, predict_fn, max_batch_size=64, max_wait_ms=2.0, window=2048):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be >= 1")
+        self.predict_fn = predict_fn
+        self.max_batch_size = int(max_batch_size)
+        self.max_wait_s = max(0.0, float(max_wait_ms)) / 1000.0
+
+        self._pending = []
+        self._timer = None
+        self._running = set()  # batch tasks in flight (the loop only keeps weak references)
+
+        # Metrics
+        self.requests = 0
+        self.batches = 0
+        self.errors = 0
+        self.max_batch_seen = 0
+        self.batch_size_counts = [0] * (len(BATCH_SIZE_BUCKETS) + 1)
+        self.queue_wait_total_s = 0.0
+        self._recent_waits = deque(maxlen=window)
+
+    async def submit(self, row):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((row, future, time.perf_counter()))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            if self.max_wait_s > 0 and self._running:
+                self._timer = loop.call_later(self.max_wait_s, self._flush)
+            else:
+                self._timer = loop.call_soon(self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        task = asyncio.get_running_loop().create_task(self._run(batch))
+        self._running.add(task)
+        task.add_done_callback(self._batch_done)
+
+    def _batch_done(self, task):
+        self._running.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"❌ Micro-batch failed: {type(task.exception()).__name__}: {task.exception()}")
+        # Rows queued behind the finished batch need not wait out the timer
+        if self._pending and not self._running:
+            self._flush()
+
+    async def _run(self, batch):
+        flushed_at = time.perf_counter()
+        self._record(len(batch), [flushed_at - enqueued for _, _, enqueued in batch])
+
+        try:
+            X = np.stack([row for row, _, _ in batch])
+            results = await asyncio.get_running_loop().run_in_executor(None, self.predict_fn, X)
+        except Exception as e:
+            self.errors += 1
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future, _), result in zip(batch, results):
+            if not future.done():  # the request may have been cancelled
+                future.set_result(result)
+
+    def _record(self, size, waits):
+        self.requests += size
+        self.batches += 1
+        self.max_batch_seen = max(self.max_batch_seen, size)
+        bucket = next((i for i, b in enumerate(BATCH_SIZE_BUCKETS) if size <= b), len(BATCH_SIZE_BUCKETS))
+        self.batch_size_counts[bucket] += 1
+        self.queue_wait_total_s += sum(waits)
+        self._recent_waits.extend(waits)
+
+    def stats(self):
+        recent = np.array(self._recent_waits) * 1000.0
+        histogram = {f"le_{b}": c for b, c in zip(BATCH_SIZE_BUCKETS, self.batch_size_counts)}
+        histogram["gt_%d" % BATCH_SIZE_BUCKETS[-1]] = self.batch_size_counts[-1]
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_s * 1000.0,
+            "requests": self.requests,
+            "batches": self.batches,
+            "errors": self.errors,
+            "pending": len(self._pending),
+            "in_flight": len(self._running),
+            "avg_batch_size": round(self.requests / self.batches, 3) if self.batches else 0.0,
+            "max_batch_size_seen": self.max_batch_seen,
+            "batch_size_histogram": histogram,
+            "queue_wait_ms": {
+                "avg": round(self.queue_wait_total_s * 1000.0 / self.requests, 4) if self.requests else 0.0,
+                "p50": round(float(np.percentile(recent, 50)), 4) if recent.size else 0.0,
+                "p99": round(float(np.percentile(recent, 99)), 4) if recent.size else 0.0,
+                "max": round(float(recent.max()), 4) if recent.size else 0.0,
+            },
+        }
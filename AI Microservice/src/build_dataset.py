@@ -0,0 +1,60 @@
+import os
+import time
+import argparse
+import joblib
+import numpy as np
+
+try:
+    from src.feature_store import DatasetWriter, dataset_paths
+    from src.preprocess_save_scaler import DEFAULT_CHUNKSIZE, features, iter_clean_chunks
+except ImportError:  # running from inside src/
+    from feature_store import DatasetWriter, dataset_paths
+    from preprocess_save_scaler import DEFAULT_CHUNKSIZE, features, iter_clean_chunks
+
+# -----------------------------
+# Project paths (absolute)
+# -----------------------------
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DATA_DIR = os.path.join(PROJECT_ROOT, "data")
+MODELS_DIR = os.path.join(PROJECT_ROOT, "models")
+
+DATA_PATH = os.path.join(DATA_DIR, "synthetic_ecommerce_data.csv")
+SCALER_PATH = os.path.join(MODELS_DIR, "scaler.pkl")
+DATASET_STEM = os.path.join(DATA_DIR, "synthetic_ecommerce_data")
+
+
+def build_dataset(input_path, out_stem, scaler_path=SCALER_PATH, chunksize=DEFAULT_CHUNKSIZE,
+                  dtype=np.float32):
+    """Convert a CSV (or directory of CSV shards) into a memory-mappable PricingDataset."""
+    meta = joblib.load(scaler_path)
+    if list(meta["features"]) != list(features):
+        raise ValueError(f"Scaler features {meta['features']} do not match {features}")
+    scaler = meta["scaler"]
+
+    with DatasetWriter(out_stem, features, scaler.min_, scaler.scale_, dtype=dtype,
+                       source=os.path.abspath(input_path)) as writer:
+        for X in iter_clean_chunks(input_path, chunksize):
+            writer.append(X)
+    return writer.n_rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build a memory-mapped pricing dataset from CSV")
+    parser.add_argument("--input", default=DATA_PATH, help="CSV file or directory of CSV shards")
+    parser.add_argument("--out", default=DATASET_STEM, help="output stem (writes .npy, .obs.npy, .json)")
+    parser.add_argument("--scaler", default=SCALER_PATH, help="scaler used to precompute observations")
+    parser.add_argument("--dtype", choices=["float32", "float64"], default="float32",
+                        help="raw feature dtype (float64 keeps CSV values exact)")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    n_rows = build_dataset(args.input, args.out, args.scaler, args.chunksize, np.dtype(args.dtype))
+    raw_path, obs_path, header_path = dataset_paths(args.out)
+    size_mb = (os.path.getsize(raw_path) + os.path.getsize(obs_path)) / 1e6
+    print(f"✅ Wrote {n_rows} rows to {raw_path} / {obs_path} / {header_path} "
+          f"({size_mb:.1f} MB in {time.perf_counter() - t0:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
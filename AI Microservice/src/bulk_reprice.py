@@ -0,0 +1,168 @@
+import os
+import time
+import argparse
+import multiprocessing as mp
+import numpy as np
+import pandas as pd
+
+try:
+    from src.elasticity_index import ELASTICITY_INDEX_PATH, ElasticityIndex
+    from src.feature_store import is_dataset, load_dataset
+    from src.policy_engine import PolicyEngine
+    from src.pricing import FEATURES, RESPONSE_FIELDS, RULE_NAMES, RULES, price_products, round_prices
+except ImportError:  # running from inside src/
+    from elasticity_index import ELASTICITY_INDEX_PATH, ElasticityIndex
+    from feature_store import is_dataset, load_dataset
+    from policy_engine import PolicyEngine
+    from pricing import FEATURES, RESPONSE_FIELDS, RULE_NAMES, RULES, price_products, round_prices
+
+# -----------------------------
+# Project paths (absolute)
+# -----------------------------
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DATA_DIR = os.path.join(PROJECT_ROOT, "data")
+MODELS_DIR = os.path.join(PROJECT_ROOT, "models")
+
+DATA_PATH = os.path.join(DATA_DIR, "synthetic_ecommerce_data.csv")
+POLICY_PATH = os.path.join(MODELS_DIR, "pricing_policy.npz")
+
+DEFAULT_CHUNKSIZE = 100_000
+
+# Same digits as the /predict response (and the same Python round(), via
+# round_prices: np.round differs on half-way values such as 1752.675)
+ROUNDING = {
+    "action_adjustment": 4,
+    "predicted_price_pre_rule": 2,
+    "expected_sales_estimate": 2,
+    "estimated_profit": 2,
+}
+
+
+# -----------------------------
+# Input
+# -----------------------------
+def iter_csv_chunks(path, chunksize):
+    """Yield (passthrough DataFrame, (rows, 9) feature matrix) per chunk."""
+    for df in pd.read_csv(path, chunksize=chunksize):
+        X = np.zeros((len(df), len(FEATURES)), dtype=np.float64)
+        for j, name in enumerate(FEATURES):
+            if name in df.columns:
+                X[:, j] = df[name].fillna(0).astype(float).values
+        yield df, X
+
+def iter_dataset_chunks(path, chunksize):
+    ds = load_dataset(path)
+    for start, raw, _ in ds.iter_chunks(chunksize):
+        X = np.asarray(raw, dtype=np.float64)
+        df = pd.DataFrame(X, columns=ds.features)
+        df.insert(0, "row", np.arange(start, start + len(X)))
+        yield df, X
+
+# -----------------------------
+# Workers
+# -----------------------------
+_engine = None
+_elasticities = None
+
+def _init_worker(policy_path, index_path=ELASTICITY_INDEX_PATH):
+    global _engine, _elasticities
+    _engine = PolicyEngine.load(policy_path)
+    _elasticities = ElasticityIndex.load_or_default(index_path)
+
+def reprice_block(X, categories=None, elasticity=None):
+    """
+    Price one feature block; returns the result columns, rounded like /predict.
+    `elasticity` (scalar or per row) defaults to the elasticity index default.
+    """
+    if elasticity is None:
+        elasticity = _elasticities.default
+    out = price_products(_engine, X, categories=categories, elasticity=elasticity)
+    cols = {}
+    for name in RESPONSE_FIELDS:
+        if name == "rule_applied":
+            cols[name] = RULE_NAMES[out[name]]
+        elif name == "rules_fired":
+            cols[name] = ["|".join(RULES.fired_names(f)) for f in out[name].tolist()]
+        elif name in ROUNDING:
+            cols[name] = round_prices(out[name], ROUNDING[name])
+        else:
+            cols[name] = out[name]
+    return cols
+
+def reprice_chunk(df, X, keep_columns, header):
+    """
+    Price a chunk and render it as CSV text. Formatting runs in the worker too,
+    since float -> text conversion costs more than the pricing itself.
+    """
+    categories = None
+    if "category" in df.columns:  # optional, selects per-category rule overrides
+        categories = RULES.category_codes(df["category"].fillna("").astype(str))
+    # Same per-product elasticity as /predict (by product_name, then category)
+    elasticity = _elasticities.lookup_rows(df)
+    result = pd.DataFrame(reprice_block(X, categories, elasticity), index=df.index)
+    if keep_columns:
+        result = pd.concat([df, result], axis=1)
+    return len(result), result.to_csv(header=header, index=False)
+
+def _map_chunks(chunks, workers, policy_path, keep_columns, index_path=ELASTICITY_INDEX_PATH):
+    """Ordered map of reprice_chunk over (df, X) pairs, in-process or across a pool."""
+    if workers <= 1:
+        _init_worker(policy_path, index_path)
+        for i, (df, X) in enumerate(chunks):
+            yield reprice_chunk(df, X, keep_columns, i == 0)
+        return
+
+    with mp.Pool(workers, initializer=_init_worker, initargs=(policy_path, index_path)) as pool:
+        pending = []
+        for i, (df, X) in enumerate(chunks):
+            pending.append(pool.apply_async(reprice_chunk, (df, X, keep_columns, i == 0)))
+            # Keep a bounded number of chunks in flight
+            if len(pending) >= 2 * workers:
+                yield pending.pop(0).get()
+        for res in pending:
+            yield res.get()
+
+# -----------------------------
+# Bulk repricing
+# -----------------------------
+def bulk_reprice(input_path, output_path, policy_path=POLICY_PATH, chunksize=DEFAULT_CHUNKSIZE,
+                 workers=1, keep_columns=True, index_path=ELASTICITY_INDEX_PATH):
+    """
+    Stream `input_path` through the pricing pipeline into `output_path` (CSV).
+    Sales/profit estimates use the elasticity index at `index_path` when it
+    exists, like the service. Returns row count.
+    """
+    if is_dataset(input_path):
+        chunks = iter_dataset_chunks(input_path, chunksize)
+    else:
+        chunks = iter_csv_chunks(input_path, chunksize)
+
+    n_rows = 0
+    with open(output_path, "w", newline="") as f:
+        for n, text in _map_chunks(chunks, workers, policy_path, keep_columns, index_path):
+            f.write(text)
+            n_rows += n
+    return n_rows
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reprice a whole catalog offline")
+    parser.add_argument("--input", default=DATA_PATH, help="CSV or memory-mapped dataset (build_dataset.py)")
+    parser.add_argument("--output", required=True, help="output CSV path")
+    parser.add_argument("--policy", default=POLICY_PATH, help="exported policy (export_policy.py)")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument("--workers", type=int, default=1, help="processes used to price chunks")
+    parser.add_argument("--results-only", action="store_true", help="do not copy input columns to the output")
+    parser.add_argument("--elasticity-index", default=ELASTICITY_INDEX_PATH,
+                        help="per-product elasticities for the estimates (estimate_elasticity.py; default "
+                             "ELASTICITY_INDEX_PATH, global elasticity if missing)")
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    n_rows = bulk_reprice(args.input, args.output, args.policy, args.chunksize,
+                          args.workers, keep_columns=not args.results_only, index_path=args.elasticity_index)
+    elapsed = time.perf_counter() - t0
+    print(f"✅ Repriced {n_rows} rows -> {args.output} in {elapsed:.2f}s "
+          f"({n_rows / max(1e-9, elapsed):,.0f} rows/sec, {args.workers} worker(s))")
+
+if __name__ == "__main__":
+    main()
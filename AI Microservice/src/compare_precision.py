@@ -0,0 +1,209 @@
+import os
+import json
+import time
+import argparse
+import numpy as np
+
+try:
+    from src.bulk_reprice import iter_csv_chunks, iter_dataset_chunks
+    from src.evaluate_policy import resolve_policies
+    from src.feature_store import is_dataset
+    from src.policy_engine import PRECISIONS, PolicyEngine
+    from src.pricing import price_products
+except ImportError:  # running from inside src/
+    from bulk_reprice import iter_csv_chunks, iter_dataset_chunks
+    from evaluate_policy import resolve_policies
+    from feature_store import is_dataset
+    from policy_engine import PRECISIONS, PolicyEngine
+    from pricing import price_products
+
+# -----------------------------
+# Project paths (absolute)
+# -----------------------------
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DATA_DIR = os.path.join(PROJECT_ROOT, "data")
+MODELS_DIR = os.path.join(PROJECT_ROOT, "models")
+
+DATA_PATH = os.path.join(DATA_DIR, "synthetic_ecommerce_data.csv")
+POLICY_PATH = os.path.join(MODELS_DIR, "pricing_policy.npz")
+
+DEFAULT_CHUNKSIZE = 100_000
+DEFAULT_BATCH_SIZES = (1, 64, 1024)
+
+# -----------------------------
+# What is compared
+# -----------------------------
+# Every row is priced by the float32 policy and by the same policy with its
+# weights stored at each reduced precision, through the full /predict pipeline
+# (scaling, policy, business rules, rounding). Reported per precision: the
+# policy output deviation before clipping (a policy saturated at the action
+# bounds hides it after), the clipped action and final price deviations, how
+# many served prices / applied rules change, weight memory, and
+# engine.predict latency per batch size. Run this before setting
+# MODEL_PRECISION for the service.
+
+
+class Deviation:
+    """Running deviation of one precision's outputs from the float32 reference."""
+
+    def __init__(self):
+        self.rows = 0
+        self.raw_abs_sum = self.raw_abs_max = 0.0
+        self.action_abs_sum = self.action_abs_max = 0.0
+        self.price_abs_sum = self.price_abs_max = self.price_rel_max = 0.0
+        self.price_changed = self.rule_changed = 0
+
+    def add(self, ref, out, ref_raw, out_raw):
+        d_raw = np.abs(out_raw - ref_raw)
+        d_action = np.abs(out["action_adjustment"] - ref["action_adjustment"])
+        d_price = np.abs(out["predicted_price"] - ref["predicted_price"])
+        ref_price = np.abs(ref["predicted_price"])
+        rel = np.divide(d_price, ref_price, out=np.zeros_like(d_price), where=ref_price > 0)
+        self.rows += len(d_action)
+        if not len(d_action):
+            return
+        self.raw_abs_sum += float(d_raw.sum())
+        self.raw_abs_max = max(self.raw_abs_max, float(d_raw.max()))
+        self.action_abs_sum += float(d_action.sum())
+        self.action_abs_max = max(self.action_abs_max, float(d_action.max()))
+        self.price_abs_sum += float(d_price.sum())
+        self.price_abs_max = max(self.price_abs_max, float(d_price.max()))
+        self.price_rel_max = max(self.price_rel_max, float(rel.max()))
+        self.price_changed += int((d_price > 0).sum())
+        self.rule_changed += int((out["rule_applied"] != ref["rule_applied"]).sum())
+
+    def summary(self):
+        n = max(self.rows, 1)
+        return {
+            "rows": self.rows,
+            "policy_output": {"max_abs": round(self.raw_abs_max, 8), "mean_abs": round(self.raw_abs_sum / n, 8)},
+            "action_adjustment": {"max_abs": round(self.action_abs_max, 8),
+                                  "mean_abs": round(self.action_abs_sum / n, 8)},
+            "predicted_price": {"max_abs": round(self.price_abs_max, 4),
+                                "mean_abs": round(self.price_abs_sum / n, 6),
+                                "max_rel": round(self.price_rel_max, 8)},
+            "price_changed": round(self.price_changed / n, 6),
+            "rule_changed": round(self.rule_changed / n, 6),
+        }
+
+
+# -----------------------------
+# Measurements
+# -----------------------------
+def iter_features(path, chunksize, max_rows=None):
+    chunks = iter_dataset_chunks(path, chunksize) if is_dataset(path) else iter_csv_chunks(path, chunksize)
+    seen = 0
+    for _, X in chunks:
+        if max_rows is not None:
+            X = X[:max_rows - seen]
+        if len(X):
+            yield X
+        seen += len(X)
+        if max_rows is not None and seen >= max_rows:
+            return
+
+def time_predict(engine, X, batch_size, repeats):
+    """Median seconds per engine.predict call on the first `batch_size` rows."""
+    batch = X[:batch_size]
+    engine.predict(batch)  # warm-up
+    runs = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        engine.predict(batch)
+        runs.append(time.perf_counter() - t0)
+    return float(np.median(runs))
+
+def compare(model_path, data_path=DATA_PATH, precisions=("float16", "int8"), chunksize=DEFAULT_CHUNKSIZE,
+            max_rows=None, batch_sizes=DEFAULT_BATCH_SIZES, repeats=50):
+    reference = PolicyEngine.load(model_path, "float32")
+    engines = {p: reference.with_precision(p) for p in precisions}
+    deviations = {p: Deviation() for p in precisions}
+
+    sample = None
+    for X in iter_features(data_path, chunksize, max_rows):
+        if sample is None:
+            sample = X
+        ref = price_products(reference, X)
+        obs = reference.transform(X)
+        ref_raw = reference.forward(obs, clip=False)[:, 0]
+        for p, engine in engines.items():
+            deviations[p].add(ref, price_products(engine, X), ref_raw, engine.forward(obs, clip=False)[:, 0])
+    if sample is None:
+        raise SystemExit(f"❌ No rows in {data_path}")
+
+    # Latency batches are tiled from the first chunk when it is smaller
+    tiled = np.resize(sample, (max(max(batch_sizes), len(sample)), sample.shape[1]))
+    report = {}
+    for p, engine in {"float32": reference, **engines}.items():
+        report[p] = {
+            "weight_bytes": engine.weight_bytes,
+            "latency_s": {str(b): time_predict(engine, tiled, b, repeats) for b in batch_sizes},
+        }
+        if p in deviations:
+            report[p]["deviation"] = deviations[p].summary()
+    return report
+
+
+# -----------------------------
+# CLI
+# -----------------------------
+def print_report(report):
+    ref = report["float32"]
+    batch_sizes = list(ref["latency_s"])
+    print(f"{'precision':<10} {'weights_kb':>11} " + " ".join(f"{'batch ' + b:>16}" for b in batch_sizes))
+    for p, r in report.items():
+        cells = []
+        for b in batch_sizes:
+            latency = r["latency_s"][b]
+            cells.append(f"{latency * 1e6:>9.1f}us {latency / ref['latency_s'][b]:>4.2f}x")
+        print(f"{p:<10} {r['weight_bytes'] / 1024:>11.1f} " + " ".join(f"{c:>16}" for c in cells))
+
+    print(f"\n{'precision':<10} {'max|d_output|':>14} {'max|d_action|':>14} {'mean|d_action|':>15} "
+          f"{'max|d_price|':>13} {'max_rel_price':>14} {'price_changed':>14} {'rule_changed':>13}")
+    for p, r in report.items():
+        d = r.get("deviation")
+        if d is None:
+            continue
+        print(f"{p:<10} {d['policy_output']['max_abs']:>14.2e} {d['action_adjustment']['max_abs']:>14.2e} "
+              f"{d['action_adjustment']['mean_abs']:>15.2e} "
+              f"{d['predicted_price']['max_abs']:>13.2f} {d['predicted_price']['max_rel']:>14.2e} "
+              f"{d['price_changed']:>14.4%} {d['rule_changed']:>13.4%}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Accuracy and latency of reduced-precision policy weights")
+    parser.add_argument("--model", default=POLICY_PATH, help="exported policy (.npz path or registry version name)")
+    parser.add_argument("--data", default=DATA_PATH, help="CSV or memory-mapped dataset (build_dataset.py)")
+    parser.add_argument("--precisions", nargs="+", default=["float16", "int8"],
+                        choices=[p for p in PRECISIONS if p != "float32"])
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument("--rows", type=int, help="only compare the first N rows")
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=list(DEFAULT_BATCH_SIZES))
+    parser.add_argument("--repeats", type=int, default=50, help="timed calls per batch size")
+    parser.add_argument("--max-price-deviation", type=float,
+                        help="fail if any precision moves a served price by more than this (relative, e.g. 0.001)")
+    parser.add_argument("--json", help="also write the report to this path")
+    args = parser.parse_args(argv)
+
+    (_, model_path), = resolve_policies([args.model], [])
+    t0 = time.perf_counter()
+    report = compare(model_path, args.data, args.precisions, args.chunksize, args.rows, args.batch_sizes,
+                     args.repeats)
+    elapsed = time.perf_counter() - t0
+
+    print_report(report)
+    rows = report[args.precisions[0]]["deviation"]["rows"]
+    print(f"\n✅ Compared {len(args.precisions)} precision(s) on {rows} rows in {elapsed:.2f}s")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Report saved to {args.json}")
+
+    if args.max_price_deviation is not None:
+        over = {p: r["deviation"]["predicted_price"]["max_rel"] for p, r in report.items()
+                if "deviation" in r and r["deviation"]["predicted_price"]["max_rel"] > args.max_price_deviation}
+        if over:
+            raise SystemExit(f"❌ Price deviation above {args.max_price_deviation}: {over}")
+        print(f"✅ All precisions within {args.max_price_deviation} relative price deviation")
+
+if __name__ == "__main__":
+    main()
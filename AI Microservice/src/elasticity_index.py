@@ -0,0 +1,115 @@
+import os
+import json
+import numpy as np
+
+try:
+    from src.feature_store import is_dataset
+    from src.pricing import ELASTICITY
+except ImportError:  # running from inside src/
+    from feature_store import is_dataset
+    from pricing import ELASTICITY
+
+# -----------------------------
+# Project paths (absolute)
+# -----------------------------
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+MODELS_DIR = os.path.join(PROJECT_ROOT, "models")
+# From estimate_elasticity.py; the service and the offline tools read the same file
+ELASTICITY_INDEX_PATH = os.environ.get("ELASTICITY_INDEX_PATH", os.path.join(MODELS_DIR, "elasticity_index.json"))
+
+# Lookup order: product name, then category, then the global default
+LEVELS = ("product_name", "category")
+
+
+def normalize_key(value):
+    return value.strip().lower() if isinstance(value, str) else None
+
+
+class ElasticityIndex:
+    """
+    Per-product / per-category price elasticity (the `elasticity` of the
+    env's demand curve, sales * exp(-elasticity * (price_ratio - 1))).
+    A lookup is two dict probes; anything not in the index gets `default`.
+    """
+
+    def __init__(self, default=ELASTICITY, product_name=None, category=None, meta=None):
+        self.default = float(default)
+        self.tables = {
+            "product_name": {normalize_key(k): float(v) for k, v in (product_name or {}).items()},
+            "category": {normalize_key(k): float(v) for k, v in (category or {}).items()},
+        }
+        self.meta = meta or {}
+
+    @property
+    def empty(self):
+        """True when every lookup returns `default`."""
+        return not any(self.tables.values())
+
+    def lookup(self, product_name=None, category=None):
+        for level, key in zip(LEVELS, (product_name, category)):
+            value = self.tables[level].get(normalize_key(key))
+            if value is not None:
+                return value
+        return self.default
+
+    def lookup_many(self, product_names, categories=None):
+        """(N,) float64 elasticities; `categories` may be None."""
+        if categories is None:
+            categories = [None] * len(product_names)
+        return np.array([self.lookup(n, c) for n, c in zip(product_names, categories)], dtype=np.float64)
+
+    def lookup_rows(self, rows):
+        """
+        Per-row elasticities for a table (DataFrame) with optional product_name /
+        category columns; the scalar default if it has neither or the index is empty.
+        """
+        names = rows["product_name"].tolist() if "product_name" in rows else None
+        categories = rows["category"].tolist() if "category" in rows else None
+        if self.empty or (names is None and categories is None):
+            return self.default
+        return self.lookup_many(names if names is not None else [None] * len(categories), categories)
+
+    def __len__(self):
+        return sum(len(t) for t in self.tables.values())
+
+    # --- persistence ---
+    def save(self, path):
+        data = {"default": self.default, **self.tables, "meta": self.meta}
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(data, f, indent=1, sort_keys=True)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            data = json.load(f)
+        return cls(data.get("default", ELASTICITY), data.get("product_name"), data.get("category"),
+                   data.get("meta"))
+
+    @classmethod
+    def load_or_default(cls, path=ELASTICITY_INDEX_PATH):
+        """The index at `path`, or an empty one (global ELASTICITY everywhere) if it does not exist."""
+        if path and os.path.exists(path):
+            return cls.load(path)
+        return cls()
+
+
+def row_elasticities(data_path, index):
+    """
+    One elasticity per dataset row from an index (or index path), looked up
+    once by product_name / category, for the envs' and offline tools'
+    `elasticity`. Binary datasets store no product names, so they get the
+    index default.
+    """
+    import pandas as pd  # offline use only; the service does not depend on pandas
+
+    if isinstance(index, str):
+        index = ElasticityIndex.load(index)
+    if index.empty:
+        return index.default
+    if is_dataset(data_path):
+        print(f"⚠️ {data_path} has no product names; using the default elasticity {index.default}")
+        return index.default
+    columns = pd.read_csv(data_path, nrows=0).columns
+    return index.lookup_rows(pd.read_csv(data_path, usecols=[c for c in LEVELS if c in columns]))
@@ -0,0 +1,177 @@
+import os
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+try:
+    from src.elasticity_index import ELASTICITY_INDEX_PATH, LEVELS, ElasticityIndex, normalize_key
+    from src.pricing import ELASTICITY
+except ImportError:  # running from inside src/
+    from elasticity_index import ELASTICITY_INDEX_PATH, LEVELS, ElasticityIndex, normalize_key
+    from pricing import ELASTICITY
+
+# -----------------------------
+# Project paths (absolute)
+# -----------------------------
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DATA_DIR = os.path.join(PROJECT_ROOT, "data")
+DATA_PATH = os.path.join(DATA_DIR, "synthetic_ecommerce_data.csv")
+
+DEFAULT_CHUNKSIZE = 1_000_000
+
+# -----------------------------
+# Model
+# -----------------------------
+# The env's demand curve is sales = base * demand_factor * exp(-e * (p / p0 - 1)),
+# so within one group (product or category)
+#     log(sales / demand_factor) = a - e * p / p0
+# is linear in the price. Prices are taken relative to actual_price, so list
+# price differences between variants of a product do not look like price
+# changes, and p0 is the group's mean relative price: e = -slope * p0.
+#
+# Every group's least-squares fit only needs six running sums (n, x, y, xx,
+# xy, yy), accumulated with np.bincount one chunk at a time, so histories of
+# any size take one streaming pass. Each raw estimate is then shrunk towards
+# the global default by its standard error (normal prior with sd
+# --prior-std): noisy or flat histories stay close to ELASTICITY.
+SUMS = ("n", "x", "y", "xx", "xy", "yy")
+
+
+class GroupSums:
+    """Running least-squares sums per group key, grown as new keys appear."""
+
+    def __init__(self):
+        self.keys = {}
+        self.sums = np.zeros((len(SUMS), 0))
+
+    def add(self, keys, x, y):
+        codes, uniques = pd.factorize(keys, use_na_sentinel=False)
+        # chunk-local codes -> global codes; keys are normalized once per unique value
+        lookup = np.array([self.keys.setdefault(normalize_key(k) or "", len(self.keys)) for k in uniques],
+                          dtype=np.int64)
+        codes = lookup[codes]
+        if len(self.keys) > self.sums.shape[1]:
+            self.sums = np.pad(self.sums, ((0, 0), (0, len(self.keys) - self.sums.shape[1])))
+        n = len(self.keys)
+        for i, weights in enumerate((None, x, y, x * x, x * y, y * y)):
+            self.sums[i] += np.bincount(codes, weights=weights, minlength=n)
+
+
+def prepare_chunk(df):
+    """(valid-row mask, x = selling/actual - 1, y = log(sales / demand_factor))."""
+    demand_factor = 0.6 * df["demand_index"].to_numpy(float) + 0.4 * df["user_interest"].to_numpy(float)
+    sales = df["sales"].to_numpy(float)
+    actual = df["actual_price"].to_numpy(float)
+    selling = df["selling_price"].to_numpy(float)
+    ok = (sales > 0) & (demand_factor > 0) & (actual > 0) & (selling > 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x = selling / actual - 1.0  # centred near 0 so the running sums stay well conditioned
+        y = np.log(sales) - np.log(demand_factor)
+    return ok, x, y
+
+def fit_groups(sums, min_rows=30, prior=ELASTICITY, prior_std=1.0, bounds=(0.1, 10.0)):
+    """
+    Vectorized per-group fit from GroupSums.sums. Returns a dict of (G,)
+    arrays: n, raw estimate, standard error, shrunk elasticity, and `fitted`
+    (enough rows and price variation for a slope).
+    """
+    n, sx, sy, sxx, sxy, syy = sums
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cxx = sxx - sx * sx / n
+        cxy = sxy - sx * sy / n
+        cyy = syy - sy * sy / n
+        slope = cxy / cxx
+        resid_var = np.maximum(cyy - slope * cxy, 0.0) / (n - 2)
+        p0 = 1.0 + sx / n  # mean relative price
+        raw = -slope * p0
+        se = np.sqrt(resid_var / cxx) * p0
+
+        fitted = (n >= max(min_rows, 3)) & (cxx > 1e-12 * np.maximum(n, 1)) & np.isfinite(raw) & np.isfinite(se)
+        # Posterior mean under N(prior, prior_std^2); a perfect fit (se 0) keeps its raw value
+        w = prior_std ** 2 / (prior_std ** 2 + se ** 2)
+        shrunk = np.clip(np.where(se > 0, w * raw + (1 - w) * prior, raw), *bounds)
+    return {"n": n.astype(np.int64), "raw": raw, "se": se, "elasticity": np.where(fitted, shrunk, prior),
+            "fitted": fitted}
+
+
+# -----------------------------
+# Estimation
+# -----------------------------
+def read_chunks(path, chunksize, levels):
+    """CSV chunks with the demand columns plus whichever group columns the file has."""
+    columns = pd.read_csv(path, nrows=0).columns
+    present = [c for c in levels if c in columns]
+    if not present:
+        raise SystemExit(f"❌ {path} has none of the group columns {list(levels)}")
+    missing = [c for c in levels if c not in columns]
+    if missing:
+        print(f"⚠️ {path} has no {missing} column; skipping that level")
+    usecols = present + ["actual_price", "selling_price", "demand_index", "user_interest", "sales"]
+    return present, pd.read_csv(path, usecols=usecols, chunksize=chunksize)
+
+def estimate(path=DATA_PATH, levels=LEVELS, chunksize=DEFAULT_CHUNKSIZE, min_rows=30, prior=ELASTICITY,
+             prior_std=1.0, bounds=(0.1, 10.0)):
+    """
+    Stream the history once and fit every group of every level. Returns
+    (ElasticityIndex, per-level fit report DataFrames).
+    """
+    present, chunks = read_chunks(path, chunksize, levels)
+    sums = {level: GroupSums() for level in present}
+    n_rows = n_used = 0
+    for df in chunks:
+        ok, x, y = prepare_chunk(df)
+        n_rows += len(df)
+        n_used += int(ok.sum())
+        for level in present:
+            sums[level].add(df[level].to_numpy(dtype=object)[ok], x[ok], y[ok])
+
+    tables, reports = {}, {}
+    for level in present:
+        groups = sums[level]
+        names = list(groups.keys)
+        fit = fit_groups(groups.sums, min_rows, prior, prior_std, bounds)
+        report = pd.DataFrame({"group": names, **fit})
+        report = report[report["group"] != ""]
+        reports[level] = report
+        tables[level] = {g: round(float(e), 4) for g, e, f in
+                         zip(report["group"], report["elasticity"], report["fitted"]) if f}
+
+    meta = {"source": os.path.abspath(path), "rows": n_rows, "rows_used": n_used, "min_rows": min_rows,
+            "prior_std": prior_std, "bounds": list(bounds)}
+    return ElasticityIndex(prior, tables.get("product_name"), tables.get("category"), meta), reports
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Estimate per-product / per-category price elasticity")
+    parser.add_argument("--input", default=DATA_PATH, help="history CSV (product_name and/or category, prices, "
+                                                           "demand_index, user_interest, sales)")
+    parser.add_argument("--out", default=ELASTICITY_INDEX_PATH)
+    parser.add_argument("--levels", nargs="+", default=list(LEVELS), choices=list(LEVELS))
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument("--min-rows", type=int, default=30, help="smaller groups use the default")
+    parser.add_argument("--default", type=float, default=ELASTICITY, help="fallback and shrinkage target")
+    parser.add_argument("--prior-std", type=float, default=1.0,
+                        help="how far a group may move from the default (smaller = more shrinkage)")
+    parser.add_argument("--min", type=float, default=0.1)
+    parser.add_argument("--max", type=float, default=10.0)
+    parser.add_argument("--report", help="also write the per-group fits (n, raw, se, elasticity) to this CSV")
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    index, reports = estimate(args.input, args.levels, args.chunksize, args.min_rows, args.default,
+                              args.prior_std, (args.min, args.max))
+    elapsed = time.perf_counter() - t0
+
+    for level, report in reports.items():
+        print(f"\n{level}:")
+        print(report.sort_values("n", ascending=False).head(20).to_string(index=False, float_format="%.3f"))
+    index.save(args.out)
+    if args.report:
+        pd.concat([r.assign(level=level) for level, r in reports.items()]).to_csv(args.report, index=False)
+        print(f"✅ Fit report saved to {args.report}")
+    print(f"\n✅ {len(index)} elasticities from {index.meta['rows']} rows in {elapsed:.2f}s "
+          f"(default {index.default}) -> {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,19 @@
 import os
+import argparse
 import pandas as pd
 import numpy as np
 import joblib
 from stable_baselines3 import PPO
 
+try:
+    from src.elasticity_index import ELASTICITY_INDEX_PATH, ElasticityIndex
+    from src.feature_store import is_dataset, load_dataset
+    from src.pricing import ELASTICITY
+except ImportError:  # running from inside src/
+    from elasticity_index import ELASTICITY_INDEX_PATH, ElasticityIndex
+    from feature_store import is_dataset, load_dataset
+    from pricing import ELASTICITY
+
 # -----------------------------
 # Project paths (absolute)
 # -----------------------------
@@ -26,7 +36,20 @@ scaler = meta["scaler"]
 # -----------------------------
 # Load dataset
 # -----------------------------
-df = pd.read_csv(DATA_PATH)
+parser = argparse.ArgumentParser(description="Quick policy sanity check on the first rows")
+parser.add_argument("--data", default=DATA_PATH, help="CSV or memory-mapped dataset (build_dataset.py)")
+parser.add_argument("--rows", type=int, default=10)
+parser.add_argument("--elasticity-index", default=ELASTICITY_INDEX_PATH,
+                    help="per-product elasticities (default ELASTICITY_INDEX_PATH, global elasticity if missing)")
+args = parser.parse_args()
+elasticity_index = ElasticityIndex.load_or_default(args.elasticity_index)
+
+if is_dataset(args.data):
+    # Memory-mapped: only the rows we look at are read from disk
+    ds = load_dataset(args.data)
+    df = pd.DataFrame(np.asarray(ds.raw[:args.rows], dtype=np.float64), columns=ds.features)
+else:
+    df = pd.read_csv(args.data, nrows=args.rows)
 
 # -----------------------------
 # Helper functions
@@ -35,7 +58,7 @@ def make_obs(row):
     vals = row[features].astype(float).values.reshape(1, -1)
     return scaler.transform(vals)[0]
 
-def simulate_expected_sales(row, old_price, new_price, elasticity=3.0):
+def simulate_expected_sales(row, old_price, new_price, elasticity=ELASTICITY):
     demand_factor = max(
         0.0, 
         (0.6 * float(row["demand_index"]) + 0.4 * float(row["user_interest"]))
@@ -49,7 +72,7 @@ def simulate_expected_sales(row, old_price, new_price, elasticity=3.0):
 # -----------------------------
 # Run quick simulation
 # -----------------------------
-for idx in range(10):
+for idx in range(min(args.rows, len(df))):
     row = df.iloc[idx]
     obs = make_obs(row)
     action, _ = model.predict(obs, deterministic=True)
@@ -57,7 +80,8 @@ for idx in range(10):
 
     old_price = float(row["selling_price"])
     predicted_price = old_price * (1 + adjustment)
-    exp_sales = simulate_expected_sales(row, old_price, predicted_price)
+    elasticity = elasticity_index.lookup(row.get("product_name"), row.get("category"))
+    exp_sales = simulate_expected_sales(row, old_price, predicted_price, elasticity)
     profit = (predicted_price - float(row["actual_price"])) * exp_sales
 
     print(
@@ -0,0 +1,291 @@
+import os
+import json
+import time
+import argparse
+import multiprocessing as mp
+import numpy as np
+import pandas as pd
+
+try:
+    from src.elasticity_index import ELASTICITY_INDEX_PATH, ElasticityIndex, row_elasticities
+    from src.feature_store import is_dataset, load_dataset
+    from src.model_registry import ModelRegistry
+    from src.policy_engine import PolicyEngine
+    from src.pricing import (ACTION_HIGH, ACTION_LOW, COL, ENV_KWARGS, FEATURES, RULE_NAMES, RULES,
+                             estimate_sales_profit, simulate_pricing_step)
+except ImportError:  # running from inside src/
+    from elasticity_index import ELASTICITY_INDEX_PATH, ElasticityIndex, row_elasticities
+    from feature_store import is_dataset, load_dataset
+    from model_registry import ModelRegistry
+    from policy_engine import PolicyEngine
+    from pricing import (ACTION_HIGH, ACTION_LOW, COL, ENV_KWARGS, FEATURES, RULE_NAMES, RULES,
+                         estimate_sales_profit, simulate_pricing_step)
+
+# -----------------------------
+# Project paths (absolute)
+# -----------------------------
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DATA_DIR = os.path.join(PROJECT_ROOT, "data")
+MODELS_DIR = os.path.join(PROJECT_ROOT, "models")
+
+DATA_PATH = os.path.join(DATA_DIR, "synthetic_ecommerce_data.csv")
+POLICY_PATH = os.path.join(MODELS_DIR, "pricing_policy.npz")
+REGISTRY_DIR = os.path.join(MODELS_DIR, "registry")
+
+DEFAULT_CHUNKSIZE = 200_000
+
+# Summed per row, reported as totals and per-step means
+SUM_KEYS = ("reward", "profit", "competitor_penalty", "holding_penalty", "predicted_sales",
+            "served_profit")
+
+# -----------------------------
+# How episodes reduce to one pass
+# -----------------------------
+# ArrayPricingEnv.step reloads the next row's selling_price after every
+# action, so a step's reward depends only on its own row and action. Rolling a
+# deterministic policy over the dataset is therefore one vectorized pass, and
+# the return of an episode starting at row s (which walks to the end of the
+# data) is the suffix sum of the per-row rewards from s. Any number of sampled
+# episodes costs one cumulative sum instead of O(episodes x rows) env steps.
+
+
+# -----------------------------
+# Baselines
+# -----------------------------
+def keep_price(X):
+    """Leave every price unchanged."""
+    return np.zeros(len(X))
+
+def match_ebay(X):
+    """Move to the competitor's price, as far as the action space allows."""
+    selling = X[:, COL["selling_price"]]
+    ebay = X[:, COL["ebay_price"]]
+    ok = (selling > 0) & (ebay > 0)
+    adjustment = np.where(ok, ebay / np.where(ok, selling, 1.0) - 1.0, 0.0)
+    return np.clip(adjustment, ACTION_LOW, ACTION_HIGH)
+
+BASELINES = {"keep_price": keep_price, "match_ebay": match_ebay}
+
+
+# -----------------------------
+# Policies
+# -----------------------------
+def resolve_policies(models, baselines, registry_dir=REGISTRY_DIR):
+    """
+    (name, path or None) for every policy to evaluate. A model is an .npz
+    path or a registry version name (models/registry/<name>.npz, "default" =
+    models/pricing_policy.npz).
+    """
+    found = ModelRegistry(registry_dir, POLICY_PATH).discover()
+    policies = []
+    for model in models:
+        if os.path.exists(model):
+            name = os.path.splitext(os.path.basename(model))[0]
+            policies.append((name, model))
+        elif model in found:
+            policies.append((model, found[model]))
+        else:
+            raise SystemExit(f"❌ Unknown model '{model}' (not a file or registry version: {sorted(found)})")
+    for name in baselines:
+        if name not in BASELINES:
+            raise SystemExit(f"❌ Unknown baseline '{name}' (choose from {sorted(BASELINES)})")
+        policies.append((name, None))
+    names = [name for name, _ in policies]
+    if len(set(names)) != len(names):
+        raise SystemExit(f"❌ Duplicate policy names: {names}")
+    return policies
+
+
+# -----------------------------
+# Workers
+# -----------------------------
+_policies = None  # name -> callable(X) -> (N,) clipped adjustments
+_dataset = None
+
+def _init_worker(policies, data_path=None):
+    global _policies, _dataset
+    _policies = {}
+    for name, path in policies:
+        if path is None:
+            _policies[name] = BASELINES[name]
+        else:
+            engine = PolicyEngine.load(path)
+            _policies[name] = lambda X, engine=engine: engine.predict(X)[:, 0].astype(np.float64)
+    _dataset = load_dataset(data_path) if data_path else None
+
+def evaluate_block(X, keep_rewards=False, elasticity=ENV_KWARGS["elasticity"]):
+    """
+    Every policy over one (rows, 9) block: env reward terms, rule hits and the
+    served (post-rule) profit, with `elasticity` (scalar or per row) in both.
+    Returns name -> partial aggregates.
+    """
+    env_kwargs = {**ENV_KWARGS, "elasticity": elasticity}
+    results = {}
+    for name, policy in _policies.items():
+        adjustment = policy(X)
+        step = simulate_pricing_step(adjustment, X, **env_kwargs)
+
+        # What /predict would serve for the same action
+        pre_rule = X[:, COL["selling_price"]] * (1.0 + adjustment)
+        adjusted, rule, fired = RULES.apply(pre_rule, X)
+        _, served_profit = estimate_sales_profit(np.round(adjusted, 2), X, elasticity)
+
+        res = {key: float(step[key].sum()) for key in SUM_KEYS if key in step}
+        res["served_profit"] = float(served_profit.sum())
+        res["adjustment_sum"] = float(adjustment.sum())
+        res["adjustment_sq_sum"] = float((adjustment ** 2).sum())
+        res["rule_applied"] = np.bincount(rule, minlength=len(RULE_NAMES))
+        res["rules_fired"] = np.array([np.count_nonzero(fired >> i & 1) for i in range(len(RULE_NAMES))])
+        if keep_rewards:
+            res["rewards"] = step["reward"]
+        results[name] = res
+    return results
+
+def _evaluate_range(start, stop, keep_rewards, elasticity):
+    X = np.asarray(_dataset.raw[start:stop], dtype=np.float64)
+    return evaluate_block(X, keep_rewards, elasticity)
+
+
+# -----------------------------
+# Input
+# -----------------------------
+def load_raw(path):
+    """(N, 9) float64 features in pricing.FEATURES order (missing columns -> 0)."""
+    df = pd.read_csv(path)
+    X = np.zeros((len(df), len(FEATURES)), dtype=np.float64)
+    for j, name in enumerate(FEATURES):
+        if name in df.columns:
+            X[:, j] = df[name].fillna(0).astype(float).values
+    return X
+
+def _map_blocks(data_path, policies, chunksize, workers, keep_rewards, elasticity=ENV_KWARGS["elasticity"]):
+    """Ordered per-block results, in-process or across a pool."""
+    def rows(s, e):
+        return elasticity[s:e] if np.ndim(elasticity) else elasticity
+
+    if is_dataset(data_path):
+        # Workers memory-map the dataset themselves; only row ranges are sent
+        n_rows = len(load_dataset(data_path))
+        tasks = [(s, min(s + chunksize, n_rows), keep_rewards, rows(s, s + chunksize))
+                 for s in range(0, n_rows, chunksize)]
+        init, fn = (policies, data_path), _evaluate_range
+    else:
+        X = load_raw(data_path)
+        n_rows = len(X)
+        tasks = [(X[s:s + chunksize], keep_rewards, rows(s, s + chunksize)) for s in range(0, n_rows, chunksize)]
+        init, fn = (policies,), evaluate_block
+
+    if workers <= 1 or len(tasks) <= 1:
+        _init_worker(*init)
+        return n_rows, [fn(*task) for task in tasks]
+    with mp.Pool(min(workers, len(tasks)), initializer=_init_worker, initargs=init) as pool:
+        return n_rows, pool.starmap(fn, tasks)
+
+
+# -----------------------------
+# Aggregation
+# -----------------------------
+def summarize(blocks, n_rows, starts=None):
+    """Merge per-block aggregates into one report per policy."""
+    report = {}
+    for name in blocks[0]:
+        parts = [b[name] for b in blocks]
+        totals = {key: sum(p[key] for p in parts) for key in SUM_KEYS}
+        adj_mean = sum(p["adjustment_sum"] for p in parts) / n_rows
+        adj_var = sum(p["adjustment_sq_sum"] for p in parts) / n_rows - adj_mean ** 2
+        applied = sum(p["rule_applied"] for p in parts)
+        fired = sum(p["rules_fired"] for p in parts)
+
+        summary = {
+            "rows": n_rows,
+            "total": {key: round(v, 4) for key, v in totals.items()},
+            "per_step": {key: round(v / n_rows, 6) for key, v in totals.items()},
+            "adjustment": {"mean": round(adj_mean, 6), "std": round(float(np.sqrt(max(adj_var, 0.0))), 6)},
+            "rule_applied": {str(r): round(int(c) / n_rows, 6) for r, c in zip(RULE_NAMES, applied)},
+            "rules_fired": {str(r): round(int(c) / n_rows, 6)
+                            for r, c in zip(RULE_NAMES[1:], fired[1:])},
+        }
+        if starts is not None:
+            rewards = np.concatenate([p["rewards"] for p in parts])
+            suffix = np.cumsum(rewards[::-1])[::-1]
+            returns = suffix[starts]
+            summary["episodes"] = {
+                "n": int(len(starts)),
+                "mean_return": round(float(returns.mean()), 4),
+                "std_return": round(float(returns.std()), 4),
+                "mean_length": round(float((n_rows - starts).mean()), 1),
+            }
+        report[name] = summary
+    return report
+
+def evaluate(data_path=DATA_PATH, models=(POLICY_PATH,), baselines=tuple(BASELINES),
+             episodes=0, seed=0, chunksize=DEFAULT_CHUNKSIZE, workers=1, index_path=ELASTICITY_INDEX_PATH):
+    """
+    Evaluate policies and baselines over the whole dataset. With `episodes`,
+    also report returns of that many episodes with random start rows (as
+    sampled by the training env / EvalCallback), seeded by `seed`. Rows use
+    their elasticity from the index at `index_path` when it exists, like the
+    service.
+    """
+    policies = resolve_policies(models, baselines)
+    elasticity = row_elasticities(data_path, ElasticityIndex.load_or_default(index_path))
+    n_rows, blocks = _map_blocks(data_path, policies, chunksize, workers, keep_rewards=episodes > 0,
+                                 elasticity=elasticity)
+    starts = np.random.default_rng(seed).integers(0, n_rows, size=episodes) if episodes else None
+    return summarize(blocks, n_rows, starts)
+
+
+# -----------------------------
+# CLI
+# -----------------------------
+def print_report(report):
+    names = list(report)
+    width = max(12, *(len(n) for n in names))
+    print(f"{'policy':<{width}} {'reward/step':>12} {'profit':>14} {'comp_pen':>12} "
+          f"{'hold_pen':>12} {'served_profit':>14} {'ep_return':>18}")
+    for name in names:
+        r = report[name]
+        t = r["total"]
+        ep = r.get("episodes")
+        ep_text = f"{ep['mean_return']:.2f} ± {ep['std_return']:.2f}" if ep else "-"
+        print(f"{name:<{width}} {r['per_step']['reward']:>12.4f} {t['profit']:>14.2f} "
+              f"{t['competitor_penalty']:>12.2f} {t['holding_penalty']:>12.2f} "
+              f"{t['served_profit']:>14.2f} {ep_text:>18}")
+    print("\nRule applied (share of rows):")
+    for name in names:
+        shares = ", ".join(f"{rule} {share:.1%}" for rule, share in report[name]["rule_applied"].items()
+                           if share)
+        print(f"  {name:<{width}} {shares}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluate pricing policies against baselines on the full dataset")
+    parser.add_argument("--data", default=DATA_PATH, help="CSV or memory-mapped dataset (build_dataset.py)")
+    parser.add_argument("--models", nargs="*", default=[POLICY_PATH],
+                        help="exported policies (.npz paths or registry version names)")
+    parser.add_argument("--baselines", nargs="*", default=list(BASELINES), help=f"any of {sorted(BASELINES)}")
+    parser.add_argument("--episodes", type=int, default=1000, help="sampled episodes (0 = full pass only)")
+    parser.add_argument("--seed", type=int, default=0, help="seed for episode start rows")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument("--workers", type=int, default=1, help="processes evaluating row blocks")
+    parser.add_argument("--json", help="also write the report to this path")
+    parser.add_argument("--elasticity-index", default=ELASTICITY_INDEX_PATH,
+                        help="per-product elasticities (estimate_elasticity.py; default ELASTICITY_INDEX_PATH, "
+                             "global elasticity if missing)")
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    report = evaluate(args.data, args.models, args.baselines, args.episodes, args.seed,
+                      args.chunksize, args.workers, args.elasticity_index)
+    elapsed = time.perf_counter() - t0
+
+    print_report(report)
+    n_rows = next(iter(report.values()))["rows"]
+    print(f"\n✅ Evaluated {len(report)} policies x {n_rows} rows in {elapsed:.2f}s "
+          f"({args.workers} worker(s))")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Report saved to {args.json}")
+
+if __name__ == "__main__":
+    main()
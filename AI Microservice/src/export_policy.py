@@ -0,0 +1,107 @@
+import os
+import argparse
+import joblib
+import numpy as np
+import pandas as pd
+from stable_baselines3 import PPO
+
+try:
+    from src.policy_engine import PRECISIONS, PolicyEngine
+except ImportError:  # running from inside src/
+    from policy_engine import PRECISIONS, PolicyEngine
+
+# -----------------------------
+# Project paths (absolute)
+# -----------------------------
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DATA_DIR = os.path.join(PROJECT_ROOT, "data")
+MODELS_DIR = os.path.join(PROJECT_ROOT, "models")
+
+MODEL_PATH = os.path.join(MODELS_DIR, "pricing_model.zip")
+SCALER_PATH = os.path.join(MODELS_DIR, "scaler.pkl")
+POLICY_PATH = os.path.join(MODELS_DIR, "pricing_policy.npz")
+DATA_PATH = os.path.join(DATA_DIR, "synthetic_ecommerce_data.csv")
+
+ACTIVATION_NAMES = {"Tanh": "tanh", "ReLU": "relu"}
+
+
+# -----------------------------
+# Export
+# -----------------------------
+def export_engine(model, meta):
+    """Pull the actor MLP out of an SB3 PPO model and pair it with the scaler."""
+    import torch.nn as nn
+
+    policy = model.policy
+    linears = [m for m in policy.mlp_extractor.policy_net if isinstance(m, nn.Linear)]
+    linears.append(policy.action_net)
+    activations = {type(m).__name__ for m in policy.mlp_extractor.policy_net
+                   if not isinstance(m, nn.Linear)}
+    if len(activations) > 1 or not activations <= set(ACTIVATION_NAMES):
+        raise ValueError(f"Unsupported policy activations: {sorted(activations)}")
+    activation = ACTIVATION_NAMES[activations.pop()] if activations else "tanh"
+
+    scaler = meta["scaler"]
+    return PolicyEngine(
+        features=meta["features"],
+        scale=scaler.scale_,
+        min_=scaler.min_,
+        weights=[m.weight.detach().cpu().numpy().T for m in linears],
+        biases=[m.bias.detach().cpu().numpy() for m in linears],
+        action_low=model.action_space.low,
+        action_high=model.action_space.high,
+        activation=activation,
+    )
+
+
+def verify_engine(engine, model, meta, data_path):
+    """
+    Compare the NumPy engine against PPO.predict on every row of the dataset.
+    The unclipped policy mean is compared too, since clipping can hide drift.
+    """
+    import torch
+
+    df = pd.read_csv(data_path)
+    X = df[meta["features"]].astype(float).values
+    obs = meta["scaler"].transform(X).astype(np.float32)
+    expected, _ = model.predict(obs, deterministic=True)
+    with torch.no_grad():
+        expected_raw = model.policy._predict(torch.as_tensor(obs), deterministic=True).numpy()
+
+    max_dev = float(np.max(np.abs(engine.predict(X) - expected)))
+    max_dev_raw = float(np.max(np.abs(engine.forward(engine.transform(X), clip=False) - expected_raw)))
+    return max_dev, max_dev_raw, len(X)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the PPO actor to a NumPy inference artifact")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--scaler", default=SCALER_PATH)
+    parser.add_argument("--out", default=POLICY_PATH)
+    parser.add_argument("--data", default=DATA_PATH, help="dataset used for the parity check")
+    parser.add_argument("--tol", type=float, default=1e-5, help="max allowed |action| deviation")
+    parser.add_argument("--skip-verify", action="store_true")
+    parser.add_argument("--precision", default="float32", choices=PRECISIONS,
+                        help="weight precision of the saved artifact (served as saved unless MODEL_PRECISION is set)")
+    args = parser.parse_args()
+
+    model = PPO.load(args.model, device="cpu")
+    meta = joblib.load(args.scaler)
+    engine = export_engine(model, meta)
+    engine.with_precision(args.precision).save(args.out)
+    print(f"✅ Saved {args.precision} policy engine to {args.out}")
+
+    if not args.skip_verify:
+        # Reduced-precision weights are not expected to match to --tol; the
+        # parity check covers the export itself, compare_precision.py the rest
+        checked = PolicyEngine.load(args.out) if args.precision == "float32" else engine
+        max_dev, max_dev_raw, n_rows = verify_engine(checked, model, meta, args.data)
+        print(f"Parity vs PPO.predict on {n_rows} rows: max |Δaction| = {max_dev:.3e} "
+              f"(unclipped mean: {max_dev_raw:.3e})"
+              + ("" if args.precision == "float32" else " for the float32 export"))
+        if max(max_dev, max_dev_raw) > args.tol:
+            raise SystemExit(f"❌ Parity check failed (tolerance {args.tol:g})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+import os
+import json
+import struct
+import numpy as np
+
+NPY_MAGIC = b"\x93NUMPY\x01\x00"
+NPY_HEADER_BYTES = 128  # fixed, so the header can be rewritten in place once the row count is known
+
+
+class NpyStreamWriter:
+    """
+    Appends (rows, n_cols) blocks to a .npy file without knowing the final
+    row count up front. The header is written with a fixed size and patched
+    on close, so memory use is bounded by one block. The result is a regular
+    .npy file (np.load / mmap_mode="r" work as usual).
+    """
+
+    def __init__(self, path, n_cols, dtype=np.float32):
+        self.path = path
+        self.n_cols = int(n_cols)
+        self.dtype = np.dtype(dtype)
+        self.n_rows = 0
+        self._f = open(path, "wb")
+        self._write_header()
+
+    def _write_header(self):
+        header = "{'descr': %r, 'fortran_order': False, 'shape': (%d, %d), }" % (
+            np.lib.format.dtype_to_descr(self.dtype), self.n_rows, self.n_cols)
+        body_len = NPY_HEADER_BYTES - len(NPY_MAGIC) - 2
+        header = header.ljust(body_len - 1) + "\n"
+        if len(header) != body_len:
+            raise ValueError("npy header does not fit in the reserved space")
+        self._f.seek(0)
+        self._f.write(NPY_MAGIC + struct.pack("<H", body_len) + header.encode("latin1"))
+
+    def append(self, block):
+        block = np.ascontiguousarray(block, dtype=self.dtype)
+        if block.ndim != 2 or block.shape[1] != self.n_cols:
+            raise ValueError(f"expected (rows, {self.n_cols}) block, got {block.shape}")
+        self._f.write(block.tobytes())
+        self.n_rows += len(block)
+
+    def close(self):
+        if self._f.closed:
+            return
+        self._write_header()
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# -----------------------------
+# Memory-mapped pricing dataset
+# -----------------------------
+# A dataset is three files sharing a stem:
+#   <stem>.npy      raw features (n_rows, n_features), in `features` order
+#   <stem>.obs.npy  the same rows MinMax-scaled to float32 (policy observations)
+#   <stem>.json     header: feature order, dtype, row count and scaler params
+DATASET_FORMAT = "gocart-pricing-dataset"
+DATASET_VERSION = 1
+
+
+def dataset_paths(stem):
+    stem = stem[:-4] if stem.endswith(".npy") else stem
+    return stem + ".npy", stem + ".obs.npy", stem + ".json"
+
+
+def is_dataset(path):
+    return os.path.exists(dataset_paths(path)[2])
+
+
+class PricingDataset:
+    """
+    Read-only view of a dataset written by DatasetWriter. Arrays are opened
+    with np.load(mmap_mode="r"), so any number of processes share one
+    page-cached copy and opening is O(1) regardless of size.
+    """
+
+    def __init__(self, stem, mmap=True):
+        raw_path, obs_path, header_path = dataset_paths(stem)
+        with open(header_path) as f:
+            self.header = json.load(f)
+        if self.header.get("format") != DATASET_FORMAT:
+            raise ValueError(f"{header_path} is not a {DATASET_FORMAT} header")
+        if self.header.get("version") != DATASET_VERSION:
+            raise ValueError(f"Unsupported dataset version {self.header.get('version')}")
+
+        mode = "r" if mmap else None
+        self.raw = np.load(raw_path, mmap_mode=mode)
+        self.obs = np.load(obs_path, mmap_mode=mode)
+        self.features = list(self.header["features"])
+        self.scaler_min = np.asarray(self.header["scaler"]["min"], dtype=np.float64)
+        self.scaler_scale = np.asarray(self.header["scaler"]["scale"], dtype=np.float64)
+
+        if self.raw.shape != self.obs.shape or self.raw.shape[0] != self.header["n_rows"]:
+            raise ValueError(f"Dataset {stem} is inconsistent with its header")
+
+    def __len__(self):
+        return self.raw.shape[0]
+
+    def iter_chunks(self, chunksize):
+        """Yield (start, raw_block, obs_block) slices; blocks are views into the memmap."""
+        for start in range(0, len(self), chunksize):
+            yield start, self.raw[start:start + chunksize], self.obs[start:start + chunksize]
+
+
+def load_dataset(stem, mmap=True):
+    return PricingDataset(stem, mmap=mmap)
+
+
+class DatasetWriter:
+    """
+    Streams raw feature blocks into a PricingDataset, scaling each block with
+    the given MinMax parameters (scaler.min_ / scaler.scale_) on the way.
+    Observations are computed from the float64 input, exactly like
+    scaler.transform(X).astype(np.float32).
+    """
+
+    def __init__(self, stem, features, scaler_min, scaler_scale, dtype=np.float32, source=None):
+        self.raw_path, self.obs_path, self.header_path = dataset_paths(stem)
+        self.features = list(features)
+        self.scaler_min = np.asarray(scaler_min, dtype=np.float64)
+        self.scaler_scale = np.asarray(scaler_scale, dtype=np.float64)
+        self.dtype = np.dtype(dtype)
+        self.source = source
+        self._raw = NpyStreamWriter(self.raw_path, len(self.features), self.dtype)
+        self._obs = NpyStreamWriter(self.obs_path, len(self.features), np.float32)
+
+    @property
+    def n_rows(self):
+        return self._raw.n_rows
+
+    def append(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        self._raw.append(X)
+        self._obs.append(X * self.scaler_scale + self.scaler_min)
+
+    def close(self):
+        self._raw.close()
+        self._obs.close()
+        header = {
+            "format": DATASET_FORMAT,
+            "version": DATASET_VERSION,
+            "features": self.features,
+            "dtype": self.dtype.name,
+            "n_rows": self.n_rows,
+            "scaler": {"min": self.scaler_min.tolist(), "scale": self.scaler_scale.tolist()},
+            "source": self.source,
+        }
+        with open(self.header_path, "w") as f:
+            json.dump(header, f, indent=2)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,239 @@
+import os
+import json
+import time
+import argparse
+import multiprocessing as mp
+import joblib
+import numpy as np
+import pandas as pd
+
+try:
+    from src.feature_store import DatasetWriter, dataset_paths
+    from src.pricing import COL, ELASTICITY, FEATURES
+except ImportError:  # running from inside src/
+    from feature_store import DatasetWriter, dataset_paths
+    from pricing import COL, ELASTICITY, FEATURES
+
+# -----------------------------
+# Project paths (absolute)
+# -----------------------------
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DATA_DIR = os.path.join(PROJECT_ROOT, "data")
+MODELS_DIR = os.path.join(PROJECT_ROOT, "models")
+
+DATA_PATH = os.path.join(DATA_DIR, "synthetic_ecommerce_data.csv")
+SCALER_PATH = os.path.join(MODELS_DIR, "scaler.pkl")
+
+DEFAULT_CHUNKSIZE = 500_000
+N_QUANTILES = 101
+
+CSV_COLUMNS = ["product_name", "actual_price", "selling_price", "ebay_price", "stock",
+               "demand_index", "user_interest", "day_of_week", "season", "sales", "profit"]
+
+
+# -----------------------------
+# Fitting
+# -----------------------------
+# The spec is a small JSON-serializable dict:
+#   * product_name / day_of_week / season: category frequencies
+#   * actual_price: quantiles per product (prices depend strongly on the model)
+#   * selling_price / ebay_price: quantiles of selling/actual and ebay/selling
+#   * demand_index / user_interest: quantiles
+#   * stock: integer range
+#   * base_sales: sales at demand_factor 1 under the env's demand curve
+#     (see demand_rate)
+# Sampling a quantile table (inverse CDF with linear interpolation) keeps every
+# value inside the range seen in the source data.
+def _quantiles(values):
+    return np.quantile(np.asarray(values, dtype=np.float64), np.linspace(0.0, 1.0, N_QUANTILES)).tolist()
+
+def _frequencies(series):
+    counts = series.value_counts(sort=False).sort_index()
+    return {"values": counts.index.tolist(), "p": (counts / counts.sum()).tolist()}
+
+def demand_rate(base_sales, X, price_ratio=1.0, elasticity=ELASTICITY):
+    """
+    Expected sales per row with ArrayPricingEnv.step's demand formula,
+    sales * demand_factor * exp(-elasticity * (price_ratio - 1)). A generated
+    row describes the product at its current selling price, i.e. price_ratio 1.
+    """
+    demand_factor = np.maximum(0.0, 0.6 * X[:, COL["demand_index"]] + 0.4 * X[:, COL["user_interest"]])
+    return base_sales * demand_factor * np.exp(-elasticity * (np.asarray(price_ratio) - 1.0))
+
+def fit_spec(df):
+    """Fit the generator spec from a catalog DataFrame (the shipped CSV's columns)."""
+    df = df.dropna(subset=["actual_price", "selling_price", "ebay_price"])
+    df = df[(df["actual_price"] > 0) & (df["selling_price"] > 0)]
+    names = df["product_name"].fillna("unknown").astype(str)
+
+    X = np.zeros((len(df), len(FEATURES)))
+    for name, j in COL.items():
+        X[:, j] = df[name].fillna(0).astype(float).values
+    unit_rate = demand_rate(1.0, X)
+    ok = unit_rate > 1e-6
+
+    return {
+        "source_rows": int(len(df)),
+        "product_name": _frequencies(names),
+        "actual_price": {name: _quantiles(group) for name, group in df.groupby(names)["actual_price"]},
+        "selling_ratio": _quantiles(df["selling_price"] / df["actual_price"]),
+        "ebay_ratio": _quantiles(df["ebay_price"] / df["selling_price"]),
+        "demand_index": _quantiles(df["demand_index"].fillna(0)),
+        "user_interest": _quantiles(df["user_interest"].fillna(0)),
+        "stock": [int(df["stock"].min()), int(df["stock"].max())],
+        "day_of_week": _frequencies(df["day_of_week"].astype(int)),
+        "season": _frequencies(df["season"].astype(int)),
+        "base_sales": float(np.median(df["sales"].values[ok] / unit_rate[ok])),
+    }
+
+
+# -----------------------------
+# Generation (vectorized, one block at a time)
+# -----------------------------
+def _sample(rng, quantiles, n):
+    return np.interp(rng.random(n), np.linspace(0.0, 1.0, len(quantiles)), quantiles)
+
+def _choice(rng, freq, n):
+    return rng.choice(np.asarray(freq["values"]), size=n, p=np.asarray(freq["p"]))
+
+def generate_block(spec, n_rows, rng):
+    """
+    One block of `n_rows` products. Returns (product names, (n, 9) feature
+    matrix in pricing.FEATURES order, profit). Sales and profit follow the
+    env: Poisson sales around demand_rate and (selling - actual) * sales.
+    """
+    names = list(spec["actual_price"])
+    p = dict(zip(spec["product_name"]["values"], spec["product_name"]["p"]))
+    codes = rng.choice(len(names), size=n_rows, p=np.array([p[n] for n in names]) / sum(p[n] for n in names))
+
+    X = np.empty((n_rows, len(FEATURES)))
+    u = rng.random(n_rows)
+    grid = np.linspace(0.0, 1.0, N_QUANTILES)
+    actual = np.empty(n_rows)
+    for code, name in enumerate(names):
+        mask = codes == code
+        actual[mask] = np.interp(u[mask], grid, spec["actual_price"][name])
+    X[:, COL["actual_price"]] = np.round(actual)
+    X[:, COL["selling_price"]] = np.round(X[:, COL["actual_price"]] * _sample(rng, spec["selling_ratio"], n_rows), 2)
+    X[:, COL["ebay_price"]] = np.round(X[:, COL["selling_price"]] * _sample(rng, spec["ebay_ratio"], n_rows), 2)
+    X[:, COL["stock"]] = rng.integers(spec["stock"][0], spec["stock"][1] + 1, size=n_rows)
+    X[:, COL["demand_index"]] = _sample(rng, spec["demand_index"], n_rows)
+    X[:, COL["user_interest"]] = _sample(rng, spec["user_interest"], n_rows)
+    X[:, COL["day_of_week"]] = _choice(rng, spec["day_of_week"], n_rows)
+    X[:, COL["season"]] = _choice(rng, spec["season"], n_rows)
+    X[:, COL["sales"]] = rng.poisson(demand_rate(spec["base_sales"], X))
+
+    profit = np.round((X[:, COL["selling_price"]] - X[:, COL["actual_price"]]) * X[:, COL["sales"]], 2)
+    return np.asarray(names, dtype=object)[codes], X, profit
+
+def block_rng(seed, index):
+    """Independent stream per block, so output does not depend on the worker count."""
+    return np.random.default_rng([seed, index])
+
+def block_frame(names, X, profit):
+    df = pd.DataFrame(X, columns=FEATURES)
+    for col in ("actual_price", "stock", "day_of_week", "season", "sales"):
+        df[col] = df[col].astype(np.int64)
+    df.insert(0, "product_name", names)
+    df["profit"] = profit
+    return df[CSV_COLUMNS]
+
+
+# -----------------------------
+# Workers
+# -----------------------------
+_spec = None
+
+def _init_worker(spec):
+    global _spec
+    _spec = spec
+
+def _csv_shard(index, n_rows, seed, out_dir):
+    path = os.path.join(out_dir, f"part-{index:05d}.csv")
+    block_frame(*generate_block(_spec, n_rows, block_rng(seed, index))).to_csv(path, index=False)
+    return n_rows
+
+def _feature_block(index, n_rows, seed):
+    return generate_block(_spec, n_rows, block_rng(seed, index))[1]
+
+def _map_blocks(fn, tasks, spec, workers):
+    """Ordered results of fn over tasks, in-process or across a pool."""
+    if workers <= 1:
+        _init_worker(spec)
+        for task in tasks:
+            yield fn(*task)
+        return
+    with mp.Pool(workers, initializer=_init_worker, initargs=(spec,)) as pool:
+        yield from pool.imap(_star, [(fn, task) for task in tasks])
+
+def _star(item):
+    fn, task = item
+    return fn(*task)
+
+
+# -----------------------------
+# Catalog generation
+# -----------------------------
+def block_sizes(n_rows, chunksize):
+    return [min(chunksize, n_rows - start) for start in range(0, n_rows, chunksize)]
+
+def generate_catalog(spec, n_rows, out, fmt="csv", seed=0, chunksize=DEFAULT_CHUNKSIZE, workers=1,
+                     scaler_path=SCALER_PATH):
+    """
+    Write `n_rows` synthetic products to `out`: a directory of CSV shards
+    (one per chunk, readable by preprocess_save_scaler.py / build_dataset.py),
+    or a memory-mapped PricingDataset stem. Memory use is bounded by a few
+    blocks; the same seed and chunksize always give the same rows.
+    """
+    sizes = block_sizes(n_rows, chunksize)
+    if fmt == "csv":
+        os.makedirs(out, exist_ok=True)
+        tasks = [(i, n, seed, out) for i, n in enumerate(sizes)]
+        return sum(_map_blocks(_csv_shard, tasks, spec, workers))
+
+    meta = joblib.load(scaler_path)
+    if list(meta["features"]) != FEATURES:
+        raise ValueError(f"Scaler features {meta['features']} do not match {FEATURES}")
+    tasks = [(i, n, seed) for i, n in enumerate(sizes)]
+    with DatasetWriter(out, FEATURES, meta["scaler"].min_, meta["scaler"].scale_,
+                       source=f"generate_catalog.py seed={seed}") as writer:
+        for X in _map_blocks(_feature_block, tasks, spec, workers):
+            writer.append(X)
+    return writer.n_rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a large synthetic catalog fitted to the shipped CSV")
+    parser.add_argument("--rows", type=int, required=True, help="number of products to generate")
+    parser.add_argument("--out", required=True,
+                        help="output directory (csv) or dataset stem (dataset, writes .npy, .obs.npy, .json)")
+    parser.add_argument("--format", choices=["csv", "dataset"], default="csv")
+    parser.add_argument("--source", default=DATA_PATH, help="CSV the distributions are fitted to")
+    parser.add_argument("--spec", help="use a saved spec (JSON) instead of fitting --source")
+    parser.add_argument("--spec-out", help="also save the fitted spec to this JSON path")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE, help="rows per block / CSV shard")
+    parser.add_argument("--workers", type=int, default=1, help="processes generating blocks")
+    parser.add_argument("--scaler", default=SCALER_PATH, help="scaler for dataset observations")
+    args = parser.parse_args(argv)
+
+    if args.spec:
+        with open(args.spec) as f:
+            spec = json.load(f)
+    else:
+        spec = fit_spec(pd.read_csv(args.source))
+    if args.spec_out:
+        with open(args.spec_out, "w") as f:
+            json.dump(spec, f, indent=2)
+        print(f"✅ Saved spec to {args.spec_out}")
+
+    t0 = time.perf_counter()
+    n_rows = generate_catalog(spec, args.rows, args.out, args.format, args.seed, args.chunksize,
+                              args.workers, args.scaler)
+    elapsed = time.perf_counter() - t0
+    where = args.out if args.format == "csv" else " / ".join(dataset_paths(args.out))
+    print(f"✅ Generated {n_rows} rows -> {where} in {elapsed:.2f}s "
+          f"({n_rows / max(1e-9, elapsed):,.0f} rows/sec, {args.workers} worker(s))")
+
+if __name__ == "__main__":
+    main()
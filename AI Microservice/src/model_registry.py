@@ -0,0 +1,250 @@
+import io
+import os
+import time
+import hashlib
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+
+try:
+    from src.policy_engine import PolicyEngine
+except ImportError:  # running from inside src/
+    from policy_engine import PolicyEngine
+
+DEFAULT_VERSION = "default"
+
+
+class ModelBundle:
+    """
+    One loaded policy version. The exported .npz already carries the model
+    weights, scaler parameters and feature order, so a bundle is one file.
+    `in_flight` counts requests using it, so a replaced bundle is only freed
+    once the requests that picked it up have finished.
+    """
+
+    def __init__(self, name, path, stat, fingerprint, engine, load_s):
+        self.name = name
+        self.path = path
+        self.stat = stat  # (mtime_ns, size) seen when loaded
+        self.fingerprint = fingerprint
+        self.engine = engine
+        self.load_s = load_s
+        self.loaded_at = time.time()
+        self.in_flight = 0
+        self.retired = False
+
+    @property
+    def version(self):
+        """Name plus content hash; changes whenever the artifact does (used as cache key)."""
+        return f"{self.name}@{self.fingerprint}"
+
+    def describe(self):
+        return {
+            "name": self.name,
+            "version": self.version,
+            "path": self.path,
+            "loaded_at": self.loaded_at,
+            "load_s": round(self.load_s, 4),
+            "precision": self.engine.precision,
+            "in_flight": self.in_flight,
+        }
+
+
+def _stat(path):
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+class ModelRegistry:
+    """
+    Versioned policy bundles loaded from `registry_dir/<name>.npz`, plus the
+    legacy single artifact (`default_path`) registered as "default" unless the
+    directory provides its own default.npz.
+
+    reload() loads and warms new or changed files in the calling thread while
+    the current bundles keep serving, then swaps the name -> bundle map in one
+    assignment. Replaced bundles are retired and freed after their in-flight
+    requests drain; `on_retire(bundle)` is called at that point.
+
+    `precision` (float32 / float16 / int8) re-stores every bundle's weights
+    at load time; None keeps the precision each file was saved with.
+    """
+
+    def __init__(self, registry_dir=None, default_path=None, default_version=DEFAULT_VERSION,
+                 on_retire=None, precision=None):
+        self.registry_dir = registry_dir
+        self.default_path = default_path
+        self.default_version = default_version
+        self.on_retire = on_retire
+        self.precision = precision
+
+        self._bundles = {}
+        self._lock = threading.Lock()         # guards _bundles swaps and in-flight counts
+        self._reload_lock = threading.Lock()  # one reload at a time
+        self._failed = {}                     # name -> stat of a file that failed to load
+        self.reloads = 0
+        self.last_reload = None
+
+    # -----------------------------
+    # Discovery / loading
+    # -----------------------------
+    def discover(self):
+        """name -> path of every bundle currently on disk."""
+        found = {}
+        if self.registry_dir and os.path.isdir(self.registry_dir):
+            for entry in os.scandir(self.registry_dir):
+                if entry.is_file() and entry.name.endswith(".npz") and not entry.name.endswith(".tmp.npz"):
+                    found[entry.name[:-4]] = entry.path
+        if self.default_path and DEFAULT_VERSION not in found and os.path.exists(self.default_path):
+            found[DEFAULT_VERSION] = self.default_path
+        return found
+
+    def _load(self, name, path, stat):
+        t0 = time.perf_counter()
+        with open(path, "rb") as f:
+            data = f.read()
+        engine = PolicyEngine.load(io.BytesIO(data), self.precision)
+        engine.predict(np.zeros((1, len(engine.features))))  # warm-up pass
+        return ModelBundle(name, path, stat, hashlib.sha1(data).hexdigest()[:12], engine,
+                           time.perf_counter() - t0)
+
+    def reload(self):
+        """
+        Bring the loaded bundles in line with the files on disk. Returns a
+        report of loaded / unchanged / removed names and per-name errors.
+        A file that fails to load keeps its previous bundle serving, and the
+        default version is never unloaded because its file disappeared.
+        """
+        with self._reload_lock:
+            current = self._bundles
+            report = {"loaded": [], "unchanged": [], "removed": [], "errors": {}}
+            updated = {}
+            for name, path in sorted(self.discover().items()):
+                old = current.get(name)
+                stat = None
+                try:
+                    stat = _stat(path)
+                    if old is not None and old.path == path and old.stat == stat:
+                        updated[name] = old
+                        report["unchanged"].append(name)
+                        continue
+                    bundle = self._load(name, path, stat)
+                    self._failed.pop(name, None)
+                except Exception as e:
+                    report["errors"][name] = f"{type(e).__name__}: {e}"
+                    self._failed[name] = stat
+                    if old is not None:
+                        updated[name] = old
+                    continue
+                if old is not None and old.fingerprint == bundle.fingerprint:
+                    old.stat = stat  # touched, same content
+                    updated[name] = old
+                    report["unchanged"].append(name)
+                else:
+                    updated[name] = bundle
+                    report["loaded"].append(name)
+
+            for name, old in current.items():
+                if name not in updated:
+                    if name == self.default_version:
+                        updated[name] = old
+                        report["errors"][name] = "artifact missing; keeping the loaded default"
+                    else:
+                        report["removed"].append(name)
+
+            with self._lock:
+                self._bundles = updated
+            for name, old in current.items():
+                if updated.get(name) is not old:
+                    self._retire(old)
+
+            self.reloads += 1
+            self.last_reload = {"at": time.time(), **report}
+            return report
+
+    # -----------------------------
+    # Request-side access
+    # -----------------------------
+    def acquire(self, name=None):
+        """Pin a bundle (the default one if `name` is None). Raises KeyError if unknown."""
+        with self._lock:
+            bundle = self._bundles.get(name or self.default_version)
+            if bundle is None:
+                raise KeyError(name or self.default_version)
+            bundle.in_flight += 1
+            return bundle
+
+    def release(self, bundle):
+        with self._lock:
+            bundle.in_flight -= 1
+            drained = bundle.retired and bundle.in_flight == 0
+        if drained:
+            self._free(bundle)
+
+    @contextmanager
+    def use(self, name=None):
+        bundle = self.acquire(name)
+        try:
+            yield bundle
+        finally:
+            self.release(bundle)
+
+    def get(self, name=None):
+        """Current bundle for `name` without pinning it (None if unknown)."""
+        return self._bundles.get(name or self.default_version)
+
+    def set_default(self, name):
+        if name not in self._bundles:
+            raise KeyError(name)
+        self.default_version = name
+
+    # -----------------------------
+    # Retirement
+    # -----------------------------
+    def _retire(self, bundle):
+        with self._lock:
+            bundle.retired = True
+            drained = bundle.in_flight == 0
+        if drained:
+            self._free(bundle)
+
+    def _free(self, bundle):
+        bundle.engine = None
+        if self.on_retire is not None:
+            self.on_retire(bundle)
+
+    # -----------------------------
+    # Watching / reporting
+    # -----------------------------
+    def watch(self, interval_s, stop_event, on_reload=None):
+        """Poll the registry every `interval_s` seconds and reload on changes (blocking)."""
+        while not stop_event.wait(interval_s):
+            try:
+                changed = self._changed_on_disk()
+            except OSError:  # file replaced between scandir and stat
+                changed = True
+            if changed:
+                report = self.reload()
+                if on_reload is not None:
+                    on_reload(report)
+
+    def _changed_on_disk(self):
+        snapshot = self._bundles
+        on_disk = self.discover()
+        if any(name not in on_disk for name in snapshot if name != self.default_version):
+            return True
+        for name, path in on_disk.items():
+            stat = _stat(path)
+            if self._failed.get(name) == stat:
+                continue  # already failed to load; wait for the next write
+            bundle = snapshot.get(name)
+            if bundle is None or bundle.path != path or bundle.stat != stat:
+                return True
+        return False
+
+    def versions(self):
+        with self._lock:
+            bundles = dict(self._bundles)
+        return {name: {**b.describe(), "default": name == self.default_version}
+                for name, b in sorted(bundles.items())}
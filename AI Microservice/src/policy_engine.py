@@ -0,0 +1,136 @@
+import os
+import numpy as np
+
+ACTIVATIONS = {
+    "tanh": np.tanh,
+    "relu": lambda x: np.maximum(x, 0.0),
+}
+
+# Weight storage. float16 halves and int8 (symmetric, one scale per output
+# unit) quarters the weight memory; activations stay float32. NumPy has no
+# float16 / int8 matmul kernels, so these weights are widened inside every
+# matmul: they save memory, not time (compare_precision.py measures both).
+PRECISIONS = ("float32", "float16", "int8")
+
+
+def quantize_weights(weights, precision):
+    """float32 (in, out) matrices -> (stored matrices, per-output scales or None)."""
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown precision '{precision}' (choose from {PRECISIONS})")
+    weights = [np.ascontiguousarray(w, dtype=np.float32) for w in weights]
+    if precision == "float32":
+        return weights, None
+    if precision == "float16":
+        return [w.astype(np.float16) for w in weights], None
+    scales = [np.maximum(np.abs(w).max(axis=0), 1e-12) / 127.0 for w in weights]
+    stored = [np.clip(np.round(w / s), -127, 127).astype(np.int8) for w, s in zip(weights, scales)]
+    return stored, [s.astype(np.float32) for s in scales]
+
+
+class PolicyEngine:
+    """
+    Pure-NumPy deterministic inference for the exported PPO actor.
+    Fuses MinMax scaling, the policy MLP and action clipping, so it only needs
+    the .npz written by export_policy.py (no torch / stable-baselines3).
+    """
+
+    def __init__(self, features, scale, min_, weights, biases,
+                 action_low, action_high, activation="tanh", precision="float32"):
+        self.features = list(features)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.min = np.asarray(min_, dtype=np.float64)
+        # Weights are stored as (in, out) so a forward pass is `h @ W + b`
+        # (`(h @ Q) * s + b` for int8)
+        self.precision = precision
+        self.weights, self.scales = quantize_weights(weights, precision)
+        self.biases = [np.asarray(b, dtype=np.float32) for b in biases]
+        self.action_low = np.asarray(action_low, dtype=np.float32)
+        self.action_high = np.asarray(action_high, dtype=np.float32)
+        self.activation = activation
+        self._act = ACTIVATIONS[activation]
+
+    @classmethod
+    def load(cls, path, precision=None):
+        """Load an exported policy; `precision` re-stores its weights (default: as saved)."""
+        with np.load(path, allow_pickle=False) as z:
+            n_layers = int(z["n_layers"])
+            saved = str(z["precision"]) if "precision" in z else "float32"
+            weights = [z[f"W{i}"].astype(np.float32) for i in range(n_layers)]
+            if saved == "int8":
+                weights = [w * z[f"S{i}"] for i, w in enumerate(weights)]
+            return cls(
+                features=[str(f) for f in z["features"]],
+                scale=z["scale"],
+                min_=z["min"],
+                weights=weights,
+                biases=[z[f"b{i}"] for i in range(n_layers)],
+                action_low=z["action_low"],
+                action_high=z["action_high"],
+                activation=str(z["activation"]),
+                precision=precision or saved,
+            )
+
+    def float_weights(self):
+        """The weights as float32 (in, out) matrices, dequantized if needed."""
+        if self.scales is None:
+            return [w.astype(np.float32) for w in self.weights]
+        return [w.astype(np.float32) * s for w, s in zip(self.weights, self.scales)]
+
+    def with_precision(self, precision):
+        """A copy of this engine with its weights stored at `precision`."""
+        return PolicyEngine(self.features, self.scale, self.min, self.float_weights(), self.biases,
+                            self.action_low, self.action_high, self.activation, precision)
+
+    @property
+    def weight_bytes(self):
+        """Memory held by the network parameters (weights, biases, int8 scales)."""
+        arrays = self.weights + self.biases + (self.scales or [])
+        return sum(a.nbytes for a in arrays)
+
+    def save(self, path):
+        arrays = {
+            "features": np.array(self.features),
+            "scale": self.scale,
+            "min": self.min,
+            "action_low": self.action_low,
+            "action_high": self.action_high,
+            "activation": np.array(self.activation),
+            "n_layers": np.array(len(self.weights)),
+        }
+        for i, (w, b) in enumerate(zip(self.weights, self.biases)):
+            arrays[f"W{i}"] = w
+            arrays[f"b{i}"] = b
+        if self.precision != "float32":
+            arrays["precision"] = np.array(self.precision)
+            for i, s in enumerate(self.scales or []):
+                arrays[f"S{i}"] = s
+        # Write next to the target and rename, so a running service watching
+        # the models directory never reads a half-written file
+        path = path if path.endswith(".npz") else path + ".npz"
+        tmp = path[:-4] + ".tmp.npz"
+        np.savez(tmp, **arrays)
+        os.replace(tmp, path)
+
+    def transform(self, X):
+        """MinMax-scale raw features, same arithmetic as MinMaxScaler.transform."""
+        X = np.array(X, dtype=np.float64, ndmin=2)
+        X *= self.scale
+        X += self.min
+        return X.astype(np.float32)
+
+    def forward(self, obs, clip=True):
+        """Deterministic action (mean of the Gaussian) for scaled observations."""
+        h = np.asarray(obs, dtype=np.float32)
+        last = len(self.weights) - 1
+        for i, (w, b) in enumerate(zip(self.weights, self.biases)):
+            h = h @ w
+            if self.scales is not None:
+                h *= self.scales[i]
+            h += b
+            if i < last:
+                h = self._act(h)
+        return np.clip(h, self.action_low, self.action_high) if clip else h
+
+    def predict(self, X):
+        """Raw (N, n_features) feature matrix -> clipped (N, action_dim) actions."""
+        return self.forward(self.transform(X))
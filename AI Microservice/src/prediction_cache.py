@@ -0,0 +1,122 @@
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+try:
+    from src.pricing import COL, FEATURES
+except ImportError:  # running from inside src/
+    from pricing import COL, FEATURES
+
+PRICE_FEATURES = ("actual_price", "selling_price", "ebay_price")
+INDEX_FEATURES = ("demand_index", "user_interest")
+
+
+class PredictionCache:
+    """
+    Bounded LRU + TTL cache of prediction responses keyed on Product features
+    (plus the pricing-rule category code, which can change the response).
+
+    Keys are the exact features by default. With `quantize` on (opt-in),
+    prices are rounded to `price_step` and the demand / interest indices to
+    `index_step` before lookup, and callers should predict on the quantized
+    row so a cached response only depends on its key.
+    Keys include the model version (name + artifact fingerprint), so several
+    versions can be served side by side; retain_versions() drops the entries
+    of versions that are no longer loaded.
+    """
+
+    def __init__(self, max_entries=10_000, ttl_s=300.0, quantize=False,
+                 price_step=0.01, index_step=1e-4):
+        self.max_entries = int(max_entries)
+        self.ttl_s = float(ttl_s)
+        self.quantize_enabled = quantize
+
+        # Quantize as round(x * k) / k with integer k so inputs already on the
+        # grid (e.g. prices in cents) come back bit-for-bit unchanged
+        self._inv_steps = np.ones(len(FEATURES))
+        for name in PRICE_FEATURES:
+            self._inv_steps[COL[name]] = round(1.0 / price_step)
+        for name in INDEX_FEATURES:
+            self._inv_steps[COL[name]] = round(1.0 / index_step)
+        self._quantized = self._inv_steps != 1.0
+
+        self._entries = OrderedDict()
+        self._live = None  # versions allowed to add entries (None: any)
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def quantize(self, X):
+        """Round the quantized columns of an (N, n_features) matrix (returns a copy)."""
+        X = np.array(X, dtype=np.float64)
+        if self.quantize_enabled:
+            q = self._quantized
+            X[:, q] = np.round(X[:, q] * self._inv_steps[q]) / self._inv_steps[q]
+        return X
+
+    def retain_versions(self, versions):
+        """Drop entries of every version not in `versions` and refuse new ones for them."""
+        live = set(versions)
+        with self._lock:
+            self._live = live
+            stale = [key for key in self._entries if key[0] not in live]
+            for key in stale:
+                del self._entries[key]
+            if stale:
+                self.invalidations += 1
+
+    def get(self, row, version, category=0):
+        key = (version, category, *row.tolist())
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at < now:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, row, version, value, category=0):
+        key = (version, category, *row.tolist())
+        with self._lock:
+            if self._live is not None and version not in self._live:
+                # computed by a model that has since been replaced
+                return
+            self._entries[key] = (time.monotonic() + self.ttl_s, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_s": self.ttl_s,
+            "quantize": self.quantize_enabled,
+            "model_versions": sorted(self._live) if self._live is not None else None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
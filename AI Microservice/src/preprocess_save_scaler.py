@@ -1,7 +1,15 @@
+import os
+import glob
+import time
+import argparse
 import pandas as pd
 from sklearn.preprocessing import MinMaxScaler
 import joblib
-import os
+
+try:
+    from src.feature_store import NpyStreamWriter
+except ImportError:  # running from inside src/
+    from feature_store import NpyStreamWriter
 
 # -----------------------------
 # Project paths (absolute)
@@ -13,41 +21,89 @@ MODELS_DIR = os.path.join(PROJECT_ROOT, "models")
 DATA_PATH = os.path.join(DATA_DIR, "synthetic_ecommerce_data.csv")
 SCALER_PATH = os.path.join(MODELS_DIR, "scaler.pkl")
 
-os.makedirs(DATA_DIR, exist_ok=True)
-os.makedirs(MODELS_DIR, exist_ok=True)
-
-# -----------------------------
-# Load and preprocess data
-# -----------------------------
-df = pd.read_csv(DATA_PATH)
-
 # Ensure required columns exist
 expected_cols = [
     "actual_price", "selling_price", "ebay_price", "stock",
     "demand_index", "user_interest", "sales", "day_of_week", "season"
 ]
-for col in expected_cols:
-    if col not in df.columns:
-        df[col] = 0 if col not in ["day_of_week", "season"] else 0
-
-# Fix missing values
-df[[
+# Columns whose missing values are filled with 0
+fill_cols = [
     "actual_price", "selling_price", "ebay_price",
     "stock", "demand_index", "user_interest", "sales"
-]] = df[[
-    "actual_price", "selling_price", "ebay_price",
-    "stock", "demand_index", "user_interest", "sales"
-]].fillna(0)
+]
+features = expected_cols  # feature order consistency
+
+DEFAULT_CHUNKSIZE = 200_000
+
+
+# -----------------------------
+# Streaming input
+# -----------------------------
+def list_input_files(path):
+    """A single CSV, or every *.csv shard in a directory (sorted by name)."""
+    if os.path.isdir(path):
+        files = sorted(glob.glob(os.path.join(path, "*.csv")))
+        if not files:
+            raise FileNotFoundError(f"No .csv shards found in {path}")
+        return files
+    return [path]
+
+def iter_clean_chunks(path, chunksize=DEFAULT_CHUNKSIZE):
+    """Yield cleaned (rows, 9) float64 feature blocks, reading at most `chunksize` rows at a time."""
+    for file in list_input_files(path):
+        reader = pd.read_csv(file, chunksize=chunksize, usecols=lambda c: c in expected_cols)
+        for df in reader:
+            for col in expected_cols:
+                if col not in df.columns:
+                    df[col] = 0
+            df[fill_cols] = df[fill_cols].fillna(0)
+            yield df[features].astype(float).values
 
 # -----------------------------
 # Fit scaler
 # -----------------------------
-features = expected_cols  # feature order consistency
-X = df[features].astype(float).values
+def fit_scaler(path, chunksize=DEFAULT_CHUNKSIZE, features_out=None):
+    """
+    Fit the MinMaxScaler incrementally (partial_fit per chunk). If `features_out`
+    is given, the cleaned raw feature matrix is also streamed to that .npy file
+    as float32. Returns (scaler, n_rows).
+    """
+    scaler = MinMaxScaler(feature_range=(0.0, 1.0))
+    writer = NpyStreamWriter(features_out, len(features)) if features_out else None
+    n_rows = 0
+    try:
+        for X in iter_clean_chunks(path, chunksize):
+            scaler.partial_fit(X)
+            if writer is not None:
+                writer.append(X)
+            n_rows += len(X)
+    finally:
+        if writer is not None:
+            writer.close()
+    if n_rows == 0:
+        raise ValueError(f"No rows found in {path}")
+    return scaler, n_rows
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fit and save the feature scaler")
+    parser.add_argument("--input", default=DATA_PATH, help="CSV file or directory of CSV shards")
+    parser.add_argument("--scaler-out", default=SCALER_PATH)
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE, help="rows read per chunk")
+    parser.add_argument("--features-out", default=None,
+                        help="optional .npy path for the cleaned float32 feature matrix")
+    args = parser.parse_args(argv)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.scaler_out)), exist_ok=True)
+
+    t0 = time.perf_counter()
+    scaler, n_rows = fit_scaler(args.input, args.chunksize, args.features_out)
+    elapsed = time.perf_counter() - t0
 
-scaler = MinMaxScaler(feature_range=(0.0, 1.0))
-scaler.fit(X)
+    # Save scaler
+    joblib.dump({"scaler": scaler, "features": features}, args.scaler_out)
+    print(f"✅ Saved scaler to {args.scaler_out} ({n_rows} rows in {elapsed:.2f}s)")
+    if args.features_out:
+        print(f"✅ Saved cleaned features to {args.features_out}")
 
-# Save scaler
-joblib.dump({"scaler": scaler, "features": features}, SCALER_PATH)
-print(f"✅ Saved scaler to {SCALER_PATH}")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+import time
+import numpy as np
+
+try:
+    from src.rule_engine import load_rules
+except ImportError:  # running from inside src/
+    from rule_engine import load_rules
+
+# -----------------------------
+# Feature layout (matches scaler.pkl)
+# -----------------------------
+FEATURES = [
+    "actual_price", "selling_price", "ebay_price", "stock",
+    "demand_index", "user_interest", "sales", "day_of_week", "season"
+]
+COL = {name: i for i, name in enumerate(FEATURES)}
+
+ELASTICITY = 3.0
+
+# Env parameters used for training and evaluation
+ENV_KWARGS = dict(elasticity=ELASTICITY, holding_cost_per_unit=0.5, min_margin=0.02)
+
+# Env action space (percent price change), as float32 bounds read back from the Box
+ACTION_LOW, ACTION_HIGH = float(np.float32(-0.3)), float(np.float32(0.3))
+
+# Business rules, compiled from config/pricing_rules.json (PRICING_RULES_PATH overrides).
+# RULE_NAMES is in cascade order with "none" first; the last rule that fires wins.
+RULES = load_rules(FEATURES)
+RULE_NAMES = RULES.rule_names
+
+
+def products_to_matrix(products):
+    """Stack objects exposing the feature attributes into an (N, 9) float64 matrix."""
+    return np.array(
+        [[getattr(p, name) for name in FEATURES] for p in products],
+        dtype=np.float64,
+    ).reshape(-1, len(FEATURES))
+
+
+# -----------------------------
+# Sales & profit estimation (vectorized)
+# -----------------------------
+def estimate_sales_profit(prices, X, elasticity=ELASTICITY):
+    """
+    Expected sales and profit at `prices`, relative to each row's selling_price.
+    `elasticity` is a scalar or one value per row (see elasticity_index.py).
+    """
+    selling = X[:, COL["selling_price"]]
+    demand_factor = np.maximum(
+        0.0, 0.6 * X[:, COL["demand_index"]] + 0.4 * X[:, COL["user_interest"]]
+    )
+    price_ratio = prices / np.maximum(1e-6, selling)
+    expected_sales = X[:, COL["sales"]] * demand_factor * np.exp(-elasticity * (price_ratio - 1.0))
+    expected_sales = np.maximum(0.0, expected_sales)
+    est_profit = (prices - X[:, COL["actual_price"]]) * expected_sales
+    return expected_sales, est_profit
+
+
+# -----------------------------
+# Full pricing pass (policy + rules + estimation)
+# -----------------------------
+def round_prices(prices, digits=2):
+    """Python's round() (not np.round) so batch results match the scalar path exactly."""
+    return np.array([round(v, digits) for v in np.asarray(prices).tolist()], dtype=np.float64)
+
+
+# Fields of a /predict response, in order
+RESPONSE_FIELDS = (
+    "action_adjustment", "predicted_price_pre_rule", "predicted_price",
+    "rule_applied", "rules_fired", "expected_sales_estimate", "estimated_profit",
+)
+
+
+def price_products(engine, X, timings=None, categories=None, elasticity=ELASTICITY):
+    """
+    Scaling, policy, pricing rules and sales/profit estimation for an (N, 9)
+    raw feature matrix in one pass. `engine` is a PolicyEngine, `categories`
+    optional rule category codes, `elasticity` a scalar or (N,) array for the
+    estimates (prices do not depend on it). Returns (N,) arrays; only `predicted_price`
+    is rounded (the estimates depend on it), `rules_fired` is a bitmask.
+    If `timings` is a dict, the seconds spent in each stage ("obs",
+    "inference", "rules", "estimate") are written into it.
+    """
+    t0 = time.perf_counter()
+    obs = engine.transform(X)
+    t1 = time.perf_counter()
+    adjustments = engine.forward(obs)[:, 0].astype(np.float64)
+    t2 = time.perf_counter()
+    pre_rule = X[:, COL["selling_price"]] * (1.0 + adjustments)
+    adjusted, rules, fired = RULES.apply(pre_rule, X, categories)
+    prices = round_prices(adjusted)
+    t3 = time.perf_counter()
+    expected_sales, est_profit = estimate_sales_profit(prices, X, elasticity)
+    if timings is not None:
+        timings["obs"] = t1 - t0
+        timings["inference"] = t2 - t1
+        timings["rules"] = t3 - t2
+        timings["estimate"] = time.perf_counter() - t3
+    return {
+        "action_adjustment": adjustments,
+        "predicted_price_pre_rule": pre_rule,
+        "predicted_price": prices,
+        "rule_applied": rules,
+        "rules_fired": fired,
+        "expected_sales_estimate": expected_sales,
+        "estimated_profit": est_profit,
+    }
+
+
+# -----------------------------
+# Environment reward model (vectorized ArrayPricingEnv.step)
+# -----------------------------
+def simulate_pricing_step(adjustment, X, elasticity=ELASTICITY, holding_cost_per_unit=0.5,
+                          min_margin=0.01, max_price=None):
+    """
+    Price update, demand, profit and penalties of ArrayPricingEnv.step
+    (vec_pricing_env.py) for every row of X at once. `adjustment` must
+    already be clipped to the action space; `elasticity` may be one value
+    per row. Returns a dict of (N,) arrays
+    keyed like the env's info dict, plus "reward".
+    """
+    adjustment = np.asarray(adjustment, dtype=np.float64)
+    actual = X[:, COL["actual_price"]]
+    selling = X[:, COL["selling_price"]]
+
+    old_price = np.where(selling > 0, selling, np.maximum(1.0, actual * (1 + min_margin)))
+    new_price = old_price * (1.0 + adjustment)
+
+    min_allowed = np.maximum(actual * (1.0 + min_margin), 0.01)
+    new_price = np.where(new_price < min_allowed, min_allowed, new_price)
+    if max_price is not None:
+        new_price = np.minimum(new_price, max_price)
+
+    demand_factor = np.maximum(
+        0.0, 0.6 * X[:, COL["demand_index"]] + 0.4 * X[:, COL["user_interest"]]
+    )
+    price_ratio = new_price / np.maximum(1e-6, old_price)
+    expected_sales = X[:, COL["sales"]] * demand_factor * np.exp(-elasticity * (price_ratio - 1.0))
+    expected_sales = np.maximum(0.0, expected_sales)
+
+    profit = (new_price - actual) * expected_sales
+    competitor_gap = np.maximum(0.0, new_price - X[:, COL["ebay_price"]])
+    competitor_penalty = competitor_gap * 0.01 * expected_sales
+    leftover = np.maximum(0.0, X[:, COL["stock"]] - expected_sales)
+    holding_penalty = leftover * holding_cost_per_unit
+
+    return {
+        "adjustment": adjustment,
+        "predicted_sales": expected_sales,
+        "profit": profit,
+        "competitor_penalty": competitor_penalty,
+        "holding_penalty": holding_penalty,
+        "new_price": new_price,
+        "reward": (profit - competitor_penalty - holding_penalty) / 1000.0,
+    }
+
+
+# -----------------------------
+# Price-response curve (what-if sweep for one product)
+# -----------------------------
+CURVE_FIELDS = (
+    "adjustment", "candidate_price", "env_price", "predicted_sales", "profit",
+    "competitor_penalty", "holding_penalty", "reward",
+    "final_price", "rule_applied", "rules_fired", "expected_sales_estimate", "estimated_profit",
+)
+
+
+def price_response_curve(x, adjustments=None, prices=None, elasticity=ELASTICITY, category=0):
+    """
+    Evaluate one product (a 9-feature row) at every point of a price grid in
+    one vectorized pass. The grid is either `adjustments` (fractions of
+    selling_price, like the env action) or absolute candidate `prices`.
+
+    For each point this returns both views of the price:
+    - env view (simulate_pricing_step): env_price, predicted_sales, profit,
+      penalties and reward, as ArrayPricingEnv.step would score it;
+    - service view: the candidate run through the pricing rules, rounded to
+      cents, with expected sales / profit at that final price (as /predict).
+    Prices are rounded with np.round here, which can differ from /predict's
+    round() by a cent on exact ties. `category` is a rule category code.
+    """
+    x = np.asarray(x, dtype=np.float64).reshape(len(FEATURES))
+    selling = x[COL["selling_price"]]
+    if prices is not None:
+        candidate = np.asarray(prices, dtype=np.float64).ravel()
+        adjustments = candidate / max(1e-6, selling) - 1.0
+    else:
+        adjustments = np.asarray(adjustments, dtype=np.float64).ravel()
+        candidate = selling * (1.0 + adjustments)
+
+    X = np.broadcast_to(x, (len(adjustments), len(FEATURES)))
+    env = simulate_pricing_step(adjustments, X, elasticity)
+    final, rules, fired = RULES.apply(candidate, X, np.full(len(candidate), category, dtype=np.int16))
+    final = np.round(final, 2)
+    expected_sales, est_profit = estimate_sales_profit(final, X, elasticity)
+
+    return {
+        "adjustment": adjustments,
+        "candidate_price": candidate,
+        "env_price": env["new_price"],
+        "predicted_sales": env["predicted_sales"],
+        "profit": env["profit"],
+        "competitor_penalty": env["competitor_penalty"],
+        "holding_penalty": env["holding_penalty"],
+        "reward": env["reward"],
+        "final_price": final,
+        "rule_applied": rules,
+        "rules_fired": fired,
+        "expected_sales_estimate": expected_sales,
+        "estimated_profit": est_profit,
+    }
@@ -0,0 +1,232 @@
+import os
+import json
+import operator
+import numpy as np
+
+# -----------------------------
+# Paths (absolute)
+# -----------------------------
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+RULES_PATH = os.path.join(PROJECT_ROOT, "config", "pricing_rules.json")
+
+ARITHMETIC = {"+": operator.add, "-": operator.sub, "*": operator.mul, "/": operator.truediv}
+COMPARISONS = {">": operator.gt, ">=": operator.ge, "<": operator.lt, "<=": operator.le,
+               "==": operator.eq, "!=": operator.ne}
+MAX_RULES = 62  # rules_fired is an int64 bitmask (bit i = rule i)
+
+
+# -----------------------------
+# Expression compiler
+# -----------------------------
+# Every compiled expression is a function (x, price, params) -> value, where
+# x is an (N, n_features) matrix and price an (N,) array in vector mode, or a
+# feature list and a float in scalar mode. The arithmetic is the same IEEE
+# float64 math either way, so both paths give bit-identical prices.
+def _compile_expr(expr, col, param_names, vector, where):
+    if isinstance(expr, bool):
+        raise ValueError(f"{where}: booleans are not valid expressions")
+    if isinstance(expr, (int, float)):
+        value = float(expr)
+        return lambda x, price, p: value
+    if isinstance(expr, str):
+        if expr == "price":
+            return lambda x, price, p: price
+        if expr.startswith("$"):
+            name = expr[1:]
+            if name not in param_names:
+                raise ValueError(f"{where}: unknown param {expr}")
+            return lambda x, price, p: p[name]
+        if expr in col:
+            j = col[expr]
+            if vector:
+                return lambda x, price, p: x[:, j]
+            return lambda x, price, p: x[j]
+        raise ValueError(f"{where}: unknown feature '{expr}'")
+    if isinstance(expr, list) and len(expr) >= 3:
+        op, args = expr[0], [_compile_expr(a, col, param_names, vector, where) for a in expr[1:]]
+        if op in ARITHMETIC and len(args) == 2:
+            f, a, b = ARITHMETIC[op], args[0], args[1]
+            return lambda x, price, p: f(a(x, price, p), b(x, price, p))
+        if op in ("min", "max"):
+            if vector:
+                f = np.minimum if op == "min" else np.maximum
+            else:
+                f = min if op == "min" else max
+            first, rest = args[0], args[1:]
+
+            def fold(x, price, p):
+                value = first(x, price, p)
+                for g in rest:
+                    value = f(value, g(x, price, p))
+                return value
+            return fold
+    raise ValueError(f"{where}: cannot parse expression {expr!r}")
+
+def _compile_clause(clause, col, param_names, vector, where):
+    if not (isinstance(clause, list) and len(clause) == 3 and clause[0] in COMPARISONS):
+        raise ValueError(f"{where}: clauses look like [cmp, a, b], got {clause!r}")
+    f = COMPARISONS[clause[0]]
+    a = _compile_expr(clause[1], col, param_names, vector, where)
+    b = _compile_expr(clause[2], col, param_names, vector, where)
+    return lambda x, price, p: f(a(x, price, p), b(x, price, p))
+
+
+class CompiledRule:
+    """One rule compiled for both paths, with its params resolved per category."""
+
+    def __init__(self, spec, col, categories, overrides):
+        self.name = spec["name"]
+        self.priority = spec.get("priority", 0)
+        defaults = {k: float(v) for k, v in spec.get("params", {}).items()}
+        where = f"rule '{self.name}'"
+
+        clauses = spec.get("when", [])
+        self._when_v = [_compile_clause(c, col, defaults, True, where) for c in clauses]
+        self._when_s = [_compile_clause(c, col, defaults, False, where) for c in clauses]
+        self._then_v = _compile_expr(spec["then"], col, defaults, True, where)
+        self._then_s = _compile_expr(spec["then"], col, defaults, False, where)
+
+        # Per-category params / enabled flags; index 0 is the default
+        self.params = []
+        self.enabled = np.ones(len(categories), dtype=bool)
+        for i, category in enumerate(categories):
+            params = dict(defaults)
+            enabled = spec.get("enabled", True)
+            override = overrides.get(category, {}).get(self.name, {}) if i else {}
+            for k, v in override.items():
+                if k == "enabled":
+                    enabled = bool(v)
+                elif k in params:
+                    params[k] = float(v)
+                else:
+                    raise ValueError(f"{where}: category '{category}' overrides unknown param '{k}'")
+            self.params.append(params)
+            self.enabled[i] = enabled
+        self.param_table = {k: np.array([p[k] for p in self.params]) for k in defaults}
+
+    def mask(self, x, price, p):
+        mask = None
+        for clause in self._when_v:
+            m = clause(x, price, p)
+            mask = m if mask is None else mask & m
+        if np.ndim(mask) == 0:  # no clauses, or none that depends on the row
+            mask = np.full(len(price), True if mask is None else bool(mask))
+        return mask
+
+    def then(self, x, price, p):
+        return self._then_v(x, price, p)
+
+    def fires(self, row, price, p):
+        for clause in self._when_s:
+            if not clause(row, price, p):
+                return False
+        return True
+
+    def then_scalar(self, row, price, p):
+        return self._then_s(row, price, p)
+
+
+class RuleSet:
+    """
+    Pricing rules compiled from a config dict (see config/pricing_rules.json).
+    Rules run in ascending priority; each one that fires replaces the price
+    and sets its bit in `rules_fired`, and the last one to fire is reported
+    as the rule applied (index into `rule_names`, 0 = "none").
+    """
+
+    def __init__(self, config, features):
+        col = {name: i for i, name in enumerate(features)}
+        specs = sorted(config.get("rules", []), key=lambda r: r.get("priority", 0))
+        if len(specs) > MAX_RULES:
+            raise ValueError(f"At most {MAX_RULES} rules are supported")
+        names = [r["name"] for r in specs]
+        if len(set(names)) != len(names):
+            raise ValueError("Rule names must be unique")
+
+        overrides = {str(c).lower(): o for c, o in config.get("categories", {}).items()}
+        for category, rules in overrides.items():
+            unknown = set(rules) - set(names)
+            if unknown:
+                raise ValueError(f"Category '{category}' overrides unknown rules {sorted(unknown)}")
+        self.categories = ["default"] + sorted(overrides)
+        self._codes = {c: i for i, c in enumerate(self.categories) if i}
+
+        self.rules = [CompiledRule(spec, col, self.categories, overrides) for spec in specs]
+        self.rule_names = np.array(["none"] + names)
+        self._fired_names = {}
+
+    # -----------------------------
+    # Categories
+    # -----------------------------
+    def category_code(self, category):
+        """Index into the per-category tables; unknown or missing categories use the defaults."""
+        return self._codes.get(category.strip().lower(), 0) if category else 0
+
+    def category_codes(self, categories):
+        return np.array([self.category_code(c) for c in categories], dtype=np.int16)
+
+    # -----------------------------
+    # Evaluation
+    # -----------------------------
+    def apply(self, prices, X, categories=None):
+        """
+        Vectorized evaluation over an (N, n_features) matrix. `categories` is
+        an optional (N,) array of category codes. Returns (unrounded adjusted
+        prices, last rule index int8, rules_fired int64 bitmask).
+        """
+        adjusted = np.array(prices, dtype=np.float64).reshape(-1)
+        if len(adjusted) == 1:
+            code = 0 if categories is None else int(np.asarray(categories).reshape(-1)[0])
+            price, rule, fired = self.apply_one(float(adjusted[0]), X[0].tolist(), code)
+            return (np.array([price]), np.array([rule], dtype=np.int8),
+                    np.array([fired], dtype=np.int64))
+
+        rule = np.zeros(adjusted.shape, dtype=np.int8)
+        fired = np.zeros(adjusted.shape, dtype=np.int64)
+        codes = None if categories is None else np.asarray(categories)
+        if codes is not None and not codes.any():
+            codes = None  # every row uses the defaults
+
+        for i, r in enumerate(self.rules, start=1):
+            if codes is None:
+                if not r.enabled[0]:
+                    continue
+                p = r.params[0]
+            else:
+                p = {k: v[codes] for k, v in r.param_table.items()}
+            mask = r.mask(X, adjusted, p)
+            if codes is not None:
+                mask &= r.enabled[codes]
+            adjusted = np.where(mask, r.then(X, adjusted, p), adjusted)
+            # np.where / shifts instead of boolean-index assignment: several x faster
+            rule = np.where(mask, np.int8(i), rule)
+            fired |= mask.astype(np.int64) << i
+        return adjusted, rule, fired
+
+    def apply_one(self, price, row, category=0):
+        """Scalar path for one product: `row` is a feature list, `category` a code."""
+        rule = fired = 0
+        for i, r in enumerate(self.rules, start=1):
+            if not r.enabled[category]:
+                continue
+            p = r.params[category]
+            if r.fires(row, price, p):
+                price = r.then_scalar(row, price, p)
+                rule = i
+                fired |= 1 << i
+        return price, rule, fired
+
+    def fired_names(self, fired):
+        """rules_fired bitmask -> rule names, in firing order."""
+        names = self._fired_names.get(fired)
+        if names is None:
+            names = [str(n) for i, n in enumerate(self.rule_names) if i and fired >> i & 1]
+            self._fired_names[fired] = names
+        return names
+
+
+def load_rules(features, path=None):
+    """Compile the rule config at `path` (PRICING_RULES_PATH or config/pricing_rules.json)."""
+    path = path or os.environ.get("PRICING_RULES_PATH", RULES_PATH)
+    with open(path) as f:
+        return RuleSet(json.load(f), features)
@@ -0,0 +1,254 @@
+import os
+import gc
+import sys
+import time
+import signal
+import socket
+import argparse
+import uvicorn
+
+try:
+    from src.metrics import process_memory
+except ImportError:  # running from inside src/
+    from metrics import process_memory
+
+# -----------------------------
+# Preforked serving
+# -----------------------------
+# `uvicorn --workers N` spawns fresh interpreters, so every worker re-imports
+# numpy / FastAPI and loads its own copy of every model bundle. Here the
+# master imports the app and loads the models once, then forks the workers:
+# they share those pages copy-on-write and only pay for what they touch
+# afterwards (request state, caches, batchers). gc.freeze() before fork keeps
+# the cyclic GC from writing to (and so un-sharing) the preloaded objects.
+#
+# All workers accept on one listening socket bound by the master. The master
+# only supervises: it restarts workers that die, logs per-worker memory, and
+# on SIGHUP reloads the models and replaces the workers, so new weights are
+# shared again (a worker's own MODEL_WATCH_INTERVAL_S reloads are private).
+
+# Read by the BLAS / OpenMP runtimes when numpy is first imported
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS",
+                   "VECLIB_MAXIMUM_THREADS", "NUMEXPR_NUM_THREADS")
+
+RESPAWN_DELAY_S = 1.0  # minimum time between restarts of a crashing worker slot
+STOP_TIMEOUT_S = 30.0  # graceful shutdown before workers are killed
+
+
+def limit_threads(n, override=False):
+    """
+    Cap the math-library thread pools of every worker. Must run before numpy
+    is imported; N workers x all-cores thread pools oversubscribe the box.
+    Variables the operator already set are kept unless `override`.
+    """
+    for name in THREAD_ENV_VARS:
+        if override:
+            os.environ[name] = str(n)
+        else:
+            os.environ.setdefault(name, str(n))
+
+def _import_service():
+    try:
+        from src import app_fastapi
+    except ImportError:  # running from inside src/
+        import app_fastapi
+    return app_fastapi
+
+def bind_socket(host, port, backlog=2048):
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+# -----------------------------
+# Memory report
+# -----------------------------
+def memory_report(processes):
+    """
+    One row per (label, pid): rss counts shared pages in full for every
+    process, pss splits them, uss is private. The sum of pss is what the
+    master and workers really use together.
+    """
+    rows = []
+    for label, pid in processes:
+        memory = process_memory(pid)
+        if memory is not None:
+            rows.append({"process": label, "pid": pid, **memory})
+    return rows
+
+def print_memory_report(rows):
+    if not rows:
+        print("⚠️ Per-process memory needs /proc/<pid>/smaps_rollup (Linux)")
+        return
+    mb = 1024 * 1024
+    print(f"{'process':<10} {'pid':>8} {'rss_mb':>9} {'pss_mb':>9} {'uss_mb':>9} {'shared_mb':>10}")
+    for r in rows:
+        print(f"{r['process']:<10} {r['pid']:>8} {r['rss'] / mb:>9.1f} {r['pss'] / mb:>9.1f} "
+              f"{r['uss'] / mb:>9.1f} {r['shared'] / mb:>10.1f}")
+    total_rss = sum(r["rss"] for r in rows)
+    total_pss = sum(r["pss"] for r in rows)
+    print(f"✅ Total pss {total_pss / mb:.1f} MB for {len(rows)} processes "
+          f"(rss sum {total_rss / mb:.1f} MB; {(total_rss - total_pss) / mb:.1f} MB shared)", flush=True)
+
+
+# -----------------------------
+# Master
+# -----------------------------
+class PreforkServer:
+    def __init__(self, service, sock, workers, memory_interval_s=60.0, log_level="info"):
+        self.service = service
+        self.sock = sock
+        self.n_workers = workers
+        self.memory_interval_s = memory_interval_s
+        # Loaded here so the protocol/lifespan modules are imported once, before fork
+        self.config = uvicorn.Config(service.app, log_level=log_level, lifespan="on")
+        self.config.load()
+        self.workers = {}   # pid -> slot
+        self.started = {}   # slot -> spawn time
+        self.stopping = False
+        self.reload_requested = False
+        self.report_requested = False
+
+    # --- workers ---
+    def spawn(self, slot):
+        gc.freeze()  # move everything allocated so far out of the GC's reach
+        pid = os.fork()
+        if pid == 0:
+            self._run_worker(slot)
+        self.workers[pid] = slot
+        self.started[slot] = time.monotonic()
+        return pid
+
+    def _run_worker(self, slot):
+        for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP, signal.SIGUSR1):
+            signal.signal(sig, signal.SIG_DFL)
+        code = 0
+        try:
+            uvicorn.Server(self.config).run(sockets=[self.sock])
+        except BaseException as e:
+            print(f"❌ Worker {slot} (pid {os.getpid()}) failed: {type(e).__name__}: {e}", flush=True)
+            code = 1
+        finally:
+            sys.stdout.flush()
+            os._exit(code)
+
+    def reap(self):
+        """Collect exited workers; restart them unless shutting down."""
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            slot = self.workers.pop(pid, None)
+            if slot is None or self.stopping:
+                continue
+            print(f"⚠️ Worker {slot} (pid {pid}) exited with status {os.waitstatus_to_exitcode(status)}; "
+                  f"restarting", flush=True)
+            wait = self.started[slot] + RESPAWN_DELAY_S - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            self.spawn(slot)
+
+    def reload(self):
+        """Reload the models in the master, start fresh workers, then retire the old ones."""
+        print("✅ SIGHUP: reloading models and replacing workers", flush=True)
+        self.service.load_model()
+        old = list(self.workers)
+        for slot in range(self.n_workers):
+            self.spawn(slot)
+        for pid in old:
+            self.workers.pop(pid, None)
+            self._signal(pid, signal.SIGTERM)
+
+    def _signal(self, pid, sig):
+        try:
+            os.kill(pid, sig)
+        except ProcessLookupError:
+            pass
+
+    def stop(self):
+        self.stopping = True
+        for pid in self.workers:
+            self._signal(pid, signal.SIGTERM)
+        deadline = time.monotonic() + STOP_TIMEOUT_S
+        while time.monotonic() < deadline:
+            try:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                time.sleep(0.1)
+            else:
+                self.workers.pop(pid, None)
+        for pid in self.workers:
+            self._signal(pid, signal.SIGKILL)
+
+    # --- main loop ---
+    def processes(self):
+        return [("master", os.getpid())] + sorted(
+            ((f"worker-{slot}", pid) for pid, slot in self.workers.items()), key=lambda p: p[0])
+
+    def run(self):
+        def request(attr):
+            return lambda signum, frame: setattr(self, attr, True)
+
+        signal.signal(signal.SIGTERM, request("stopping"))
+        signal.signal(signal.SIGINT, request("stopping"))
+        signal.signal(signal.SIGHUP, request("reload_requested"))
+        signal.signal(signal.SIGUSR1, request("report_requested"))
+
+        host, port = self.sock.getsockname()[:2]
+        for slot in range(self.n_workers):
+            self.spawn(slot)
+        print(f"✅ Serving on http://{host}:{port} with {self.n_workers} preforked worker(s) "
+              f"(master pid {os.getpid()})", flush=True)
+
+        next_report = time.monotonic() + self.memory_interval_s
+        while not self.stopping:
+            self.reap()
+            if self.reload_requested:
+                self.reload_requested = False
+                self.reload()
+            if self.report_requested or (self.memory_interval_s > 0 and time.monotonic() >= next_report):
+                self.report_requested = False
+                next_report = time.monotonic() + self.memory_interval_s
+                print_memory_report(memory_report(self.processes()))
+            time.sleep(0.2)
+
+        print("✅ Shutting down workers", flush=True)
+        self.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the pricing API from preforked workers sharing one model load")
+    parser.add_argument("--host", default=os.environ.get("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", 8000)))  # Render sets PORT
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("WEB_CONCURRENCY", 1)))
+    parser.add_argument("--threads", type=int,
+                        help="BLAS/OpenMP threads per worker; overrides OMP_NUM_THREADS etc. "
+                             "(default SERVE_THREADS_PER_WORKER or 1, for variables not already set)")
+    parser.add_argument("--memory-interval", type=float, default=60.0,
+                        help="seconds between per-process memory reports (0 = only on SIGUSR1)")
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args(argv)
+
+    if args.threads is not None:
+        limit_threads(args.threads, override=True)
+    else:
+        limit_threads(int(os.environ.get("SERVE_THREADS_PER_WORKER", 1)))
+    service = _import_service()
+    service.load_model()
+    if not service.state.ready.is_set():
+        raise SystemExit(f"❌ Not starting workers: {service.state.error}")
+
+    sock = bind_socket(args.host, args.port)
+    PreforkServer(service, sock, args.workers, args.memory_interval, args.log_level).run()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,339 @@
+import os
+import csv
+import json
+import time
+import queue
+import argparse
+import itertools
+import multiprocessing as mp
+from datetime import datetime
+import numpy as np
+import torch
+from stable_baselines3.common.callbacks import BaseCallback, CallbackList, EvalCallback
+from stable_baselines3.common.vec_env import DummyVecEnv
+
+try:
+    from src.pricing import ENV_KWARGS
+    from src.train_pricing_agent import (DATA_PATH, NET_ARCH, SCALER_PATH, ThroughputCallback,
+                                         build_model, build_vec_env, make_env, scaled_rollout)
+    from src.vec_pricing_env import load_pricing_arrays
+except ImportError:  # running from inside src/
+    from pricing import ENV_KWARGS
+    from train_pricing_agent import (DATA_PATH, NET_ARCH, SCALER_PATH, ThroughputCallback,
+                                     build_model, build_vec_env, make_env, scaled_rollout)
+    from vec_pricing_env import load_pricing_arrays
+
+# -----------------------------
+# Project paths (absolute)
+# -----------------------------
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SWEEPS_DIR = os.path.join(PROJECT_ROOT, "logs", "sweeps")
+
+# -----------------------------
+# Search space
+# -----------------------------
+# A JSON object of parameter -> values. For --mode grid every value is a list
+# (a scalar is a fixed value) and all combinations are run. For --mode random
+# a value can also be {"uniform": [lo, hi]}, {"log_uniform": [lo, hi]} or
+# {"int_uniform": [lo, hi]}; lists are sampled uniformly.
+#
+# PPO parameters go to PPO(...); net_arch is the pi/vf layer sizes; n_steps /
+# batch_size default to scaled_rollout(). Env parameters only change the
+# training reward: every trial is evaluated on the shipped ENV_KWARGS, so
+# eval rewards stay comparable across trials.
+PPO_PARAMS = ("learning_rate", "n_epochs", "gamma", "gae_lambda", "clip_range", "ent_coef", "vf_coef",
+              "max_grad_norm")
+ROLLOUT_PARAMS = ("n_steps", "batch_size")
+ENV_PARAMS = tuple(ENV_KWARGS)
+PARAMS = PPO_PARAMS + ROLLOUT_PARAMS + ("net_arch",) + ENV_PARAMS
+
+DEFAULT_SPACE = {
+    "learning_rate": [1e-4, 3e-4, 1e-3],
+    "n_steps": [512, 1024],
+    "net_arch": [[64, 64], [256, 128]],
+}
+
+def _check_space(space):
+    unknown = sorted(set(space) - set(PARAMS))
+    if unknown:
+        raise SystemExit(f"❌ Unknown sweep parameters {unknown} (choose from {list(PARAMS)})")
+
+def grid_configs(space):
+    _check_space(space)
+    names = list(space)
+    values = []
+    for name in names:
+        v = space[name]
+        if isinstance(v, dict):
+            raise SystemExit(f"❌ '{name}': distributions need --mode random")
+        values.append(v if isinstance(v, list) else [v])
+    return [dict(zip(names, combo)) for combo in itertools.product(*values)]
+
+def _sample(rng, spec):
+    if isinstance(spec, list):
+        return spec[rng.integers(len(spec))]
+    if not isinstance(spec, dict):
+        return spec
+    (kind, (lo, hi)), = spec.items()
+    if kind == "uniform":
+        return float(rng.uniform(lo, hi))
+    if kind == "log_uniform":
+        return float(np.exp(rng.uniform(np.log(lo), np.log(hi))))
+    if kind == "int_uniform":
+        return int(rng.integers(lo, hi + 1))
+    raise SystemExit(f"❌ Unknown distribution '{kind}' (uniform, log_uniform, int_uniform)")
+
+def random_configs(space, n_trials, seed=0):
+    _check_space(space)
+    rng = np.random.default_rng(seed)
+    return [{name: _sample(rng, spec) for name, spec in space.items()} for _ in range(n_trials)]
+
+
+# -----------------------------
+# CPU pinning
+# -----------------------------
+def cpu_slots(n_workers, cpus_per_trial=None):
+    """Disjoint CPU sets, one per concurrent trial (from the CPUs this process may use)."""
+    available = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else \
+        list(range(os.cpu_count() or 1))
+    per_trial = cpus_per_trial or max(1, len(available) // n_workers)
+    if per_trial * n_workers > len(available):
+        print(f"⚠️ {n_workers} workers x {per_trial} CPUs > {len(available)} available; CPU sets will overlap")
+    return [[available[(w * per_trial + i) % len(available)] for i in range(per_trial)]
+            for w in range(n_workers)]
+
+def pin_to(cpus):
+    """Pin this process to `cpus` and size torch's thread pool to match."""
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+    torch.set_num_threads(len(cpus))
+
+
+# -----------------------------
+# Early stopping (median rule)
+# -----------------------------
+def should_stop(history, trial_id, grace_evals=2, min_peers=3, quantile=0.5):
+    """
+    Stop a trial whose best eval reward so far is below the `quantile` of
+    the other trials' best rewards after the same number of evaluations.
+    Needs `grace_evals` evaluations of its own and `min_peers` trials that
+    got at least as far; the first trials therefore always run to the end.
+    """
+    mine = history.get(trial_id, [])
+    k = len(mine)
+    if k < grace_evals:
+        return False
+    peers = [max(h[:k]) for t, h in history.items() if t != trial_id and len(h) >= k]
+    if len(peers) < min_peers:
+        return False
+    return max(mine) < float(np.quantile(peers, quantile))
+
+class SweepReportCallback(BaseCallback):
+    """
+    EvalCallback's callback_after_eval: records each evaluation's mean reward
+    in the sweep-wide history and stops training when the median rule says so
+    (never, when `stop_kwargs` is None).
+    """
+
+    def __init__(self, trial_id, history, stop_kwargs):
+        super().__init__()
+        self.trial_id = trial_id
+        self.history = history
+        self.stop_kwargs = stop_kwargs
+        self.stopped_early = False
+
+    def _on_step(self):
+        # Manager dict: reassign the list so the update reaches the other processes
+        self.history[self.trial_id] = list(self.history.get(self.trial_id, [])) + [
+            float(self.parent.last_mean_reward)]
+        if self.stop_kwargs is not None and should_stop(dict(self.history), self.trial_id, **self.stop_kwargs):
+            self.stopped_early = True
+            return False
+        return True
+
+
+# -----------------------------
+# Trial (runs in its own process)
+# -----------------------------
+def run_trial(trial, cpus, options, history, results):
+    """Train one configuration pinned to `cpus`; puts a result row on `results`."""
+    t0 = time.perf_counter()
+    row = {"trial": trial["id"], "seed": trial["seed"], "cpus": " ".join(map(str, cpus))}
+    try:
+        pin_to(cpus)
+        params = trial["params"]
+        n_envs = options["n_envs"]
+        n_steps, batch_size = scaled_rollout(n_envs, params.get("n_steps"), params.get("batch_size"))
+        env_kwargs = {**ENV_KWARGS, **{k: params[k] for k in ENV_PARAMS if k in params}}
+        ppo_kwargs = {k: params[k] for k in PPO_PARAMS if k in params}
+
+        trial_dir = os.path.join(options["sweep_dir"], f"trial_{trial['id']:03d}")
+        os.makedirs(trial_dir, exist_ok=True)
+        arrays = load_pricing_arrays(options["data"], SCALER_PATH)
+        vec_env = build_vec_env("dummy", n_envs, trial["seed"], arrays, env_kwargs=env_kwargs)
+        eval_env = DummyVecEnv([make_env(0, trial["seed"] + n_envs, arrays)])  # shipped reward
+
+        report = SweepReportCallback(trial["id"], history, options["stop"])
+        eval_callback = EvalCallback(eval_env, callback_after_eval=report, best_model_save_path=trial_dir,
+                                     log_path=trial_dir, eval_freq=max(options["eval_freq"] // n_envs, 1),
+                                     n_eval_episodes=options["n_eval_episodes"], deterministic=True,
+                                     verbose=0)
+        throughput = ThroughputCallback()
+        model = build_model(vec_env, n_steps, batch_size, params.get("net_arch", NET_ARCH), trial["seed"],
+                            tensorboard_log=trial_dir, verbose=0, **ppo_kwargs)
+        model.learn(total_timesteps=options["total_timesteps"], callback=CallbackList([eval_callback, throughput]))
+        vec_env.close()
+
+        rewards = history.get(trial["id"], [])
+        row.update({
+            "status": "stopped" if report.stopped_early else "completed",
+            "best_eval_reward": round(max(rewards), 6) if rewards else None,
+            "last_eval_reward": round(rewards[-1], 6) if rewards else None,
+            "evals": len(rewards),
+            "timesteps": int(model.num_timesteps),
+            "steps_per_sec": round(throughput.steps_per_sec, 1),
+        })
+    except Exception as e:
+        row.update({"status": "failed", "error": f"{type(e).__name__}: {e}"})
+    row["wall_s"] = round(time.perf_counter() - t0, 2)
+    results.put(row)
+
+
+# -----------------------------
+# Scheduler
+# -----------------------------
+RESULT_COLUMNS = ["trial", "status", "best_eval_reward", "last_eval_reward", "evals", "timesteps",
+                  "wall_s", "steps_per_sec", "seed", "cpus"]
+
+def write_results(rows, trials, sweep_dir):
+    """results.csv (one row per finished trial, params flattened) and results.json."""
+    params = {t["id"]: t["params"] for t in trials}
+    names = sorted({name for t in trials for name in t["params"]})
+    with open(os.path.join(sweep_dir, "results.csv"), "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=RESULT_COLUMNS + names + ["error"], extrasaction="ignore")
+        writer.writeheader()
+        for row in rows:
+            flat = {n: json.dumps(v) if isinstance(v, list) else v for n, v in params[row["trial"]].items()}
+            writer.writerow({**row, **flat})
+    with open(os.path.join(sweep_dir, "results.json"), "w") as f:
+        json.dump([{**row, "params": params[row["trial"]]} for row in rows], f, indent=2)
+
+def run_sweep(configs, sweep_dir, workers=1, cpus_per_trial=None, seed=0, data=DATA_PATH,
+              total_timesteps=50_000, eval_freq=5_000, n_eval_episodes=5, n_envs=1,
+              grace_evals=2, min_peers=3, stop_quantile=0.5, early_stop=True):
+    """
+    Run every config as a trial (seed + trial id) on a pool of `workers`
+    processes, each pinned to its own CPU set. Returns result rows in
+    completion order; results.csv/.json are rewritten after every trial.
+    """
+    os.makedirs(sweep_dir, exist_ok=True)
+    trials = [{"id": i, "seed": seed + i, "params": params} for i, params in enumerate(configs)]
+    with open(os.path.join(sweep_dir, "trials.json"), "w") as f:
+        json.dump(trials, f, indent=2)
+
+    ctx = mp.get_context("spawn")  # fresh interpreters: torch threads are sized after pinning
+    manager = ctx.Manager()
+    history = manager.dict()
+    results = ctx.Queue()
+    options = {"sweep_dir": sweep_dir, "data": data, "total_timesteps": total_timesteps, "eval_freq": eval_freq,
+               "n_eval_episodes": n_eval_episodes, "n_envs": n_envs,
+               "stop": {"grace_evals": grace_evals, "min_peers": min_peers, "quantile": stop_quantile}
+               if early_stop else None}
+
+    free = cpu_slots(workers, cpus_per_trial)
+    pending = list(trials)
+    running = {}  # trial id -> (process, cpus)
+    rows = []
+    try:
+        while pending or running:
+            while pending and free:
+                trial, cpus = pending.pop(0), free.pop(0)
+                proc = ctx.Process(target=run_trial, args=(trial, cpus, options, history, results),
+                                   name=f"trial-{trial['id']}")
+                proc.start()
+                running[trial["id"]] = (proc, cpus)
+
+            try:
+                row = results.get(timeout=1.0)
+            except queue.Empty:  # check for trials that died without reporting
+                for trial_id, (proc, cpus) in list(running.items()):
+                    if not proc.is_alive() and proc.exitcode != 0:
+                        row = {"trial": trial_id, "status": "failed", "error": f"exit code {proc.exitcode}"}
+                        rows.append(row)
+                        del running[trial_id]
+                        free.append(cpus)
+                        print(f"❌ Trial {trial_id} died (exit code {proc.exitcode})")
+                continue
+
+            proc, cpus = running.pop(row["trial"])
+            proc.join()
+            free.append(cpus)
+            rows.append(row)
+            write_results(rows, trials, sweep_dir)
+            if row["status"] == "failed":
+                print(f"❌ Trial {row['trial']} failed: {row.get('error')}")
+            else:
+                print(f"✅ Trial {row['trial']} {row['status']} after {row['evals']} evals: "
+                      f"best {row['best_eval_reward']} ({row['wall_s']}s, {row['steps_per_sec']} steps/sec)")
+    finally:
+        for proc, _ in running.values():
+            proc.terminate()
+        write_results(rows, trials, sweep_dir)
+        manager.shutdown()
+    return rows
+
+
+# -----------------------------
+# CLI
+# -----------------------------
+def print_results(rows, configs):
+    ranked = sorted(rows, key=lambda r: (r.get("best_eval_reward") is None, -(r.get("best_eval_reward") or 0)))
+    print(f"\n{'trial':>5} {'status':<10} {'best_reward':>12} {'evals':>6} {'wall_s':>8} {'steps/s':>9}  params")
+    for r in ranked:
+        best = r.get("best_eval_reward")
+        print(f"{r['trial']:>5} {r['status']:<10} {best if best is not None else '-':>12} "
+              f"{r.get('evals', '-'):>6} {r.get('wall_s', '-'):>8} {r.get('steps_per_sec', '-'):>9}  "
+              f"{json.dumps(configs[r['trial']])}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Parallel hyperparameter sweep for the PPO pricing agent")
+    parser.add_argument("--space", help="search space JSON file (default: a small learning_rate/n_steps/"
+                                        "net_arch grid)")
+    parser.add_argument("--mode", choices=["grid", "random"], default="grid")
+    parser.add_argument("--trials", type=int, default=10, help="number of random-search trials")
+    parser.add_argument("--workers", type=int, default=1, help="concurrent trials")
+    parser.add_argument("--cpus-per-trial", type=int, default=None, help="default: available CPUs / workers")
+    parser.add_argument("--seed", type=int, default=0, help="trial i trains with seed + i")
+    parser.add_argument("--data", default=DATA_PATH, help="CSV or memory-mapped dataset (build_dataset.py)")
+    parser.add_argument("--total-timesteps", type=int, default=50_000)
+    parser.add_argument("--eval-freq", type=int, default=5_000, help="total steps between evaluations")
+    parser.add_argument("--n-eval-episodes", type=int, default=5)
+    parser.add_argument("--n-envs", type=int, default=1, help="in-process envs per trial")
+    parser.add_argument("--grace-evals", type=int, default=2, help="evaluations before a trial can be stopped")
+    parser.add_argument("--min-peers", type=int, default=3,
+                        help="trials that must have reached the same evaluation before stopping another")
+    parser.add_argument("--stop-quantile", type=float, default=0.5,
+                        help="stop a trial whose best reward is below this quantile of its peers'")
+    parser.add_argument("--no-early-stop", action="store_true", help="run every trial to --total-timesteps")
+    parser.add_argument("--out", help=f"sweep directory (default: {SWEEPS_DIR}/sweep_<timestamp>)")
+    args = parser.parse_args(argv)
+
+    space = DEFAULT_SPACE
+    if args.space:
+        with open(args.space) as f:
+            space = json.load(f)
+    configs = grid_configs(space) if args.mode == "grid" else random_configs(space, args.trials, args.seed)
+    sweep_dir = args.out or os.path.join(SWEEPS_DIR, datetime.now().strftime("sweep_%Y%m%d_%H%M%S"))
+    print(f"Sweeping {len(configs)} trials ({args.mode}) on {args.workers} worker(s) -> {sweep_dir}")
+
+    t0 = time.perf_counter()
+    rows = run_sweep(configs, sweep_dir, args.workers, args.cpus_per_trial, args.seed, args.data,
+                     args.total_timesteps, args.eval_freq, args.n_eval_episodes, args.n_envs,
+                     args.grace_evals, args.min_peers, args.stop_quantile, not args.no_early_stop)
+    print_results(rows, configs)
+    stopped = sum(r["status"] == "stopped" for r in rows)
+    print(f"\n✅ {len(rows)} trials ({stopped} stopped early) in {time.perf_counter() - t0:.1f}s; "
+          f"results in {os.path.join(sweep_dir, 'results.csv')}")
+
+if __name__ == "__main__":
+    main()
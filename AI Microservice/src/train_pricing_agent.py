@@ -1,14 +1,19 @@
 import os
-import random
-import math
-import joblib
-import numpy as np
-import pandas as pd
-import gym
-from gym import spaces
+import time
+import argparse
 from stable_baselines3 import PPO
-from stable_baselines3.common.vec_env import DummyVecEnv
-from stable_baselines3.common.callbacks import CheckpointCallback, EvalCallback, CallbackList
+from stable_baselines3.common.vec_env import DummyVecEnv, SubprocVecEnv, VecMonitor
+from stable_baselines3.common.callbacks import (BaseCallback, CheckpointCallback, EvalCallback,
+                                                CallbackList)
+
+try:
+    from src.pricing import ENV_KWARGS
+    from src.elasticity_index import row_elasticities
+    from src.vec_pricing_env import ArrayPricingEnv, VecPricingEnv, load_pricing_arrays
+except ImportError:  # running from inside src/
+    from pricing import ENV_KWARGS
+    from elasticity_index import row_elasticities
+    from vec_pricing_env import ArrayPricingEnv, VecPricingEnv, load_pricing_arrays
 
 # -----------------------------
 # Project paths (absolute)
@@ -27,152 +32,135 @@ os.makedirs(MODELS_DIR, exist_ok=True)
 os.makedirs(LOGS_DIR, exist_ok=True)
 
 # -----------------------------
-# ContinuousPricingEnv
+# Vectorized envs
 # -----------------------------
-class ContinuousPricingEnv(gym.Env):
-    """ Continuous pricing environment.
-    Action: single float percentage adjustment in [-0.3, 0.3]
-    Observation: normalized features using scaler.pkl
+def make_env(rank, seed=None, arrays=None, data_path=DATA_PATH, env_kwargs=None):
     """
-
-    metadata = {"render.modes": []}
-
-    def __init__(self, data_path=DATA_PATH, scaler_path=SCALER_PATH,
-                 max_price=None, max_stock=None, elasticity=3.0, holding_cost_per_unit=0.5,
-                 min_margin=0.01, seed=None):
-        super().__init__()
-
-        # load data & scaler
-        self.df = pd.read_csv(data_path).reset_index(drop=True)
-        meta = joblib.load(scaler_path)
-        self.scaler = meta["scaler"]
-        self.features = meta["features"]
-
-        self.elasticity = elasticity
-        self.holding_cost_per_unit = holding_cost_per_unit
-        self.min_margin = min_margin
-        self.max_price = max_price
-        self.max_stock = max_stock
-
-        # spaces
-        self.n_features = len(self.features)
-        self.observation_space = spaces.Box(low=0.0, high=1.0, shape=(self.n_features,), dtype=np.float32)
-        self.action_space = spaces.Box(low=-0.3, high=0.3, shape=(1,), dtype=np.float32)
-
-        self.current_step = 0
-        self.seed(seed)
-
-    def seed(self, s=None):
-        self.np_random, seed = gym.utils.seeding.np_random(s)
-        return [seed]
-
-    def reset(self):
-        self.current_step = random.randint(0, max(0, len(self.df) - 1))
-        row = self.df.iloc[self.current_step]
-        self._load_row(row)
-        return self._get_obs_from_row(row)
-
-    def _load_row(self, row):
-        self.actual_price = float(row.get("actual_price", 0.0))
-        self.selling_price = float(row.get("selling_price", 0.0))
-        self.ebay_price = float(row.get("ebay_price", 0.0))
-        self.stock = float(row.get("stock", 0.0))
-        self.demand_index = float(row.get("demand_index", 0.0))
-        self.user_interest = float(row.get("user_interest", 0.0))
-        self.sales = float(row.get("sales", 0.0))
-        self.day_of_week = int(row.get("day_of_week", 0))
-        self.season = int(row.get("season", 0))
-
-    def _get_obs_from_row(self, row):
-        vals = row[self.features].astype(float).values.reshape(1, -1)
-        obs = self.scaler.transform(vals)[0].astype(np.float32)
-        return obs
-
-    def _safe_action_to_scalar(self, action):
-        try:
-            import torch
-            if isinstance(action, torch.Tensor):
-                action = action.detach().cpu().numpy()
-        except Exception:
-            pass
-        action_np = np.array(action, dtype=float).flatten()
-        raw = float(action_np[0]) if action_np.size > 0 else 0.0
-        low, high = float(self.action_space.low[0]), float(self.action_space.high[0])
-        return float(np.clip(raw, low, high))
-
-    def step(self, action):
-        adjustment = self._safe_action_to_scalar(action)
-        old_price = self.selling_price if self.selling_price > 0 else max(1.0, self.actual_price * (1 + self.min_margin))
-        new_price = old_price * (1.0 + adjustment)
-
-        min_allowed = max(self.actual_price * (1.0 + self.min_margin), 0.01)
-        if new_price < min_allowed:
-            new_price = min_allowed
-        if self.max_price is not None:
-            new_price = min(new_price, self.max_price)
-
-        demand_factor = max(0.0, (0.6 * self.demand_index + 0.4 * self.user_interest))
-        price_ratio = new_price / max(1e-6, old_price)
-        expected_sales = self.sales * demand_factor * math.exp(-self.elasticity * (price_ratio - 1.0))
-        expected_sales = max(0.0, expected_sales)
-
-        profit = (new_price - self.actual_price) * expected_sales
-        competitor_gap = max(0.0, new_price - self.ebay_price)
-        competitor_penalty = competitor_gap * 0.01 * expected_sales
-        leftover = max(0.0, self.stock - expected_sales)
-        holding_penalty = leftover * self.holding_cost_per_unit
-
-        reward = float((profit - competitor_penalty - holding_penalty) / 1000.0)
-        self.selling_price = new_price
-
-        self.current_step += 1
-        done = self.current_step >= len(self.df)
-        if not done:
-            row = self.df.iloc[self.current_step]
-            self._load_row(row)
-            obs = self._get_obs_from_row(row)
-        else:
-            obs = np.zeros(self.n_features, dtype=np.float32)
-
-        info = {
-            "adjustment": adjustment,
-            "predicted_sales": expected_sales,
-            "profit": profit,
-            "competitor_penalty": competitor_penalty,
-            "holding_penalty": holding_penalty,
-            "new_price": new_price,
-        }
-        return obs, reward, done, info
+    Env factory for worker `rank`. Each worker gets its own seed (seed + rank) so
+    parallel episodes start at different rows. Without `arrays` the worker loads
+    and scales the dataset itself (used by SubprocVecEnv to avoid pickling it).
+    `env_kwargs` overrides the reward parameters (default: pricing.ENV_KWARGS).
+    """
+    kwargs = env_kwargs or ENV_KWARGS
+
+    def _init():
+        env_seed = None if seed is None else seed + rank
+        return ArrayPricingEnv(data_path=data_path, scaler_path=SCALER_PATH,
+                               arrays=arrays, seed=env_seed, **kwargs)
+    return _init
+
+def build_vec_env(kind, n_envs, seed=None, arrays=None, data_path=DATA_PATH, env_kwargs=None):
+    if kind == "subproc":
+        return SubprocVecEnv([make_env(rank, seed, data_path=data_path, env_kwargs=env_kwargs)
+                              for rank in range(n_envs)])
+    arrays = arrays or load_pricing_arrays(data_path, SCALER_PATH)
+    if kind == "native":
+        return VecMonitor(VecPricingEnv(n_envs, arrays=arrays, seed=seed, **(env_kwargs or ENV_KWARGS)))
+    return DummyVecEnv([make_env(rank, seed, arrays, env_kwargs=env_kwargs) for rank in range(n_envs)])
+
+class ThroughputCallback(BaseCallback):
+    """Logs environment steps/sec per rollout and reports the overall rate at the end."""
+
+    def _on_training_start(self):
+        self.t_start = self.t_rollout = time.perf_counter()
+        self.steps_start = self.steps_rollout = self.num_timesteps
+
+    def _on_rollout_end(self):
+        now = time.perf_counter()
+        sps = (self.num_timesteps - self.steps_rollout) / max(1e-9, now - self.t_rollout)
+        self.logger.record("time/steps_per_sec", sps)
+        self.t_rollout, self.steps_rollout = now, self.num_timesteps
+
+    def _on_step(self):
+        return True
+
+    def _on_training_end(self):
+        self.elapsed = time.perf_counter() - self.t_start
+        self.steps = self.num_timesteps - self.steps_start
+        self.steps_per_sec = self.steps / max(1e-9, self.elapsed)
+        print(f"⏱  {self.steps} steps in {self.elapsed:.1f}s -> {self.steps_per_sec:.0f} steps/sec "
+              f"({self.training_env.num_envs} envs)")
+
+def scaled_rollout(n_envs, n_steps=None, batch_size=None):
+    """
+    Defaults keep the original single-env setup (1024-step rollouts, 64-sample
+    minibatches, 16 minibatches per epoch) and spread the rollout across envs.
+    """
+    if n_steps is None:
+        n_steps = max(64, 1024 // n_envs)
+    if batch_size is None:
+        batch_size = max(64, (n_steps * n_envs) // 16)
+    return n_steps, batch_size
+
+# Hyperparameters of the shipped configuration (sweep.py varies these)
+NET_ARCH = [256, 128]
+PPO_KWARGS = dict(learning_rate=3e-4, n_epochs=10, gamma=0.99)
+
+def build_model(vec_env, n_steps, batch_size, net_arch=NET_ARCH, seed=None, tensorboard_log=LOGS_DIR,
+                verbose=1, **ppo_kwargs):
+    """PPO with separate pi/vf MLPs of `net_arch`; `ppo_kwargs` override PPO_KWARGS."""
+    policy_kwargs = dict(net_arch=[dict(pi=list(net_arch), vf=list(net_arch))])
+    return PPO("MlpPolicy", vec_env, verbose=verbose, n_steps=n_steps, batch_size=batch_size,
+               policy_kwargs=policy_kwargs, tensorboard_log=tensorboard_log, seed=seed,
+               **{**PPO_KWARGS, **ppo_kwargs})
 
 # -----------------------------
 # Training script
 # -----------------------------
-def make_env():
-    return ContinuousPricingEnv(data_path=DATA_PATH, scaler_path=SCALER_PATH,
-                                elasticity=3.0, holding_cost_per_unit=0.5, min_margin=0.02)
-
-vec_env = DummyVecEnv([make_env])
-eval_env = DummyVecEnv([make_env])
-
-checkpoint_callback = CheckpointCallback(save_freq=10000, save_path=LOGS_DIR, name_prefix="pricing_model")
-eval_callback = EvalCallback(eval_env, best_model_save_path=LOGS_DIR, log_path=LOGS_DIR,
-                             eval_freq=20000, n_eval_episodes=5, deterministic=True, render=False)
-callback = CallbackList([checkpoint_callback, eval_callback])
-
-policy_kwargs = dict(net_arch=[dict(pi=[256, 128], vf=[256, 128])])
-
-model = PPO("MlpPolicy", vec_env, verbose=1, learning_rate=3e-4,
-            n_steps=1024, batch_size=64, n_epochs=10, gamma=0.99,
-            policy_kwargs=policy_kwargs, tensorboard_log=LOGS_DIR)
-
-TOTAL_TIMESTEPS = 50_000
-
-try:
-    model.learn(total_timesteps=TOTAL_TIMESTEPS, callback=callback)
-except KeyboardInterrupt:
-    print("Training interrupted. Saving model...")
-    model.save(MODEL_PATH)
-    raise
-
-model.save(MODEL_PATH)
-print("✅ Saved model to", MODEL_PATH + ".zip")
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Train the PPO pricing agent")
+    parser.add_argument("--data", default=DATA_PATH,
+                        help="CSV, or a memory-mapped dataset from build_dataset.py "
+                             "(shared by all workers without copies)")
+    parser.add_argument("--n-envs", type=int, default=1, help="number of parallel environments")
+    parser.add_argument("--vec-env", choices=["dummy", "subproc", "native"], default="dummy",
+                        help="dummy: in-process, subproc: one process per env, "
+                             "native: single batched VecPricingEnv")
+    parser.add_argument("--seed", type=int, default=None, help="base seed (worker i uses seed + i)")
+    parser.add_argument("--total-timesteps", type=int, default=50_000)
+    parser.add_argument("--n-steps", type=int, default=None, help="rollout steps per env (default: scaled)")
+    parser.add_argument("--batch-size", type=int, default=None, help="minibatch size (default: scaled)")
+    parser.add_argument("--learning-rate", type=float, default=PPO_KWARGS["learning_rate"])
+    parser.add_argument("--eval-freq", type=int, default=20_000, help="total steps between evaluations")
+    parser.add_argument("--save-path", default=MODEL_PATH)
+    parser.add_argument("--elasticity-index",
+                        help="per-product elasticities from estimate_elasticity.py (default: one global value)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    n_steps, batch_size = scaled_rollout(args.n_envs, args.n_steps, args.batch_size)
+    print(f"Training with {args.n_envs} x {args.vec_env} envs, n_steps={n_steps}, batch_size={batch_size}")
+
+    env_kwargs = None
+    if args.elasticity_index:
+        env_kwargs = {**ENV_KWARGS, "elasticity": row_elasticities(args.data, args.elasticity_index)}
+    arrays = None if args.vec_env == "subproc" else load_pricing_arrays(args.data, SCALER_PATH)
+    vec_env = build_vec_env(args.vec_env, args.n_envs, args.seed, arrays, args.data, env_kwargs)
+    eval_seed = None if args.seed is None else args.seed + args.n_envs
+    eval_env = DummyVecEnv([make_env(0, eval_seed, arrays, args.data, env_kwargs)])
+
+    # Callback frequencies count vec_env.step() calls, i.e. n_envs steps each
+    checkpoint_callback = CheckpointCallback(save_freq=max(10_000 // args.n_envs, 1),
+                                             save_path=LOGS_DIR, name_prefix="pricing_model")
+    eval_callback = EvalCallback(eval_env, best_model_save_path=LOGS_DIR, log_path=LOGS_DIR,
+                                 eval_freq=max(args.eval_freq // args.n_envs, 1), n_eval_episodes=5,
+                                 deterministic=True, render=False)
+    callback = CallbackList([checkpoint_callback, eval_callback, ThroughputCallback()])
+
+    model = build_model(vec_env, n_steps, batch_size, seed=args.seed, learning_rate=args.learning_rate)
+
+    try:
+        model.learn(total_timesteps=args.total_timesteps, callback=callback)
+    except KeyboardInterrupt:
+        print("Training interrupted. Saving model...")
+        model.save(args.save_path)
+        raise
+    finally:
+        vec_env.close()
+
+    model.save(args.save_path)
+    print("✅ Saved model to", args.save_path + ".zip")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+import os
+import math
+import random
+import joblib
+import numpy as np
+import pandas as pd
+import gym
+from gym import spaces
+import gymnasium
+from stable_baselines3.common.vec_env import VecEnv
+
+try:
+    from src.feature_store import is_dataset, load_dataset
+    from src.pricing import ACTION_HIGH, ACTION_LOW, COL, FEATURES, simulate_pricing_step
+except ImportError:  # running from inside src/
+    from feature_store import is_dataset, load_dataset
+    from pricing import ACTION_HIGH, ACTION_LOW, COL, FEATURES, simulate_pricing_step
+
+# -----------------------------
+# Project paths (absolute)
+# -----------------------------
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DATA_PATH = os.path.join(PROJECT_ROOT, "data", "synthetic_ecommerce_data.csv")
+SCALER_PATH = os.path.join(PROJECT_ROOT, "models", "scaler.pkl")
+
+INFO_KEYS = ("adjustment", "predicted_sales", "profit", "competitor_penalty",
+             "holding_penalty", "new_price")
+
+
+# -----------------------------
+# Dataset -> arrays (done once)
+# -----------------------------
+def load_pricing_arrays(data_path=DATA_PATH, scaler_path=SCALER_PATH):
+    """
+    Read the dataset once and return (raw, obs, features):
+      raw: (N, 9) C-contiguous array in pricing.FEATURES order, used for the
+           reward math (float64, so rewards match pricing.simulate_pricing_step bit for bit)
+      obs: (N, n_features) C-contiguous float32, already MinMax-scaled
+    Missing columns are filled with 0.
+
+    `data_path` may also be a PricingDataset (build_dataset.py). Its arrays are
+    memory-mapped, so every env / worker process shares one page-cached copy.
+    """
+    if is_dataset(data_path):
+        return _load_dataset_arrays(data_path, scaler_path)
+
+    df = pd.read_csv(data_path).reset_index(drop=True)
+    meta = joblib.load(scaler_path)
+    features = meta["features"]
+
+    raw = np.zeros((len(df), len(FEATURES)), dtype=np.float64)
+    for name, j in COL.items():
+        if name in df.columns:
+            raw[:, j] = df[name].astype(float).values
+    obs = meta["scaler"].transform(df[features].astype(float).values).astype(np.float32)
+    return np.ascontiguousarray(raw), np.ascontiguousarray(obs), features
+
+
+def _load_dataset_arrays(data_path, scaler_path):
+    ds = load_dataset(data_path)
+    if ds.features != FEATURES:
+        raise ValueError(f"Dataset feature order {ds.features} != {FEATURES}")
+    if scaler_path and os.path.exists(scaler_path):
+        scaler = joblib.load(scaler_path)["scaler"]
+        if not (np.allclose(scaler.min_, ds.scaler_min) and np.allclose(scaler.scale_, ds.scaler_scale)):
+            raise ValueError(f"Dataset {data_path} was scaled with a different scaler than {scaler_path}; "
+                             "rebuild it with build_dataset.py")
+    return ds.raw, ds.obs, ds.features
+
+
+def _check_elasticity(elasticity, n_rows):
+    if np.ndim(elasticity) and len(elasticity) != n_rows:
+        raise ValueError(f"{len(elasticity)} per-row elasticities for {n_rows} rows")
+
+
+def _action_to_scalar(action):
+    if hasattr(action, "detach"):  # torch tensor
+        action = action.detach().cpu().numpy()
+    action_np = np.asarray(action, dtype=float).ravel()
+    raw = float(action_np[0]) if action_np.size > 0 else 0.0
+    return min(max(raw, ACTION_LOW), ACTION_HIGH)
+
+
+# -----------------------------
+# Single env
+# -----------------------------
+class ArrayPricingEnv(gym.Env):
+    """ Continuous pricing environment (also exported as ContinuousPricingEnv).
+    Action: single float percentage adjustment in [-0.3, 0.3]
+    Observation: normalized features using scaler.pkl
+    The dataset is scaled once up front and a step is plain array indexing;
+    pricing.simulate_pricing_step is the same step vectorized over rows.
+    Pass `arrays` (from load_pricing_arrays) to share one copy between envs.
+    `elasticity` is a scalar or one value per row (elasticity_index.row_elasticities).
+    """
+
+    metadata = {"render.modes": []}
+
+    def __init__(self, data_path=DATA_PATH, scaler_path=SCALER_PATH,
+                 max_price=None, max_stock=None, elasticity=3.0, holding_cost_per_unit=0.5,
+                 min_margin=0.01, seed=None, arrays=None):
+        super().__init__()
+
+        self.raw, self.obs, self.features = arrays or load_pricing_arrays(data_path, scaler_path)
+        self.n_rows = len(self.raw)
+
+        _check_elasticity(elasticity, self.n_rows)
+        self.elasticity = elasticity
+        self._row_elasticity = np.ndim(elasticity) > 0
+        self.holding_cost_per_unit = holding_cost_per_unit
+        self.min_margin = min_margin
+        self.max_price = max_price
+        self.max_stock = max_stock
+
+        self.n_features = len(self.features)
+        self.observation_space = spaces.Box(low=0.0, high=1.0, shape=(self.n_features,), dtype=np.float32)
+        self.action_space = spaces.Box(low=ACTION_LOW, high=ACTION_HIGH, shape=(1,), dtype=np.float32)
+
+        self.current_step = 0
+        self.seed(seed)
+
+    def seed(self, s=None):
+        self.np_random, seed = gym.utils.seeding.np_random(s)
+        self._rng = random.Random(s)  # per-env start-row RNG (parallel workers must not share it)
+        return [seed]
+
+    def reset(self):
+        self.current_step = self._rng.randint(0, max(0, self.n_rows - 1))
+        self._load_row(self.current_step)
+        return self.obs[self.current_step].copy()
+
+    def _load_row(self, i):
+        (self.actual_price, self.selling_price, self.ebay_price, self.stock,
+         self.demand_index, self.user_interest, self.sales,
+         day_of_week, season) = self.raw[i].tolist()
+        self.day_of_week = int(day_of_week)
+        self.season = int(season)
+
+    def step(self, action):
+        adjustment = _action_to_scalar(action)
+        old_price = self.selling_price if self.selling_price > 0 else max(1.0, self.actual_price * (1 + self.min_margin))
+        new_price = old_price * (1.0 + adjustment)
+
+        min_allowed = max(self.actual_price * (1.0 + self.min_margin), 0.01)
+        if new_price < min_allowed:
+            new_price = min_allowed
+        if self.max_price is not None:
+            new_price = min(new_price, self.max_price)
+
+        demand_factor = max(0.0, (0.6 * self.demand_index + 0.4 * self.user_interest))
+        price_ratio = new_price / max(1e-6, old_price)
+        elasticity = float(self.elasticity[self.current_step]) if self._row_elasticity else self.elasticity
+        expected_sales = self.sales * demand_factor * math.exp(-elasticity * (price_ratio - 1.0))
+        expected_sales = max(0.0, expected_sales)
+
+        profit = (new_price - self.actual_price) * expected_sales
+        competitor_gap = max(0.0, new_price - self.ebay_price)
+        competitor_penalty = competitor_gap * 0.01 * expected_sales
+        leftover = max(0.0, self.stock - expected_sales)
+        holding_penalty = leftover * self.holding_cost_per_unit
+
+        reward = float((profit - competitor_penalty - holding_penalty) / 1000.0)
+        self.selling_price = new_price
+
+        self.current_step += 1
+        done = self.current_step >= self.n_rows
+        if not done:
+            self._load_row(self.current_step)
+            obs = self.obs[self.current_step].copy()
+        else:
+            obs = np.zeros(self.n_features, dtype=np.float32)
+
+        info = {
+            "adjustment": adjustment,
+            "predicted_sales": expected_sales,
+            "profit": profit,
+            "competitor_penalty": competitor_penalty,
+            "holding_penalty": holding_penalty,
+            "new_price": new_price,
+        }
+        return obs, reward, done, info
+
+
+# -----------------------------
+# Natively batched VecEnv
+# -----------------------------
+class VecPricingEnv(VecEnv):
+    """
+    K independent pricing episodes simulated with one vectorized step.
+    Each episode starts at a random row and walks to the end of the dataset,
+    exactly like ArrayPricingEnv; finished episodes are auto-reset and
+    report `terminal_observation` in their info, as SB3 VecEnvs do.
+    Wrap in VecMonitor for episode statistics.
+    """
+
+    def __init__(self, num_envs=8, data_path=DATA_PATH, scaler_path=SCALER_PATH,
+                 max_price=None, elasticity=3.0, holding_cost_per_unit=0.5,
+                 min_margin=0.01, seed=None, arrays=None):
+        self.raw, self.obs, self.features = arrays or load_pricing_arrays(data_path, scaler_path)
+        self.n_rows = len(self.raw)
+        self.n_features = len(self.features)
+
+        _check_elasticity(elasticity, self.n_rows)
+        self.elasticity = elasticity
+        self.holding_cost_per_unit = holding_cost_per_unit
+        self.min_margin = min_margin
+        self.max_price = max_price
+        self.render_mode = None
+
+        observation_space = gymnasium.spaces.Box(low=0.0, high=1.0, shape=(self.n_features,), dtype=np.float32)
+        action_space = gymnasium.spaces.Box(low=ACTION_LOW, high=ACTION_HIGH, shape=(1,), dtype=np.float32)
+        super().__init__(num_envs, observation_space, action_space)
+
+        self.current_step = np.zeros(num_envs, dtype=np.int64)
+        self._actions = None
+        self._rng = np.random.default_rng(seed)
+
+    def seed(self, seed=None):
+        self._rng = np.random.default_rng(seed)
+        return [seed] * self.num_envs
+
+    def _random_starts(self, n):
+        return self._rng.integers(0, max(1, self.n_rows), size=n)
+
+    def reset_to(self, starts):
+        """Start every episode at the given row indices (for reproducible rollouts)."""
+        self.current_step = np.asarray(starts, dtype=np.int64).copy()
+        return self.obs[self.current_step].copy()
+
+    def reset(self):
+        if self._seeds[0] is not None:
+            self.seed(self._seeds[0])
+            self._reset_seeds()
+        return self.reset_to(self._random_starts(self.num_envs))
+
+    def step_async(self, actions):
+        self._actions = actions
+
+    def step_wait(self):
+        adjustment = np.clip(
+            np.asarray(self._actions, dtype=np.float64).reshape(self.num_envs, -1)[:, 0],
+            ACTION_LOW, ACTION_HIGH,
+        )
+        out = simulate_pricing_step(
+            adjustment, self.raw[self.current_step],
+            elasticity=self.elasticity[self.current_step] if np.ndim(self.elasticity) else self.elasticity,
+            holding_cost_per_unit=self.holding_cost_per_unit,
+            min_margin=self.min_margin,
+            max_price=self.max_price,
+        )
+
+        self.current_step += 1
+        dones = self.current_step >= self.n_rows
+        obs = np.zeros((self.num_envs, self.n_features), dtype=np.float32)
+        live = ~dones
+        obs[live] = self.obs[self.current_step[live]]
+
+        columns = [out[k].tolist() for k in INFO_KEYS]
+        infos = [dict(zip(INFO_KEYS, values)) for values in zip(*columns)]
+
+        done_idx = np.flatnonzero(dones)
+        if done_idx.size:
+            starts = self._random_starts(done_idx.size)
+            self.current_step[done_idx] = starts
+            for i in done_idx:
+                infos[i]["terminal_observation"] = obs[i].copy()
+            obs[done_idx] = self.obs[starts]
+
+        return obs, out["reward"].astype(np.float32), dones, infos
+
+    def close(self):
+        pass
+
+    def _indices(self, indices):
+        if indices is None:
+            return range(self.num_envs)
+        if isinstance(indices, int):
+            return [indices]
+        return indices
+
+    def get_attr(self, attr_name, indices=None):
+        return [getattr(self, attr_name) for _ in self._indices(indices)]
+
+    def set_attr(self, attr_name, value, indices=None):
+        setattr(self, attr_name, value)
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        method = getattr(self, method_name)
+        return [method(*method_args, **method_kwargs) for _ in self._indices(indices)]
+
+    def env_is_wrapped(self, wrapper_class, indices=None):
+        return [False for _ in self._indices(indices)]
@@ -1,75 +1,382 @@
-# visualize_rl_metrics.py
+# visualize_metrics.py
+import os
+import glob
+import math
+import time
+import struct
+import zipfile
+import argparse
+from collections import deque
+
 import numpy as np
-import pandas as pd
-import plotly.express as px
 import plotly.graph_objects as go
+from plotly.subplots import make_subplots
 
 # -----------------------------
-# Simulated Data (replace with logs from training if available)
+# Project paths (absolute)
 # -----------------------------
-episodes = np.arange(1, 201)
-rewards = np.random.normal(loc=200, scale=50, size=len(episodes)).cumsum() / np.arange(1, len(episodes) + 1)
-raw_rewards = np.random.normal(loc=200, scale=50, size=len(episodes))
-entropy = np.linspace(1.0, 0.2, len(episodes)) + np.random.normal(0, 0.05, len(episodes))
-times = np.linspace(0.1, 20, len(episodes))  # fake training times
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+LOGS_DIR = os.path.join(PROJECT_ROOT, "logs", "logs_pricing")
+
+HISTORY_POINTS = 5000  # points kept per metric for plotting; older ones are dropped
+WINDOW = 10            # moving average / variance window (log points)
+
+REWARD_TAG = "rollout/ep_rew_mean"
+EVAL_TAG = "evaluations/mean_reward"
+EVAL_STD_TAG = "evaluations/std_reward"
+ENTROPY_TAG = "train/entropy_loss"
+VALUE_LOSS_TAG = "train/value_loss"
+THROUGHPUT_TAG = "time/steps_per_sec"  # ThroughputCallback, per rollout
+FPS_TAG = "time/fps"                   # SB3, average since the start of training
+WALL_THROUGHPUT_TAG = "wall/steps_per_sec"  # derived from event timestamps
 
-# Compute metrics
-moving_avg = pd.Series(raw_rewards).rolling(window=10).mean()
-reward_variance = pd.Series(raw_rewards).rolling(window=10).var()
 
 # -----------------------------
-# 1. Reward Metrics
+# Incremental log readers
 # -----------------------------
+def _decode_event(record):
+    """One serialized Event -> [(tag, step, wall_time, value)] for its scalar summaries."""
+    from tensorboard.compat.proto import event_pb2  # installed with stable-baselines3[extra]
+
+    event = event_pb2.Event.FromString(record)
+    scalars = []
+    for v in event.summary.value:
+        kind = v.WhichOneof("value")
+        if kind == "simple_value":
+            value = v.simple_value
+        elif kind == "tensor" and v.tensor.float_val:
+            value = v.tensor.float_val[0]
+        else:
+            continue
+        scalars.append((v.tag, event.step, event.wall_time, float(value)))
+    return scalars
+
+
+class EventFileTail:
+    """
+    Reads a TensorBoard event file incrementally. Records are framed as
+    [u64 length][u32 crc][payload][u32 crc]; each poll reads only the bytes
+    appended since the last complete record, and a record still being written
+    is left for the next poll.
+    """
 
-# Cumulative Reward (Learning Curve)
-fig1 = px.line(x=episodes, y=rewards, title="Cumulative Reward / Return Over Episodes",
-               labels={"x": "Episode", "y": "Average Return"})
-fig1.show()
+    def __init__(self, path):
+        self.path = path
+        self.offset = 0
 
-# Moving Average of Rewards
-fig2 = px.line(x=episodes, y=moving_avg, title="Moving Average of Rewards (10-episode window)",
-               labels={"x": "Episode", "y": "Smoothed Reward"})
-fig2.show()
+    def poll(self):
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            data = f.read()
+        scalars = []
+        pos = 0
+        while pos + 12 <= len(data):
+            (length,) = struct.unpack_from("<Q", data, pos)
+            end = pos + 12 + length + 4
+            if end > len(data):
+                break
+            scalars.extend(_decode_event(data[pos + 12:pos + 12 + length]))
+            pos = end
+        self.offset += pos
+        return scalars
+
+
+class EvaluationsTail:
+    """
+    EvalCallback rewrites evaluations.npz in full after every evaluation, so
+    this tracks how many evaluations were already consumed and only emits the
+    new ones (mean and std of the episode rewards).
+    """
+
+    def __init__(self, path, not_before=0.0):
+        self.path = path
+        self.not_before = not_before  # older files belong to a previous run
+        self.seen = 0
+        self._stat = None
+
+    def poll(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return []
+        stat = (st.st_mtime_ns, st.st_size)
+        if stat == self._stat or st.st_mtime < self.not_before:
+            return []
+        try:
+            with np.load(self.path) as z:
+                timesteps, results = z["timesteps"], z["results"]
+        except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile):
+            return []  # caught mid-write; retry on the next poll
+        self._stat = stat
+        if len(timesteps) < self.seen:
+            self.seen = 0  # a new training run restarted the file
+
+        scalars = []
+        wall_time = st.st_mtime
+        for step, rewards in zip(timesteps[self.seen:].tolist(), results[self.seen:]):
+            scalars.append((EVAL_TAG, step, wall_time, float(np.mean(rewards))))
+            scalars.append((EVAL_STD_TAG, step, wall_time, float(np.std(rewards))))
+        self.seen = len(timesteps)
+        return scalars
 
-# Distribution of Rewards
-fig3 = px.histogram(raw_rewards, nbins=30, title="Distribution of Rewards Across Episodes",
-                    labels={"value": "Reward"}, color_discrete_sequence=["skyblue"])
-fig3.show()
 
 # -----------------------------
-# 2. Stability & Exploration Metrics
+# Bounded rolling aggregates
 # -----------------------------
+class RollingStats:
+    """Moving mean / variance over the last `window` values, O(1) per update."""
+
+    def __init__(self, window=WINDOW):
+        self.values = deque(maxlen=window)
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.count = 0  # all values seen
+
+    def add(self, value):
+        if len(self.values) == self.values.maxlen:
+            old = self.values[0]
+            self.total -= old
+            self.total_sq -= old * old
+        self.values.append(value)
+        self.total += value
+        self.total_sq += value * value
+        self.count += 1
+
+    @property
+    def mean(self):
+        return self.total / len(self.values) if self.values else math.nan
+
+    @property
+    def var(self):
+        n = len(self.values)
+        if n < 2:
+            return math.nan
+        return max(0.0, (self.total_sq - self.total * self.total / n) / (n - 1))
+
+
+class Series:
+    """Last HISTORY_POINTS points of one metric plus its rolling aggregates."""
+
+    def __init__(self, history=HISTORY_POINTS, window=WINDOW):
+        self.step = deque(maxlen=history)
+        self.wall = deque(maxlen=history)
+        self.value = deque(maxlen=history)
+        self.moving_avg = deque(maxlen=history)
+        self.variance = deque(maxlen=history)
+        self.stats = RollingStats(window)
+
+    def add(self, step, wall_time, value):
+        self.stats.add(value)
+        self.step.append(step)
+        self.wall.append(wall_time)
+        self.value.append(value)
+        self.moving_avg.append(self.stats.mean)
+        self.variance.append(self.stats.var)
+
+    @property
+    def last(self):
+        return self.value[-1] if self.value else math.nan
+
+
+class MetricsStore:
+    """
+    Series per tag, fed with (tag, step, wall_time, value) scalars. Also derives
+    wall-clock steps/sec from the timestamps at which new global steps appear,
+    so throughput is available even for runs without ThroughputCallback.
+    """
+
+    def __init__(self, history=HISTORY_POINTS, window=WINDOW):
+        self.history = history
+        self.window = window
+        self.series = {}
+        self.start_wall = None
+        self._last_step = None  # (step, wall_time) of the last new global step
 
-# Reward Variance
-fig4 = px.line(x=episodes, y=reward_variance, title="Reward Variance Over Episodes",
-               labels={"x": "Episode", "y": "Variance"})
-fig4.show()
+    def get(self, tag):
+        series = self.series.get(tag)
+        if series is None:
+            series = self.series[tag] = Series(self.history, self.window)
+        return series
 
-# Entropy of Policy
-fig5 = px.line(x=episodes, y=entropy, title="Entropy of Policy Over Episodes",
-               labels={"x": "Episode", "y": "Entropy"})
-fig5.show()
+    def add(self, scalars):
+        for tag, step, wall_time, value in scalars:
+            self.get(tag).add(step, wall_time, value)
+            if tag.startswith("evaluations/"):
+                continue  # npz mtime is not an event timestamp
+            if self.start_wall is None or wall_time < self.start_wall:
+                self.start_wall = wall_time
+            if self._last_step is None:
+                self._last_step = (step, wall_time)
+            elif step > self._last_step[0]:
+                prev_step, prev_wall = self._last_step
+                if wall_time > prev_wall:
+                    self.get(WALL_THROUGHPUT_TAG).add(step, wall_time, (step - prev_step) / (wall_time - prev_wall))
+                self._last_step = (step, wall_time)
+        return len(scalars)
 
+
+# -----------------------------
+# Log directory watcher
+# -----------------------------
+def latest_run(log_dir):
+    runs = [d for d in glob.glob(os.path.join(log_dir, "*_*")) if os.path.isdir(d)]
+    return max(runs, key=os.path.getmtime) if runs else None
+
+
+class TrainingLogs:
+    """
+    Tails one training run: every event file in `run_dir` (new files are
+    picked up as they appear) plus `log_dir/evaluations.npz`, which every run
+    overwrites and is therefore only read for the most recent run. Without an
+    explicit `run_dir` it follows the most recent run, switching (and starting
+    a fresh store) when a new one appears.
+    """
+
+    def __init__(self, log_dir=LOGS_DIR, run_dir=None, store=None):
+        self.log_dir = log_dir
+        self.follow_latest = run_dir is None
+        self._store_args = (store.history, store.window) if store else ()
+        self._open(run_dir or latest_run(log_dir), store)
+
+    def _open(self, run_dir, store=None):
+        self.run_dir = run_dir
+        self.store = store or MetricsStore(*self._store_args)
+        self._tails = {}
+        self._evaluations = None
+        if run_dir and run_dir == latest_run(self.log_dir):
+            self._evaluations = EvaluationsTail(os.path.join(self.log_dir, "evaluations.npz"),
+                                                not_before=os.path.getctime(run_dir))
+
+    def poll(self):
+        """Read whatever was appended since the last poll; returns the number of new points."""
+        if self.follow_latest:
+            latest = latest_run(self.log_dir)
+            if latest != self.run_dir:
+                self._open(latest)
+        scalars = []
+        if self.run_dir:
+            for path in sorted(glob.glob(os.path.join(self.run_dir, "events.out.tfevents.*"))):
+                tail = self._tails.get(path)
+                if tail is None:
+                    tail = self._tails[path] = EventFileTail(path)
+                scalars.extend(tail.poll())
+        scalars.sort(key=lambda s: (s[2], s[1]))
+        if self._evaluations is not None:
+            scalars.extend(self._evaluations.poll())
+        return self.store.add(scalars)
+
+
+# -----------------------------
+# Dashboard
 # -----------------------------
-# 3. Efficiency Metrics
+def _line(fig, series, attr, name, row, col, secondary_y=False, **kwargs):
+    fig.add_trace(go.Scatter(x=list(series.step), y=list(getattr(series, attr)), mode="lines",
+                             name=name, **kwargs), row=row, col=col, secondary_y=secondary_y)
+
+def summary_line(store):
+    reward = store.series.get(REWARD_TAG)
+    sps = store.series.get(THROUGHPUT_TAG) or store.series.get(WALL_THROUGHPUT_TAG)
+    evals = store.series.get(EVAL_TAG)
+    parts = []
+    if reward and reward.step:
+        parts.append(f"step {reward.step[-1]}")
+        parts.append(f"ep_rew_mean {reward.last:,.1f} (avg{store.window} {reward.stats.mean:,.1f})")
+    if evals and evals.value:
+        parts.append(f"eval {evals.last:,.1f}")
+    if sps and sps.value:
+        parts.append(f"{sps.last:,.0f} steps/sec (avg{store.window} {sps.stats.mean:,.0f})")
+    return " | ".join(parts) or "no metrics yet"
+
+def build_dashboard(store, title="PPO pricing agent"):
+    s = store.series
+    fig = make_subplots(
+        rows=3, cols=2,
+        specs=[[{"secondary_y": True}, {}], [{}, {}], [{}, {}]],
+        subplot_titles=(
+            "Episode reward vs training throughput", "Evaluation reward (mean ± std)",
+            f"Reward moving average ({store.window} points)", f"Reward variance ({store.window} points)",
+            "Reward vs wall-clock time", "Policy entropy / value loss",
+        ),
+    )
+    reward = s.get(REWARD_TAG)
+    throughput = s.get(THROUGHPUT_TAG) or s.get(WALL_THROUGHPUT_TAG)
+
+    if reward:
+        _line(fig, reward, "value", "ep_rew_mean", 1, 1)
+        _line(fig, reward, "moving_avg", "ep_rew_mean (moving avg)", 2, 1)
+        _line(fig, reward, "variance", "ep_rew_mean (variance)", 2, 2)
+        t0 = store.start_wall or 0.0
+        fig.add_trace(go.Scatter(x=[w - t0 for w in reward.wall], y=list(reward.value), mode="lines",
+                                 name="ep_rew_mean vs time"), row=3, col=1)
+        fig.update_xaxes(title_text="wall-clock seconds", row=3, col=1)
+    if throughput:
+        _line(fig, throughput, "value", "steps/sec", 1, 1, secondary_y=True, line=dict(dash="dot"))
+        fig.update_yaxes(title_text="steps/sec", row=1, col=1, secondary_y=True)
+    if s.get(FPS_TAG):
+        _line(fig, s[FPS_TAG], "value", "fps (since start)", 1, 1, secondary_y=True, line=dict(dash="dash"))
+    if s.get(EVAL_TAG):
+        std = s.get(EVAL_STD_TAG)
+        fig.add_trace(go.Scatter(
+            x=list(s[EVAL_TAG].step), y=list(s[EVAL_TAG].value), mode="lines+markers", name="eval mean reward",
+            error_y=dict(type="data", array=list(std.value)) if std else None), row=1, col=2)
+    if s.get(ENTROPY_TAG):
+        entropy = s[ENTROPY_TAG]
+        fig.add_trace(go.Scatter(x=list(entropy.step), y=[-v for v in entropy.value], mode="lines",
+                                 name="entropy"), row=3, col=2)
+    if s.get(VALUE_LOSS_TAG):
+        _line(fig, s[VALUE_LOSS_TAG], "value", "value loss", 3, 2, visible="legendonly")
+
+    fig.update_layout(title=f"{title}: {summary_line(store)}", height=1100)
+    return fig
+
+def write_dashboard(fig, path, refresh_s=None):
+    """Write a standalone HTML page; with `refresh_s` the browser reloads it periodically."""
+    html = fig.to_html(include_plotlyjs="cdn", full_html=True)
+    if refresh_s:
+        html = html.replace("<head>", f'<head><meta http-equiv="refresh" content="{int(refresh_s)}">', 1)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        f.write(html)
+    os.replace(tmp, path)  # never serve a half-written page
+
+
+# -----------------------------
+# CLI
 # -----------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Dashboard of PPO training metrics from TensorBoard logs")
+    parser.add_argument("--log-dir", default=LOGS_DIR, help="training log directory (tensorboard_log)")
+    parser.add_argument("--run", help="run directory name, e.g. PPO_3 (default: most recent)")
+    parser.add_argument("--out", help="dashboard HTML path (default: <log-dir>/dashboard.html)")
+    parser.add_argument("--window", type=int, default=WINDOW, help="moving average / variance window")
+    parser.add_argument("--history", type=int, default=HISTORY_POINTS, help="points kept per metric")
+    parser.add_argument("--follow", action="store_true", help="keep tailing the logs and updating the dashboard")
+    parser.add_argument("--interval", type=float, default=5.0, help="seconds between polls with --follow")
+    parser.add_argument("--show", action="store_true", help="open the dashboard in a browser")
+    args = parser.parse_args(argv)
+
+    run_dir = os.path.join(args.log_dir, args.run) if args.run else None
+    logs = TrainingLogs(args.log_dir, run_dir, MetricsStore(args.history, args.window))
+    if not logs.run_dir:
+        raise SystemExit(f"❌ No training runs in {args.log_dir}")
+    out = args.out or os.path.join(args.log_dir, "dashboard.html")
+
+    logs.poll()
+    print(f"Reading {logs.run_dir}")
+    fig = build_dashboard(logs.store, os.path.basename(logs.run_dir))
+    write_dashboard(fig, out, args.interval if args.follow else None)
+    print(f"✅ {summary_line(logs.store)} -> {out}")
+    if args.show:
+        fig.show()
+
+    while args.follow:
+        time.sleep(args.interval)
+        run_dir = logs.run_dir
+        if logs.poll():
+            if logs.run_dir != run_dir:
+                print(f"Reading {logs.run_dir}")
+            write_dashboard(build_dashboard(logs.store, os.path.basename(logs.run_dir)), out, args.interval)
+            print(f"✅ {summary_line(logs.store)}")
 
-# Training Time vs Performance
-fig6 = px.scatter(x=times, y=rewards, title="Training Time vs Performance",
-                  labels={"x": "Training Time (s)", "y": "Average Return"},
-                  color=episodes)
-fig6.show()
-
-# Sample Efficiency (Episodes to reach threshold)
-threshold = 180
-episodes_to_target = np.argmax(rewards >= threshold) if np.any(rewards >= threshold) else None
-
-fig7 = go.Figure()
-fig7.add_trace(go.Scatter(x=episodes, y=rewards, mode="lines", name="Return"))
-fig7.add_hline(y=threshold, line_dash="dash", line_color="red", annotation_text="Target Return")
-if episodes_to_target:
-    fig7.add_vline(x=episodes_to_target, line_dash="dot", line_color="green",
-                   annotation_text=f"Reached at Episode {episodes_to_target}")
-fig7.update_layout(title="Sample Efficiency: Episodes to Reach Target Return",
-                   xaxis_title="Episode", yaxis_title="Average Return")
-fig7.show()
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# Tests import the service modules as `src.<module>`, like the benchmarks do
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+DATA_PATH = os.path.join(PROJECT_ROOT, "data", "synthetic_ecommerce_data.csv")
+POLICY_PATH = os.path.join(PROJECT_ROOT, "models", "pricing_policy.npz")
+MODEL_PATH = os.path.join(PROJECT_ROOT, "models", "pricing_model.zip")
+SCALER_PATH = os.path.join(PROJECT_ROOT, "models", "scaler.pkl")
+
+
+@pytest.fixture(scope="session")
+def raw_features():
+    """(N, 9) float64 feature matrix of the shipped dataset."""
+    from src.evaluate_policy import load_raw
+    return load_raw(DATA_PATH)
+
+
+@pytest.fixture(scope="session")
+def shipped_engine():
+    from src.policy_engine import PolicyEngine
+    return PolicyEngine.load(POLICY_PATH)
+
+
+def random_engine(seed=0, sizes=(9, 32, 16, 1)):
+    """A small random tanh policy with an identity-like scaler, for unit tests."""
+    from src.policy_engine import PolicyEngine
+
+    rng = np.random.default_rng(seed)
+    weights = [rng.normal(0, 0.5, size=(a, b)) for a, b in zip(sizes[:-1], sizes[1:])]
+    biases = [rng.normal(0, 0.1, size=b) for b in sizes[1:]]
+    return PolicyEngine(
+        features=[f"f{i}" for i in range(sizes[0])],
+        scale=np.full(sizes[0], 0.01),
+        min_=np.zeros(sizes[0]),
+        weights=weights,
+        biases=biases,
+        action_low=np.array([-0.3]),
+        action_high=np.array([0.3]),
+    )
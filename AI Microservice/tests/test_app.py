@@ -0,0 +1,71 @@
+import csv
+import importlib
+import os
+
+import pytest
+
+pytest.importorskip("httpx")
+from fastapi.testclient import TestClient
+
+from conftest import DATA_PATH
+
+# Read at import time by app_fastapi: load the model before serving, skip the
+# file watcher, and turn the cache off so every row really goes through the model
+APP_ENV = {"EAGER_MODEL_LOAD": "1", "MODEL_WATCH_INTERVAL_S": "0", "PREDICT_CACHE_SIZE": "0"}
+
+
+@pytest.fixture(scope="module")
+def client():
+    saved = {k: os.environ.get(k) for k in APP_ENV}
+    os.environ.update(APP_ENV)
+    try:
+        app_module = importlib.import_module("src.app_fastapi")
+    finally:
+        for k, v in saved.items():
+            if v is None:
+                os.environ.pop(k, None)
+            else:
+                os.environ[k] = v
+    with TestClient(app_module.app) as c:
+        yield c
+
+
+def dataset_products(n):
+    """The first `n` rows of the dataset as /predict bodies, with some optional fields."""
+    with open(DATA_PATH, newline="") as f:
+        rows = [r for _, r in zip(range(n), csv.DictReader(f))]
+    products = []
+    for i, r in enumerate(rows):
+        p = {k: float(r[k]) for k in ("actual_price", "selling_price", "ebay_price", "stock",
+                                      "demand_index", "user_interest", "sales")}
+        p["day_of_week"], p["season"] = int(r["day_of_week"]), int(r["season"])
+        if i % 3 == 0:
+            p["category"] = "Electronics"
+        if i % 2 == 0:
+            p["product_name"] = r["product_name"]
+        products.append(p)
+    return products
+
+
+def test_predict_batch_matches_predict(client):
+    products = dataset_products(200)
+    batch = client.post("/predict_batch", json={"products": products})
+    assert batch.status_code == 200
+    predictions = batch.json()["predictions"]
+    assert len(predictions) == len(products)
+
+    for product, expected in zip(products, predictions):
+        single = client.post("/predict", json=product)
+        assert single.status_code == 200
+        assert single.json() == expected
+        assert single.headers["X-Model-Version"] == batch.headers["X-Model-Version"]
+
+
+def test_predict_batch_accepts_an_empty_list(client):
+    response = client.post("/predict_batch", json={"products": []})
+    assert response.status_code == 200 and response.json() == {"predictions": []}
+
+
+def test_invalid_product_is_rejected(client):
+    response = client.post("/predict", json={"actual_price": "cheap"})
+    assert response.status_code == 422
@@ -0,0 +1,83 @@
+import asyncio
+import time
+
+import numpy as np
+
+from src.batcher import MicroBatcher
+
+
+def doubled(X):
+    return (X[:, 0] * 2).tolist()
+
+
+def test_batcher_coalesces_concurrent_rows():
+    calls = []
+
+    def predict(X):
+        calls.append(len(X))
+        return doubled(X)
+
+    async def main():
+        batcher = MicroBatcher(predict, max_batch_size=8, max_wait_ms=5)
+        results = await asyncio.gather(*(batcher.submit(np.array([float(i)])) for i in range(20)))
+        return batcher, results
+
+    batcher, results = asyncio.run(main())
+    assert results == [2.0 * i for i in range(20)]
+    assert calls == [8, 8, 4]
+    assert batcher.stats()["requests"] == 20 and batcher.stats()["batches"] == 3
+    assert batcher.stats()["in_flight"] == 0
+
+
+def test_lone_request_does_not_wait_for_the_timer():
+    async def main():
+        batcher = MicroBatcher(doubled, max_batch_size=8, max_wait_ms=5000)
+        t0 = time.perf_counter()
+        result = await batcher.submit(np.array([1.5]))
+        return result, time.perf_counter() - t0
+
+    result, elapsed = asyncio.run(main())
+    assert result == 3.0
+    assert elapsed < 1.0
+
+
+def test_rows_queued_behind_a_batch_flush_when_it_finishes():
+    calls = []
+
+    def slow(X):
+        calls.append(len(X))
+        time.sleep(0.05)
+        return doubled(X)
+
+    async def main():
+        batcher = MicroBatcher(slow, max_batch_size=8, max_wait_ms=5000)
+        first = asyncio.ensure_future(batcher.submit(np.array([1.0])))
+        await asyncio.sleep(0.01)  # the first batch is running now
+        queued = [batcher.submit(np.array([float(i)])) for i in range(3)]
+        return await asyncio.wait_for(asyncio.gather(first, *queued), timeout=2.0)
+
+    assert asyncio.run(main()) == [2.0, 0.0, 2.0, 4.0]
+    assert calls == [1, 3]
+
+
+def test_batcher_propagates_errors_to_every_request():
+    def predict(X):
+        raise RuntimeError("boom")
+
+    async def main():
+        batcher = MicroBatcher(predict, max_batch_size=4, max_wait_ms=1)
+        return batcher, await asyncio.gather(*(batcher.submit(np.zeros(1)) for _ in range(3)),
+                                             return_exceptions=True)
+
+    batcher, results = asyncio.run(main())
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert batcher.errors == 1
+
+
+def test_rows_that_cannot_be_stacked_fail_their_requests():
+    async def main():
+        batcher = MicroBatcher(doubled, max_batch_size=2, max_wait_ms=1)
+        return await asyncio.gather(batcher.submit(np.zeros(1)), batcher.submit(np.zeros(2)),
+                                    return_exceptions=True)
+
+    assert all(isinstance(r, ValueError) for r in asyncio.run(main()))
@@ -0,0 +1,24 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("pandas")
+
+from conftest import POLICY_PATH
+from src import bulk_reprice
+from src.pricing import price_products, round_prices
+
+
+def test_round_prices_matches_python_round_on_half_way_values():
+    values = [1752.675, 6369.615, 0.285, 2.5]
+    assert round_prices(values).tolist() == [round(v, 2) for v in values]
+    assert round_prices(values).tolist() != np.round(values, 2).tolist()
+
+
+def test_bulk_rounding_matches_predict(raw_features):
+    bulk_reprice._init_worker(POLICY_PATH)
+    cols = bulk_reprice.reprice_block(raw_features)
+    out = price_products(bulk_reprice._engine, raw_features, elasticity=bulk_reprice._elasticities.default)
+    for name, digits in bulk_reprice.ROUNDING.items():
+        # /predict rounds every response field with Python's round()
+        assert cols[name].tolist() == [round(v, digits) for v in out[name].tolist()], name
+    assert cols["predicted_price"].tolist() == out["predicted_price"].tolist()
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from conftest import DATA_PATH, SCALER_PATH
+from src.elasticity_index import ElasticityIndex, row_elasticities
+from src.pricing import ELASTICITY
+
+
+@pytest.fixture
+def index():
+    return ElasticityIndex(default=2.5, product_name={"Asus ROG Zephyrus": 1.5}, category={"Books": 4.0})
+
+
+def test_lookup_prefers_product_then_category_then_default(index):
+    assert index.lookup(" asus rog zephyrus ", "Books") == 1.5
+    assert index.lookup("Unknown", "books") == 4.0
+    assert index.lookup("Unknown", None) == 2.5
+    np.testing.assert_array_equal(index.lookup_many(["Asus ROG Zephyrus", None], ["Books", "Books"]),
+                                  [1.5, 4.0])
+
+
+def test_empty_index_uses_the_global_elasticity():
+    index = ElasticityIndex()
+    assert index.empty and index.lookup("anything") == ELASTICITY
+
+
+def test_save_load_round_trip(tmp_path, index):
+    path = str(tmp_path / "elasticity_index.json")
+    index.save(path)
+    loaded = ElasticityIndex.load(path)
+    assert loaded.default == 2.5 and loaded.tables == index.tables
+    assert ElasticityIndex.load_or_default(str(tmp_path / "missing.json")).empty
+
+
+def test_row_elasticities_follow_the_dataset_rows(index):
+    pd = pytest.importorskip("pandas")
+    names = pd.read_csv(DATA_PATH, usecols=["product_name"])["product_name"]
+    e = row_elasticities(DATA_PATH, index)
+    assert e.shape == (len(names),)
+    np.testing.assert_array_equal(e, np.where(names == "Asus ROG Zephyrus", 1.5, 2.5))
+    assert row_elasticities(DATA_PATH, ElasticityIndex()) == ELASTICITY
+
+
+def test_env_uses_per_row_elasticity():
+    pytest.importorskip("gym")
+    from src.pricing import ENV_KWARGS, simulate_pricing_step
+    from src.vec_pricing_env import ArrayPricingEnv, load_pricing_arrays
+
+    arrays = load_pricing_arrays(DATA_PATH, SCALER_PATH)
+    elasticity = np.linspace(0.5, 5.0, len(arrays[0]))
+    env = ArrayPricingEnv(arrays=arrays, seed=0, **{**ENV_KWARGS, "elasticity": elasticity})
+    env.current_step = 10
+    env._load_row(10)
+    sales = [env.step(np.array([0.1], dtype=np.float32))[3]["predicted_sales"] for _ in range(5)]
+
+    expected = simulate_pricing_step(np.full(5, float(np.float32(0.1))), arrays[0][10:15],
+                                     **{**ENV_KWARGS, "elasticity": elasticity[10:15]})
+    np.testing.assert_allclose(sales, expected["predicted_sales"], rtol=1e-12)
+    with pytest.raises(ValueError):
+        ArrayPricingEnv(arrays=arrays, elasticity=elasticity[:-1])
@@ -0,0 +1,209 @@
+import math
+
+import numpy as np
+import pytest
+
+gym = pytest.importorskip("gym")
+pd = pytest.importorskip("pandas")
+joblib = pytest.importorskip("joblib")
+pytest.importorskip("stable_baselines3")
+
+from conftest import DATA_PATH, SCALER_PATH
+from src.env_continuous_pricing import ContinuousPricingEnv
+from src.pricing import ENV_KWARGS
+from src.vec_pricing_env import INFO_KEYS, ArrayPricingEnv, VecPricingEnv, load_pricing_arrays
+
+
+class LegacyPricingEnv:
+    """
+    Frozen copy of the pandas ContinuousPricingEnv that train_pricing_agent.py
+    trained on before ArrayPricingEnv replaced it. Do not update it to follow
+    the new envs: it is the behaviour they must keep.
+    """
+
+    def __init__(self, df, scaler, features, max_price=None, elasticity=3.0,
+                 holding_cost_per_unit=0.5, min_margin=0.01):
+        self.df = df
+        self.scaler = scaler
+        self.features = features
+        self.elasticity = elasticity
+        self.holding_cost_per_unit = holding_cost_per_unit
+        self.min_margin = min_margin
+        self.max_price = max_price
+        self.n_features = len(self.features)
+        self.action_space = gym.spaces.Box(low=-0.3, high=0.3, shape=(1,), dtype=np.float32)
+        self.current_step = 0
+
+    def reset_to(self, i):
+        self.current_step = i
+        row = self.df.iloc[self.current_step]
+        self._load_row(row)
+        return self._get_obs_from_row(row)
+
+    def _load_row(self, row):
+        self.actual_price = float(row.get("actual_price", 0.0))
+        self.selling_price = float(row.get("selling_price", 0.0))
+        self.ebay_price = float(row.get("ebay_price", 0.0))
+        self.stock = float(row.get("stock", 0.0))
+        self.demand_index = float(row.get("demand_index", 0.0))
+        self.user_interest = float(row.get("user_interest", 0.0))
+        self.sales = float(row.get("sales", 0.0))
+        self.day_of_week = int(row.get("day_of_week", 0))
+        self.season = int(row.get("season", 0))
+
+    def _get_obs_from_row(self, row):
+        vals = row[self.features].astype(float).values.reshape(1, -1)
+        obs = self.scaler.transform(vals)[0].astype(np.float32)
+        return obs
+
+    def _safe_action_to_scalar(self, action):
+        action_np = np.array(action, dtype=float).flatten()
+        raw = float(action_np[0]) if action_np.size > 0 else 0.0
+        low, high = float(self.action_space.low[0]), float(self.action_space.high[0])
+        return float(np.clip(raw, low, high))
+
+    def step(self, action):
+        adjustment = self._safe_action_to_scalar(action)
+        old_price = self.selling_price if self.selling_price > 0 else max(1.0, self.actual_price * (1 + self.min_margin))
+        new_price = old_price * (1.0 + adjustment)
+
+        min_allowed = max(self.actual_price * (1.0 + self.min_margin), 0.01)
+        if new_price < min_allowed:
+            new_price = min_allowed
+        if self.max_price is not None:
+            new_price = min(new_price, self.max_price)
+
+        demand_factor = max(0.0, (0.6 * self.demand_index + 0.4 * self.user_interest))
+        price_ratio = new_price / max(1e-6, old_price)
+        expected_sales = self.sales * demand_factor * math.exp(-self.elasticity * (price_ratio - 1.0))
+        expected_sales = max(0.0, expected_sales)
+
+        profit = (new_price - self.actual_price) * expected_sales
+        competitor_gap = max(0.0, new_price - self.ebay_price)
+        competitor_penalty = competitor_gap * 0.01 * expected_sales
+        leftover = max(0.0, self.stock - expected_sales)
+        holding_penalty = leftover * self.holding_cost_per_unit
+
+        reward = float((profit - competitor_penalty - holding_penalty) / 1000.0)
+        self.selling_price = new_price
+
+        self.current_step += 1
+        done = self.current_step >= len(self.df)
+        if not done:
+            row = self.df.iloc[self.current_step]
+            self._load_row(row)
+            obs = self._get_obs_from_row(row)
+        else:
+            obs = np.zeros(self.n_features, dtype=np.float32)
+
+        info = {
+            "adjustment": adjustment,
+            "predicted_sales": expected_sales,
+            "profit": profit,
+            "competitor_penalty": competitor_penalty,
+            "holding_penalty": holding_penalty,
+            "new_price": new_price,
+        }
+        return obs, reward, done, info
+
+
+@pytest.fixture(scope="module")
+def arrays():
+    return load_pricing_arrays(DATA_PATH, SCALER_PATH)
+
+
+@pytest.fixture(scope="module")
+def legacy_env():
+    meta = joblib.load(SCALER_PATH)
+    df = pd.read_csv(DATA_PATH).reset_index(drop=True)
+    return LegacyPricingEnv(df, meta["scaler"], meta["features"])
+
+
+def rollout(env, start, actions):
+    """(obs, reward, done, info) per step of an env started at row `start`."""
+    if isinstance(env, LegacyPricingEnv):
+        steps = [(env.reset_to(start), None, False, None)]
+    else:
+        env.current_step = start
+        env._load_row(start)
+        steps = [(env.obs[start].copy(), None, False, None)]
+    for a in actions:
+        steps.append(env.step(np.array([a], dtype=np.float32)))
+        if steps[-1][2]:
+            break
+    return steps
+
+
+def assert_same_steps(steps, expected):
+    assert len(steps) == len(expected)
+    for (obs, reward, done, info), (e_obs, e_reward, e_done, e_info) in zip(steps, expected):
+        np.testing.assert_allclose(obs, e_obs, rtol=0, atol=1e-6)
+        assert done == e_done
+        if e_info is None:
+            continue
+        assert reward == pytest.approx(e_reward, rel=1e-12, abs=1e-12)
+        for key in INFO_KEYS:
+            assert info[key] == pytest.approx(e_info[key], rel=1e-12, abs=1e-9), key
+
+
+@pytest.mark.parametrize("start, n_steps", [(0, 200), (700, 200), (-40, 60)])
+def test_array_env_matches_the_original_env(arrays, legacy_env, start, n_steps):
+    start %= len(arrays[0])
+    # Include out-of-range actions: both envs clip them to the action space
+    actions = np.random.default_rng(start).uniform(-0.5, 0.5, size=n_steps)
+    expected = rollout(legacy_env, start, actions)
+    steps = rollout(ArrayPricingEnv(arrays=arrays, seed=0), start, actions)
+    assert_same_steps(steps, expected)
+    if start + n_steps > len(arrays[0]):
+        assert steps[-1][2]  # ran off the end of the data
+
+
+def test_array_env_matches_the_original_env_with_a_price_cap(arrays, legacy_env):
+    actions = np.full(50, 0.3)
+    legacy_env.max_price = 5000.0
+    try:
+        expected = rollout(legacy_env, 100, actions)
+    finally:
+        legacy_env.max_price = None
+    assert_same_steps(rollout(ArrayPricingEnv(arrays=arrays, max_price=5000.0), 100, actions), expected)
+
+
+def test_vec_env_matches_independent_array_envs(arrays):
+    starts = np.array([0, 17, 400, 1200])
+    n_steps = 50
+    actions = np.random.default_rng(1).uniform(-0.3, 0.3, size=(n_steps, len(starts))).astype(np.float32)
+
+    venv = VecPricingEnv(len(starts), arrays=arrays, seed=0, **ENV_KWARGS)
+    obs = venv.reset_to(starts)
+    np.testing.assert_array_equal(obs, arrays[1][starts])
+    vec_steps = []
+    for a in actions:
+        obs, rewards, dones, infos = venv.step(a[:, None])
+        assert not dones.any()
+        vec_steps.append((obs, rewards, infos))
+
+    for k, start in enumerate(starts):
+        steps = rollout(ArrayPricingEnv(arrays=arrays, seed=0, **ENV_KWARGS), start, actions[:, k])[1:]
+        for (obs, rewards, infos), (e_obs, e_reward, _, e_info) in zip(vec_steps, steps):
+            np.testing.assert_array_equal(obs[k], e_obs)
+            assert rewards[k] == pytest.approx(e_reward, rel=1e-5)
+            for key in INFO_KEYS:
+                assert infos[k][key] == pytest.approx(e_info[key], rel=1e-12, abs=1e-9)
+
+
+def test_vec_env_auto_resets_at_end_of_data(arrays):
+    n_rows = len(arrays[0])
+    venv = VecPricingEnv(2, arrays=arrays, seed=0, **ENV_KWARGS)
+    venv.reset_to([n_rows - 1, 0])
+    _, _, dones, infos = venv.step(np.zeros((2, 1)))
+    assert dones.tolist() == [True, False]
+    assert "terminal_observation" in infos[0] and "terminal_observation" not in infos[1]
+
+
+def test_seeded_envs_start_at_the_same_rows(arrays):
+    a = [ArrayPricingEnv(arrays=arrays, seed=7).reset() for _ in range(2)]
+    np.testing.assert_array_equal(a[0], a[1])
+
+
+def test_continuous_pricing_env_is_the_array_env():
+    assert issubclass(ContinuousPricingEnv, ArrayPricingEnv)
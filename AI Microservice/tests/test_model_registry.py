@@ -0,0 +1,65 @@
+import os
+
+import pytest
+
+from conftest import random_engine
+from src.model_registry import DEFAULT_VERSION, ModelRegistry
+
+
+@pytest.fixture
+def registry_dir(tmp_path):
+    random_engine(seed=0).save(str(tmp_path / "a.npz"))
+    random_engine(seed=1).save(str(tmp_path / "b.npz"))
+    return tmp_path
+
+
+def test_registry_loads_every_bundle(registry_dir):
+    registry = ModelRegistry(str(registry_dir), default_version="a")
+    report = registry.reload()
+    assert report["loaded"] == ["a", "b"] and not report["errors"]
+    assert registry.get().name == "a"
+    assert registry.get("b").engine.precision == "float32"
+    assert registry.reload()["unchanged"] == ["a", "b"]
+
+
+def test_registry_drains_replaced_bundle_before_freeing_it(registry_dir):
+    retired = []
+    registry = ModelRegistry(str(registry_dir), default_version="a", on_retire=retired.append)
+    registry.reload()
+
+    with registry.use("a") as old:
+        old_version = old.version
+        random_engine(seed=2).save(str(registry_dir / "a.npz"))
+        assert registry.reload()["loaded"] == ["a"]
+        # The in-flight request keeps its bundle until it finishes
+        assert old.retired and old.engine is not None and not retired
+        assert registry.get("a").version != old_version
+    assert retired == [old] and old.engine is None
+
+
+def test_registry_keeps_serving_when_a_file_is_broken(registry_dir):
+    registry = ModelRegistry(str(registry_dir), default_version="a")
+    registry.reload()
+    before = registry.get("b")
+    with open(registry_dir / "b.npz", "wb") as f:
+        f.write(b"not an npz")
+    report = registry.reload()
+    assert "b" in report["errors"]
+    assert registry.get("b") is before
+
+
+def test_registry_removes_deleted_versions_but_not_the_default(tmp_path, registry_dir):
+    (tmp_path / "models").mkdir()
+    default_path = str(tmp_path / "models" / "pricing_policy.npz")
+    random_engine(seed=3).save(default_path)
+    registry = ModelRegistry(str(registry_dir), default_path)
+    registry.reload()
+    assert set(registry.versions()) == {"a", "b", DEFAULT_VERSION}
+
+    os.remove(registry_dir / "b.npz")
+    os.remove(default_path)
+    report = registry.reload()
+    assert report["removed"] == ["b"]
+    assert registry.get(DEFAULT_VERSION) is not None
+    with pytest.raises(KeyError):
+        registry.acquire("b")
@@ -0,0 +1,57 @@
+import os
+
+import numpy as np
+import pytest
+
+from conftest import MODEL_PATH, SCALER_PATH, random_engine
+from src.policy_engine import PolicyEngine
+
+
+# -----------------------------
+# Parity with the trained PPO actor
+# -----------------------------
+@pytest.mark.skipif(not os.path.exists(MODEL_PATH), reason="no trained pricing_model.zip")
+def test_engine_matches_ppo_predict_on_whole_dataset(raw_features, shipped_engine):
+    joblib = pytest.importorskip("joblib")
+    torch = pytest.importorskip("torch")
+    sb3 = pytest.importorskip("stable_baselines3")
+
+    model = sb3.PPO.load(MODEL_PATH, device="cpu")
+    meta = joblib.load(SCALER_PATH)
+    obs = meta["scaler"].transform(raw_features).astype(np.float32)
+    expected, _ = model.predict(obs, deterministic=True)
+    with torch.no_grad():
+        expected_raw = model.policy._predict(torch.as_tensor(obs), deterministic=True).numpy()
+
+    np.testing.assert_allclose(shipped_engine.predict(raw_features), expected, rtol=0, atol=1e-5)
+    # Clipping to the action bounds can hide drift, so compare the mean too
+    unclipped = shipped_engine.forward(shipped_engine.transform(raw_features), clip=False)
+    np.testing.assert_allclose(unclipped, expected_raw, rtol=0, atol=1e-5)
+
+
+def test_transform_matches_minmax_scaler(raw_features, shipped_engine):
+    joblib = pytest.importorskip("joblib")
+    scaler = joblib.load(SCALER_PATH)["scaler"]
+    np.testing.assert_allclose(shipped_engine.transform(raw_features),
+                               scaler.transform(raw_features).astype(np.float32), rtol=0, atol=1e-6)
+
+
+def test_predict_is_clipped_to_action_space():
+    engine = random_engine()
+    X = np.random.default_rng(1).uniform(-1e4, 1e4, size=(500, 9))
+    actions = engine.predict(X)
+    assert actions.shape == (500, 1)
+    assert actions.min() >= -0.3 and actions.max() <= 0.3
+
+
+def test_save_load_round_trip(tmp_path):
+    engine = random_engine()
+    path = str(tmp_path / "policy.npz")
+    engine.save(path)
+    loaded = PolicyEngine.load(path)
+
+    X = np.random.default_rng(2).uniform(0, 200, size=(64, 9))
+    np.testing.assert_array_equal(loaded.predict(X), engine.predict(X))
+    assert loaded.features == engine.features
+    assert loaded.precision == "float32"
+    assert not os.path.exists(str(tmp_path / "policy.tmp.npz"))
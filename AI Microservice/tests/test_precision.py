@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from conftest import random_engine
+from src.model_registry import ModelRegistry
+from src.policy_engine import PRECISIONS, PolicyEngine
+
+
+@pytest.mark.parametrize("precision, atol", [("float16", 1e-2), ("int8", 5e-2)])
+def test_quantized_outputs_stay_close(precision, atol):
+    engine = random_engine()
+    quantized = engine.with_precision(precision)
+    obs = np.random.default_rng(3).uniform(0, 1, size=(1000, 9)).astype(np.float32)
+
+    assert quantized.precision == precision
+    diff = np.abs(quantized.forward(obs, clip=False) - engine.forward(obs, clip=False))
+    assert diff.max() < atol
+    assert diff.max() > 0  # really runs on the reduced weights
+
+
+def test_quantized_weights_use_less_memory():
+    engine = random_engine()
+    sizes = {p: engine.with_precision(p).weight_bytes for p in PRECISIONS}
+    assert sizes["float32"] > sizes["float16"] > sizes["int8"]
+
+
+def test_int8_scales_are_per_output_unit():
+    engine = random_engine().with_precision("int8")
+    for w, s in zip(engine.weights, engine.scales):
+        assert w.dtype == np.int8
+        assert s.shape == (w.shape[1],)
+        assert np.abs(w).max() == 127  # the largest weight of some column maps to the full range
+
+
+@pytest.mark.parametrize("precision", ["float16", "int8"])
+def test_saved_precision_is_kept_and_can_be_overridden(tmp_path, precision):
+    engine = random_engine().with_precision(precision)
+    path = str(tmp_path / "q.npz")
+    engine.save(path)
+
+    X = np.random.default_rng(4).uniform(0, 200, size=(32, 9))
+    loaded = PolicyEngine.load(path)
+    assert loaded.precision == precision
+    np.testing.assert_array_equal(loaded.predict(X), engine.predict(X))
+
+    widened = PolicyEngine.load(path, "float32")
+    assert widened.precision == "float32"
+    np.testing.assert_allclose(widened.predict(X), engine.predict(X), rtol=0, atol=1e-6)
+
+
+def test_unknown_precision_is_rejected():
+    with pytest.raises(ValueError):
+        random_engine().with_precision("int4")
+
+
+def test_quantized_shipped_policy_serves_the_same_prices(raw_features, shipped_engine):
+    from src.pricing import price_products
+
+    reference = price_products(shipped_engine, raw_features)
+    for precision in ("float16", "int8"):
+        out = price_products(shipped_engine.with_precision(precision), raw_features)
+        np.testing.assert_allclose(out["predicted_price"], reference["predicted_price"], rtol=1e-3)
+
+
+def test_registry_keeps_or_forces_precision(tmp_path):
+    random_engine(seed=0).save(str(tmp_path / "a.npz"))
+    random_engine(seed=4).with_precision("int8").save(str(tmp_path / "q.npz"))
+    kept = ModelRegistry(str(tmp_path), default_version="a")
+    kept.reload()
+    assert kept.get("q").engine.precision == "int8"
+    assert kept.get("a").engine.precision == "float32"
+
+    forced = ModelRegistry(str(tmp_path), default_version="a", precision="float16")
+    forced.reload()
+    assert {b["precision"] for b in forced.versions().values()} == {"float16"}
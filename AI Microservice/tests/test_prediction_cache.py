@@ -0,0 +1,66 @@
+import time
+
+import numpy as np
+import pytest
+
+from src.prediction_cache import PredictionCache
+from src.pricing import COL, FEATURES
+
+
+def row(price=100.0):
+    x = np.zeros(len(FEATURES))
+    x[COL["selling_price"]] = price
+    return x
+
+
+def test_cache_hit_miss_and_lru_eviction():
+    cache = PredictionCache(max_entries=2)
+    assert cache.get(row(1), "v") is None
+    cache.put(row(1), "v", "a")
+    cache.put(row(2), "v", "b")
+    assert cache.get(row(1), "v") == "a"  # row 1 is now the most recent
+    cache.put(row(3), "v", "c")
+    assert cache.get(row(2), "v") is None
+    assert cache.get(row(1), "v") == "a" and cache.get(row(3), "v") == "c"
+    assert cache.evictions == 1
+
+
+def test_cache_keys_are_exact_by_default():
+    cache = PredictionCache()
+    cache.put(row(123.45), "v", "a")
+    assert cache.get(row(123.451), "v") is None
+    np.testing.assert_array_equal(cache.quantize(row(123.451)[None, :]), row(123.451)[None, :])
+
+
+def test_cache_keys_on_version_and_category():
+    cache = PredictionCache()
+    cache.put(row(), "v1", "a", category=0)
+    assert cache.get(row(), "v2") is None
+    assert cache.get(row(), "v1", category=1) is None
+    assert cache.get(row(), "v1", category=0) == "a"
+
+
+def test_cache_entries_expire():
+    cache = PredictionCache(ttl_s=0.01)
+    cache.put(row(), "v", "a")
+    time.sleep(0.02)
+    assert cache.get(row(), "v") is None
+    assert cache.expirations == 1
+
+
+def test_cache_retain_versions_drops_and_refuses_stale_entries():
+    cache = PredictionCache()
+    cache.put(row(), "old", "a")
+    cache.retain_versions(["new"])
+    assert cache.get(row(), "old") is None
+    cache.put(row(), "old", "a")  # a request that finished on the replaced model
+    assert cache.get(row(), "old") is None
+
+
+def test_cache_quantization_keeps_on_grid_values():
+    cache = PredictionCache(quantize=True, price_step=0.01, index_step=1e-4)
+    X = row(123.45)[None, :]
+    X[0, COL["demand_index"]] = 0.123449
+    q = cache.quantize(X)
+    assert q[0, COL["selling_price"]] == 123.45
+    assert q[0, COL["demand_index"]] == pytest.approx(0.1234)
@@ -0,0 +1,110 @@
+import json
+
+import numpy as np
+import pytest
+
+from src.pricing import COL, FEATURES
+from src.rule_engine import RULES_PATH, RuleSet, load_rules
+
+
+def legacy_rules(price, x):
+    """The hard-coded cascade app_fastapi.apply_pricing_rules used before config/pricing_rules.json."""
+    ebay, stock, demand = x[COL["ebay_price"]], x[COL["stock"]], x[COL["demand_index"]]
+    interest, actual = x[COL["user_interest"]], x[COL["actual_price"]]
+    rule = "none"
+    if price > ebay * 1.05:
+        price = ebay * 1.05
+        rule = "cap_above_competitor"
+    if stock > 50 and demand < 0.5:
+        price = min(price, ebay * 0.95)
+        rule = "stock_clearance_discount"
+    if demand > 0.8 and interest > 0.7:
+        price *= 1.1
+        rule = "high_demand_premium"
+    if price < actual:
+        price = actual
+        rule = "min_price_safeguard"
+    return price, rule
+
+
+def random_products(n, seed=0):
+    """Rows that straddle every rule threshold, with policy prices around the competitor's."""
+    rng = np.random.default_rng(seed)
+    X = np.zeros((n, len(FEATURES)))
+    X[:, COL["actual_price"]] = rng.uniform(50, 150, n)
+    X[:, COL["selling_price"]] = rng.uniform(60, 200, n)
+    X[:, COL["ebay_price"]] = rng.uniform(50, 200, n)
+    X[:, COL["stock"]] = rng.integers(0, 100, n)
+    X[:, COL["demand_index"]] = rng.choice([0.2, 0.5, 0.65, 0.8, 0.95], n)
+    X[:, COL["user_interest"]] = rng.choice([0.3, 0.7, 0.9], n)
+    X[:, COL["sales"]] = rng.integers(0, 50, n)
+    prices = X[:, COL["ebay_price"]] * rng.uniform(0.7, 1.3, n)
+    return X, prices
+
+
+@pytest.fixture(scope="module")
+def rules():
+    return load_rules(FEATURES, RULES_PATH)
+
+
+def test_vectorized_rules_match_legacy_cascade(rules):
+    X, prices = random_products(5000)
+    adjusted, rule, _ = rules.apply(prices, X)
+    for i in range(len(X)):
+        expected_price, expected_rule = legacy_rules(prices[i], X[i])
+        assert rules.rule_names[rule[i]] == expected_rule
+        assert adjusted[i] == pytest.approx(expected_price, rel=1e-12)
+
+
+def test_scalar_rules_match_legacy_cascade(rules):
+    X, prices = random_products(2000, seed=1)
+    for x, price in zip(X, prices):
+        adjusted, rule, _ = rules.apply_one(float(price), x.tolist())
+        expected_price, expected_rule = legacy_rules(price, x)
+        assert rules.rule_names[rule] == expected_rule
+        assert adjusted == pytest.approx(expected_price, rel=1e-12)
+
+
+def test_every_rule_is_exercised(rules):
+    X, prices = random_products(5000)
+    _, rule, _ = rules.apply(prices, X)
+    assert set(rules.rule_names[np.unique(rule)]) == set(rules.rule_names)
+
+
+def test_rules_fired_lists_every_rule_in_order(rules):
+    x = np.zeros(len(FEATURES))
+    x[COL["actual_price"]], x[COL["ebay_price"]] = 100.0, 100.0
+    x[COL["stock"]], x[COL["demand_index"]] = 80, 0.2
+    # cap (>105) -> clearance (min(105, 95)) -> safeguard (95 < 100)
+    price, rule, fired = rules.apply_one(150.0, x.tolist())
+    assert price == 100.0
+    assert rules.rule_names[rule] == "min_price_safeguard"
+    assert rules.fired_names(fired) == ["cap_above_competitor", "stock_clearance_discount",
+                                        "min_price_safeguard"]
+
+
+def test_category_overrides(rules):
+    with open(RULES_PATH) as f:
+        config = json.load(f)
+    config["categories"] = {
+        "Electronics": {"cap_above_competitor": {"competitor_ratio": 1.2}},
+        "Books": {"cap_above_competitor": {"enabled": False}},
+    }
+    ruleset = RuleSet(config, FEATURES)
+
+    x = np.zeros(len(FEATURES))
+    x[COL["actual_price"]], x[COL["ebay_price"]] = 10.0, 100.0
+    codes = [ruleset.category_code(c) for c in ("electronics ", "Books", "Toys", None)]
+    X = np.tile(x, (4, 1))
+    adjusted, _, _ = ruleset.apply(np.full(4, 150.0), X, np.array(codes))
+    np.testing.assert_allclose(adjusted, [120.0, 150.0, 105.0, 105.0])
+    for code, expected in zip(codes, adjusted):
+        assert ruleset.apply_one(150.0, x.tolist(), code)[0] == pytest.approx(expected)
+
+
+def test_unknown_rule_override_is_rejected():
+    with open(RULES_PATH) as f:
+        config = json.load(f)
+    config["categories"] = {"Books": {"no_such_rule": {"enabled": False}}}
+    with pytest.raises(ValueError):
+        RuleSet(config, FEATURES)
@@ -1,54 +1,63 @@
 import Product from "../models/Product.js";
-import { getPredictedPrice } from "../utils/predictor.js";
+import { featureHash, tryPredictPrices } from "../utils/predictor.js";
+import { markDirty } from "../workers/repricer.js";
+
+// Store a fresh prediction, or flag the product for the re-pricing worker.
+// Without a prediction features_hash / priced_at are left as they were, so
+// the worker does not mistake the product for an up-to-date one.
+function applyPrediction(product, price) {
+	if (price === null) {
+		product.price_dirty = true;
+		return false;
+	}
+	product.predicted_price = price;
+	product.features_hash = featureHash(product); // hash the cast values
+	product.priced_at = new Date();
+	product.price_dirty = false;
+	return true;
+}
 
 // Create new product
 export const createProduct = async (req, res) => {
 	try {
 		const productData = req.body;
 
-		// Call ML model for predicted price
-		const predicted_price = await getPredictedPrice(productData);
+		// Call ML model for predicted price (null if the service is unavailable)
+		const [predicted_price] = await tryPredictPrices([productData]);
 
-		const newProduct = new Product({
-			...productData,
-			predicted_price,
-		});
+		// Until it is priced, show the selling price
+		const newProduct = new Product({ ...productData, predicted_price: productData.selling_price });
+		const priced = applyPrediction(newProduct, predicted_price);
 
 		await newProduct.save();
+		if (!priced) markDirty([newProduct._id]);
 		res.status(201).json(newProduct);
 	} catch (error) {
 		res.status(500).json({ error: error.message });
 	}
 };
 
-// Update product & auto-refresh predicted_price
+// Update product; re-priced only when a pricing feature changed
 export const updateProduct = async (req, res) => {
 	try {
 		const productId = req.params.id;
 		let product = await Product.findById(productId);
 		if (!product) return res.status(404).json({ message: "Product not found" });
 
+		const before = featureHash(product);
+
 		// Merge updates from request
 		Object.assign(product, req.body);
 
-		// Prepare clean data for predictor
-		const productData = {
-			actual_price: product.actual_price,
-			selling_price: product.selling_price,
-			ebay_price: product.ebay_price,
-			stock: product.stock,
-			demand_index: product.demand_index,
-			user_interest: product.user_interest,
-			sales: product.sales,
-			day_of_week: product.day_of_week,
-			season: product.season,
-		};
-
-		// Recalculate predicted price
-		product.predicted_price = await getPredictedPrice(productData);
+		let priced = true;
+		if (featureHash(product) !== before) {
+			const [predicted_price] = await tryPredictPrices([product]);
+			priced = applyPrediction(product, predicted_price);
+		}
 
 		// Save back to MongoDB
 		await product.save();
+		if (!priced) markDirty([product._id]);
 		res.json(product);
 	} catch (error) {
 		res.status(500).json({ error: error.message });
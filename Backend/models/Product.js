@@ -25,6 +25,9 @@ const productSchema = new mongoose.Schema(
 		image_url: { type: String }, // 📌 display only
 		reviews: [reviewSchema], // 📌 display only
 		predicted_price: { type: Number, default: 0 }, // 📌 stored at root
+		features_hash: { type: String }, // pricing features the predicted_price was computed from
+		price_dirty: { type: Boolean, default: false, index: true }, // needs re-pricing
+		priced_at: { type: Date },
 	},
 	{ timestamps: true }
 );
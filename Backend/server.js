@@ -2,6 +2,7 @@ import express from "express";
 import mongoose from "mongoose";
 import dotenv from "dotenv";
 import products from "./routes/products.js"; // ✅ default export router
+import { startRepricer } from "./workers/repricer.js";
 
 import cors from "cors";
 import dns from "dns";
@@ -50,6 +51,8 @@ mongoose
 	})
 	.then(() => {
 		console.log("MongoDB connected");
+		// Background re-pricing of products whose pricing features changed
+		if (process.env.REPRICER_ENABLED !== "0") startRepricer();
 		app.listen(process.env.PORT || 5000, () => {
 			console.log(`Server running on port ${process.env.PORT || 5000}`);
 		});
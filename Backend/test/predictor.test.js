@@ -0,0 +1,91 @@
+// Run with `npm test`. Prices through a fake /predict_batch that, like the
+// FastAPI service, rejects the whole batch with 422 if any product is invalid.
+import assert from "node:assert/strict";
+import http from "node:http";
+import { after, before, test } from "node:test";
+
+const FLOAT_FIELDS = ["actual_price", "selling_price", "ebay_price", "stock", "demand_index", "user_interest", "sales"];
+const INT_FIELDS = ["day_of_week", "season"];
+const STRING_FIELDS = ["category", "product_name"];
+
+function validProduct(p) {
+	return (
+		FLOAT_FIELDS.every((k) => typeof p[k] === "number") &&
+		INT_FIELDS.every((k) => p[k] === undefined || Number.isInteger(p[k])) &&
+		STRING_FIELDS.every((k) => p[k] === undefined || p[k] === null || typeof p[k] === "string")
+	);
+}
+
+const received = []; // products of every accepted batch
+let server;
+let predictor;
+
+before(async () => {
+	server = http.createServer((req, res) => {
+		let body = "";
+		req.on("data", (chunk) => (body += chunk));
+		req.on("end", () => {
+			const { products } = JSON.parse(body);
+			if (!products.every(validProduct)) {
+				res.writeHead(422, { "content-type": "application/json" });
+				return res.end(JSON.stringify({ detail: "invalid product" }));
+			}
+			received.push(...products);
+			res.writeHead(200, { "content-type": "application/json" });
+			res.end(JSON.stringify({ predictions: products.map((p) => ({ predicted_price: p.selling_price * 2 })) }));
+		});
+	});
+	await new Promise((resolve) => server.listen(0, "127.0.0.1", resolve));
+	process.env.FASTAPI_URL = `http://127.0.0.1:${server.address().port}/predict`;
+	process.env.PREDICTOR_RETRIES = "0";
+	predictor = await import("../utils/predictor.js");
+});
+
+after(() => server.close());
+
+const product = (overrides = {}) => ({
+	name: "Widget",
+	actual_price: 80,
+	selling_price: 100,
+	ebay_price: 110,
+	stock: 20,
+	demand_index: 0.5,
+	user_interest: 0.6,
+	sales: 12,
+	day_of_week: 2,
+	season: 1,
+	...overrides,
+});
+
+test("one invalid product does not fail the rest of its batch", async () => {
+	const products = [
+		product({ selling_price: 10 }),
+		product({ selling_price: 20, season: 1.5 }), // not an integer
+		product({ selling_price: 30, day_of_week: 9 }), // out of range
+		product({ selling_price: 40, stock: " " }), // blank
+		product({ selling_price: 50, category: 42 }), // not a string: dropped, still priced
+		product({ selling_price: "60" }), // numeric string: sent as a number
+	];
+	const prices = await predictor.tryPredictPrices(products);
+	assert.deepEqual(prices, [20, null, null, null, 100, 120]);
+	assert.equal(predictor.predictorStats().errors, 0);
+});
+
+test("canPredict mirrors the service's Product model", () => {
+	assert.ok(predictor.canPredict(product()));
+	assert.ok(predictor.canPredict(product({ day_of_week: undefined, season: null })));
+	assert.ok(predictor.canPredict(product({ season: "3" })));
+	assert.ok(!predictor.canPredict(product({ season: 4 })));
+	assert.ok(!predictor.canPredict(product({ day_of_week: 2.5 })));
+	assert.ok(!predictor.canPredict(product({ sales: undefined })));
+	assert.ok(!predictor.canPredict(product({ ebay_price: Infinity })));
+	assert.ok(!predictor.canPredict(product({ demand_index: true })));
+});
+
+test("the product name is sent for the per-product elasticity", async () => {
+	received.length = 0;
+	await predictor.tryPredictPrices([product({ name: "Asus ROG Zephyrus", category: "Electronics" })]);
+	assert.equal(received.length, 1);
+	assert.equal(received[0].product_name, "Asus ROG Zephyrus");
+	assert.equal(received[0].category, "Electronics");
+});
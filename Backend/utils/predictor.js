@@ -1,25 +1,252 @@
 // predictor.js
+import http from "http";
+import crypto from "crypto";
+import https from "https";
 import axios from "axios";
 import dotenv from "dotenv";
 dotenv.config();
 
-export async function getPredictedPrice(productData) {
-	try {
-		const response = await axios.post(`${process.env.FASTAPI_URL}`, {
-			actual_price: productData.actual_price,
-			selling_price: productData.selling_price,
-			ebay_price: productData.ebay_price,
-			stock: productData.stock,
-			demand_index: productData.demand_index,
-			user_interest: productData.user_interest,
-			sales: productData.sales,
-			day_of_week: productData.day_of_week,
-			season: productData.season,
+// -----------------------------
+// Config
+// -----------------------------
+// FASTAPI_URL is the /predict endpoint; batches go to FASTAPI_BATCH_URL,
+// which defaults to the same service's /predict_batch.
+const PREDICT_URL = process.env.FASTAPI_URL || "http://127.0.0.1:8000/predict";
+const BATCH_URL =
+	process.env.FASTAPI_BATCH_URL ||
+	PREDICT_URL.replace(/\/predict\/?$/, "") + "/predict_batch";
+
+const envNumber = (name, fallback) => {
+	const value = Number(process.env[name]);
+	return Number.isFinite(value) && process.env[name] !== "" ? value : fallback;
+};
+
+const BATCH_WINDOW_MS = envNumber("PREDICTOR_BATCH_WINDOW_MS", 5);
+const MAX_BATCH_SIZE = envNumber("PREDICTOR_MAX_BATCH_SIZE", 64);
+const MAX_CONCURRENCY = envNumber("PREDICTOR_MAX_CONCURRENCY", 4); // batches in flight
+const MAX_QUEUE = envNumber("PREDICTOR_MAX_QUEUE", 2000); // products waiting
+const TIMEOUT_MS = envNumber("PREDICTOR_TIMEOUT_MS", 2000);
+const RETRIES = envNumber("PREDICTOR_RETRIES", 1);
+const RETRY_BACKOFF_MS = envNumber("PREDICTOR_RETRY_BACKOFF_MS", 100);
+const COOLDOWN_MS = envNumber("PREDICTOR_COOLDOWN_MS", 5000);
+const FAILURES_BEFORE_COOLDOWN = envNumber("PREDICTOR_FAILURES_BEFORE_COOLDOWN", 3);
+
+// The nine model features; a change to any of them needs a new prediction
+export const PRICING_FEATURES = [
+	"actual_price",
+	"selling_price",
+	"ebay_price",
+	"stock",
+	"demand_index",
+	"user_interest",
+	"sales",
+	"day_of_week",
+	"season",
+];
+// The service has defaults for day_of_week and season; the rest must be numbers
+const REQUIRED_FEATURES = PRICING_FEATURES.slice(0, 7);
+// day_of_week and season are integers (the service's Product model) in these ranges
+const INTEGER_FEATURE_RANGES = { day_of_week: [0, 6], season: [0, 3] };
+
+// -----------------------------
+// HTTP client (keep-alive, one pool per process)
+// -----------------------------
+const agentOptions = { keepAlive: true, maxSockets: MAX_CONCURRENCY, maxFreeSockets: MAX_CONCURRENCY };
+const client = axios.create({
+	timeout: TIMEOUT_MS,
+	httpAgent: new http.Agent(agentOptions),
+	httpsAgent: new https.Agent(agentOptions),
+});
+
+// -----------------------------
+// Batching state
+// -----------------------------
+let pending = []; // { payload, resolve } waiting for the next flush
+let flushTimer = null;
+let inFlight = 0;
+let consecutiveFailures = 0;
+let cooldownUntil = 0;
+
+const stats = {
+	calls: 0,
+	batches: 0,
+	predicted: 0,
+	fallbacks: 0,
+	rejected: 0, // queue full or cooling down
+	incomplete: 0, // missing a required feature; never sent
+	retries: 0,
+	errors: 0,
+};
+
+export function predictorStats() {
+	return { ...stats, pending: pending.length, inFlight, coolingDown: Date.now() < cooldownUntil };
+}
+
+// The number the service would read from a feature value, or null if it would reject it
+function featureNumber(value) {
+	if (typeof value === "string" && value.trim() !== "") value = Number(value);
+	return typeof value === "number" && Number.isFinite(value) ? value : null;
+}
+
+function validInteger(key, value) {
+	const [min, max] = INTEGER_FEATURE_RANGES[key];
+	return Number.isInteger(value) && value >= min && value <= max;
+}
+
+// Only values the service accepts are sent: one invalid product fails its whole batch
+function toPayload(productData) {
+	const payload = {};
+	for (const key of PRICING_FEATURES) {
+		const value = featureNumber(productData[key]);
+		if (value !== null) payload[key] = value;
+	}
+	// Optional strings: the rule category and the name the elasticity index is keyed on
+	const productName = productData.product_name ?? productData.name;
+	if (typeof productData.category === "string" && productData.category) payload.category = productData.category;
+	if (typeof productName === "string" && productName) payload.product_name = productName;
+	return payload;
+}
+
+// A product the service would reject would fail its whole batch, so it is never queued
+export function canPredict(productData) {
+	const requiredOk = REQUIRED_FEATURES.every((key) => featureNumber(productData[key]) !== null);
+	return (
+		requiredOk &&
+		Object.keys(INTEGER_FEATURE_RANGES).every((key) => {
+			const value = productData[key];
+			// Missing is fine (the service defaults it); present must be a valid integer
+			return value === undefined || value === null || validInteger(key, featureNumber(value));
+		})
+	);
+}
+
+// Fingerprint of the pricing features, stored as `features_hash` after each prediction
+export function featureHash(productData) {
+	const values = PRICING_FEATURES.map((key) => productData[key] ?? null);
+	return crypto.createHash("sha1").update(JSON.stringify(values)).digest("hex").slice(0, 16);
+}
+
+// Stored predicted price if the product has one, else its selling price
+function fallbackPrice(productData, fallback) {
+	if (fallback !== undefined && fallback !== null) return fallback;
+	if (productData.predicted_price) return productData.predicted_price;
+	return productData.selling_price;
+}
+
+const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+
+// Transient gateway / overload statuses only; a 500 is a server bug that the
+// same batch would hit again
+const RETRY_STATUSES = new Set([502, 503, 504]);
+
+function retryable(error) {
+	if (!error.response) return true; // timeout / connection reset / refused
+	return RETRY_STATUSES.has(error.response.status);
+}
+
+async function postBatch(products) {
+	for (let attempt = 0; ; attempt++) {
+		try {
+			const response = await client.post(BATCH_URL, { products });
+			return response.data.predictions;
+		} catch (error) {
+			if (attempt >= RETRIES || !retryable(error)) throw error;
+			stats.retries++;
+			await sleep(RETRY_BACKOFF_MS * 2 ** attempt);
+		}
+	}
+}
+
+function scheduleFlush() {
+	if (pending.length >= MAX_BATCH_SIZE) {
+		flush();
+	} else if (!flushTimer) {
+		flushTimer = setTimeout(flush, BATCH_WINDOW_MS);
+	}
+}
+
+function flush() {
+	if (flushTimer) {
+		clearTimeout(flushTimer);
+		flushTimer = null;
+	}
+	// At most MAX_CONCURRENCY batches in flight; the rest wait in `pending`
+	while (pending.length && inFlight < MAX_CONCURRENCY) {
+		const batch = pending.splice(0, MAX_BATCH_SIZE);
+		inFlight++;
+		sendBatch(batch).finally(() => {
+			inFlight--;
+			if (pending.length) scheduleFlush();
 		});
+	}
+}
 
-		return response.data.predicted_price;
+async function sendBatch(batch) {
+	stats.batches++;
+	try {
+		const predictions = await postBatch(batch.map((item) => item.payload));
+		consecutiveFailures = 0;
+		batch.forEach((item, i) => item.resolve(predictions[i].predicted_price));
+		stats.predicted += batch.length;
 	} catch (error) {
+		stats.errors++;
+		if (++consecutiveFailures >= FAILURES_BEFORE_COOLDOWN) {
+			cooldownUntil = Date.now() + COOLDOWN_MS;
+		}
 		console.error("Prediction API error:", error.message);
-		return productData.selling_price; // fallback
+		batch.forEach((item) => item.resolve(null));
+	}
+}
+
+// -----------------------------
+// Public API
+// -----------------------------
+// Queue one product; resolves to its predicted price, or null if unavailable
+function enqueue(productData) {
+	if (!canPredict(productData)) {
+		stats.incomplete++;
+		return Promise.resolve(null);
+	}
+	if (Date.now() < cooldownUntil || pending.length >= MAX_QUEUE) {
+		stats.rejected++;
+		return Promise.resolve(null);
 	}
+	return new Promise((resolve) => {
+		pending.push({ payload: toPayload(productData), resolve });
+		scheduleFlush();
+	});
+}
+
+/**
+ * Predicted price for one product. Concurrent calls within
+ * PREDICTOR_BATCH_WINDOW_MS are merged into one /predict_batch request.
+ * Never rejects: if the service is down, saturated or cooling down after
+ * repeated failures, resolves to `fallback` (e.g. the stored predicted_price),
+ * else the product's own predicted_price or selling_price.
+ */
+export function getPredictedPrice(productData, fallback) {
+	stats.calls++;
+	return enqueue(productData).then((price) => {
+		if (price !== null) return price;
+		stats.fallbacks++;
+		return fallbackPrice(productData, fallback);
+	});
+}
+
+/**
+ * Predicted prices for many products (same order). Goes through the same
+ * queue, so bulk imports share the connection pool and concurrency limit.
+ */
+export function getPredictedPrices(products, fallbacks = []) {
+	return Promise.all(products.map((p, i) => getPredictedPrice(p, fallbacks[i])));
+}
+
+/**
+ * Like getPredictedPrices, but resolves to null for products that could not
+ * be priced, so background jobs can retry them later instead of storing a
+ * fallback.
+ */
+export function tryPredictPrices(products) {
+	stats.calls += products.length;
+	return Promise.all(products.map(enqueue));
 }
@@ -0,0 +1,203 @@
+// repricer.js
+// Re-prices only products whose pricing features changed since their last
+// prediction. Dirty products reach the worker three ways:
+//   * markDirty(ids), called by the API after an update (debounced queue);
+//   * a MongoDB change stream on the nine pricing fields, so direct writes
+//     (e.g. competitor price or demand feeds) are picked up too;
+//   * a periodic sweep of `price_dirty` / never-priced products, which also
+//     covers deployments without change streams (standalone mongod).
+// Results are written back with one bulkWrite per batch.
+import { pathToFileURL } from "url";
+import mongoose from "mongoose";
+import dotenv from "dotenv";
+import Product from "../models/Product.js";
+import { PRICING_FEATURES, canPredict, featureHash, tryPredictPrices } from "../utils/predictor.js";
+dotenv.config();
+
+const envNumber = (name, fallback) => {
+	const value = Number(process.env[name]);
+	return Number.isFinite(value) && process.env[name] !== "" ? value : fallback;
+};
+
+const DEBOUNCE_MS = envNumber("REPRICER_DEBOUNCE_MS", 250);
+const SWEEP_INTERVAL_MS = envNumber("REPRICER_SWEEP_INTERVAL_MS", 60000);
+const BATCH_SIZE = envNumber("REPRICER_BATCH_SIZE", 500);
+const USE_CHANGE_STREAM = process.env.REPRICER_CHANGE_STREAM !== "0";
+
+const PROJECTION = [...PRICING_FEATURES, "name", "features_hash", "price_dirty"].join(" ");
+const DIRTY_QUERY = { $or: [{ price_dirty: true }, { features_hash: { $exists: false } }] };
+
+// -----------------------------
+// State
+// -----------------------------
+const queue = new Set(); // product ids (strings) waiting for the next pass
+let debounceTimer = null;
+let running = null; // promise of the pass in progress
+let sweepTimer = null;
+let changeStream = null;
+
+const stats = { passes: 0, scanned: 0, repriced: 0, unchanged: 0, incomplete: 0, failed: 0, conflicts: 0 };
+
+export function repricerStats() {
+	return { ...stats, queued: queue.size, changeStream: Boolean(changeStream) };
+}
+
+// -----------------------------
+// Re-pricing
+// -----------------------------
+// Matches the product only while its pricing features are still the ones we read
+function featureFilter(doc) {
+	const filter = { _id: doc._id };
+	for (const key of PRICING_FEATURES) filter[key] = doc[key] ?? null;
+	return filter;
+}
+
+/**
+ * Re-prices a list of product documents (lean, with PROJECTION). Products
+ * whose features still match `features_hash` are only un-flagged, and so are
+ * products missing a required feature (they keep their stored price until
+ * one of their pricing fields changes). Each write
+ * is conditional on the features it was priced from, so a product edited
+ * mid-pass stays dirty and is picked up again. Products that could not be
+ * priced (service unavailable) are flagged dirty; returns how many.
+ */
+async function repriceDocs(docs) {
+	stats.scanned += docs.length;
+	const ops = [];
+	const todo = [];
+	for (const doc of docs) {
+		const hash = featureHash(doc);
+		if (hash === doc.features_hash) {
+			stats.unchanged++;
+			if (doc.price_dirty) {
+				ops.push({ updateOne: { filter: { _id: doc._id, features_hash: hash }, update: { $set: { price_dirty: false } } } });
+			}
+		} else if (!canPredict(doc)) {
+			stats.incomplete++;
+			ops.push({ updateOne: { filter: featureFilter(doc), update: { $set: { features_hash: hash, price_dirty: false } } } });
+		} else {
+			todo.push({ doc, hash });
+		}
+	}
+
+	const prices = await tryPredictPrices(todo.map(({ doc }) => doc));
+	let failed = 0;
+	todo.forEach(({ doc, hash }, i) => {
+		if (prices[i] === null) {
+			failed++;
+			ops.push({ updateOne: { filter: { _id: doc._id }, update: { $set: { price_dirty: true } } } });
+			return;
+		}
+		ops.push({
+			updateOne: {
+				filter: featureFilter(doc),
+				update: {
+					$set: { predicted_price: prices[i], features_hash: hash, price_dirty: false, priced_at: new Date() },
+				},
+			},
+		});
+	});
+
+	if (ops.length) {
+		const result = await Product.bulkWrite(ops, { ordered: false });
+		stats.conflicts += ops.length - result.matchedCount;
+	}
+	stats.repriced += todo.length - failed;
+	stats.failed += failed;
+	return failed;
+}
+
+async function repriceIds(ids) {
+	for (let i = 0; i < ids.length; i += BATCH_SIZE) {
+		const chunk = ids.slice(i, i + BATCH_SIZE);
+		const docs = await Product.find({ _id: { $in: chunk } }, PROJECTION).lean();
+		if (await repriceDocs(docs)) return; // service unavailable; the sweep retries the rest
+	}
+}
+
+/** Re-prices every flagged or never-priced product, BATCH_SIZE at a time. */
+export async function sweep() {
+	let lastId = null;
+	for (;;) {
+		const query = lastId ? { $and: [DIRTY_QUERY, { _id: { $gt: lastId } }] } : DIRTY_QUERY;
+		const docs = await Product.find(query, PROJECTION).sort({ _id: 1 }).limit(BATCH_SIZE).lean();
+		if (!docs.length) return;
+		if (await repriceDocs(docs)) return; // service unavailable; retry on the next sweep
+		lastId = docs[docs.length - 1]._id;
+	}
+}
+
+function runPass(fn) {
+	// One pass at a time; callers queue behind the current one
+	const previous = running || Promise.resolve();
+	const pass = previous
+		.then(fn)
+		.catch((error) => console.error("❌ Re-pricing pass failed:", error.message))
+		.finally(() => {
+			stats.passes++;
+			if (running === pass) running = null;
+		});
+	running = pass;
+	return pass;
+}
+
+function flushQueue() {
+	debounceTimer = null;
+	const ids = [...queue];
+	queue.clear();
+	return runPass(() => repriceIds(ids));
+}
+
+/** Queue products for re-pricing (debounced by REPRICER_DEBOUNCE_MS). */
+export function markDirty(ids) {
+	for (const id of ids) queue.add(String(id));
+	if (!debounceTimer) debounceTimer = setTimeout(flushQueue, DEBOUNCE_MS);
+}
+
+// -----------------------------
+// Change feed
+// -----------------------------
+function watchChanges() {
+	const pricingUpdate = PRICING_FEATURES.map((key) => ({
+		[`updateDescription.updatedFields.${key}`]: { $exists: true },
+	}));
+	const pipeline = [{ $match: { $or: [{ operationType: { $in: ["insert", "replace"] } }, ...pricingUpdate] } }];
+
+	changeStream = Product.watch(pipeline);
+	changeStream.on("change", (change) => markDirty([change.documentKey._id]));
+	changeStream.on("error", (error) => {
+		console.warn(`⚠️ Change stream unavailable (${error.message}); relying on the periodic sweep`);
+		changeStream.close().catch(() => {});
+		changeStream = null;
+	});
+}
+
+/** Starts the change-stream listener and the periodic sweep. Returns a stop function. */
+export function startRepricer() {
+	if (USE_CHANGE_STREAM) watchChanges();
+	runPass(sweep);
+	if (SWEEP_INTERVAL_MS > 0) {
+		sweepTimer = setInterval(() => runPass(sweep), SWEEP_INTERVAL_MS);
+	}
+	console.log("✅ Re-pricing worker started");
+
+	return async () => {
+		clearInterval(sweepTimer);
+		if (debounceTimer) clearTimeout(debounceTimer);
+		if (changeStream) await changeStream.close();
+		changeStream = null;
+		await running;
+	};
+}
+
+// -----------------------------
+// CLI: one sweep, e.g. from cron (`npm run reprice`)
+// -----------------------------
+if (import.meta.url === pathToFileURL(process.argv[1]).href) {
+	await mongoose.connect(process.env.MONGO_URI);
+	const t0 = Date.now();
+	await runPass(sweep);
+	console.log(`✅ Re-pricing sweep done in ${Date.now() - t0} ms`, repricerStats());
+	await mongoose.disconnect();
+	process.exit(0);
+}